@@ -0,0 +1,73 @@
+import argparse
+import os
+import tempfile
+from benchmarks.corpus import CORPUS_TYPES
+
+
+def parse_args():
+    """
+    Разбирает аргументы командной строки.
+    """
+    parser = argparse.ArgumentParser(
+        description="Бенчмарки на синтетических проектах: обход, разбор, сериализация, кэш и сквозной запуск без LLM."
+    )
+    parser.add_argument("--output", default="benchmark_results.json", help="Файл результатов (JSON).")
+    parser.add_argument("--compare", metavar="BASELINE", help="Сравнить с результатами предыдущего запуска.")
+    parser.add_argument("--types", default=",".join(CORPUS_TYPES), help="Типы проектов через запятую.")
+    parser.add_argument("--work-dir", help="Рабочий каталог (по умолчанию временный).")
+    parser.add_argument("--files", type=int, default=200, help="Файлов в каждом проекте.")
+    parser.add_argument("--depth", type=int, default=3, help="Глубина вложенности каталогов.")
+    parser.add_argument("--classes", type=int, default=2, help="Классов в файле.")
+    parser.add_argument("--methods", type=int, default=5, help="Методов в классе.")
+    parser.add_argument("--method-lines", type=int, default=10, help="Строк в теле метода.")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="Доля файлов-копий.")
+    parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора корпуса.")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов обхода и сериализации.")
+    parser.add_argument("--cache-operations", type=int, default=1000, help="Ключей в бенчмарке кэша запросов.")
+    parser.add_argument("--skip-end-to-end", action="store_true", help="Не выполнять сквозной запуск main.py.")
+    args = parser.parse_args()
+    args.types = [t.strip() for t in args.types.split(",") if t.strip()]
+    unknown = set(args.types) - set(CORPUS_TYPES)
+    if unknown:
+        parser.error(f"Unknown project types: {', '.join(sorted(unknown))}.")
+    return args
+
+
+def main():
+    args = parse_args()
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="project2jsonl_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+
+    # Модули проекта читают настройки при импорте, поэтому окружение задаётся до импорта suite:
+    # LLM отключена, кэш запросов и журналы — в рабочем каталоге, а не в кэше проекта
+    os.environ["LLM_SERVER_URL"] = ""
+    os.environ["QUERY_CACHE_PATH"] = os.path.join(work_dir, "cache.db")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("ID_MODE", "deterministic")
+
+    from benchmarks.suite import compare_results, run_suite, save_results
+    from utils.serializer import loads
+
+    corpus_options = {
+        "files": args.files,
+        "depth": args.depth,
+        "classes_per_file": args.classes,
+        "methods_per_class": args.methods,
+        "method_lines": args.method_lines,
+        "duplicate_ratio": args.duplicate_ratio,
+        "seed": args.seed,
+    }
+    results = run_suite(work_dir, args.types, corpus_options, repeat=args.repeat,
+                        cache_operations=args.cache_operations, end_to_end=not args.skip_end_to_end)
+    save_results(results, args.output)
+    print(f"Результаты бенчмарков сохранены в: {args.output} (рабочий каталог: {work_dir})")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = loads(file.read())
+        for name, before, after, ratio in compare_results(baseline, results):
+            print(f"{name}: {before:.6f} -> {after:.6f} (x{ratio})")
+
+
+if __name__ == "__main__":
+    main()
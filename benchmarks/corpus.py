@@ -0,0 +1,161 @@
+import os
+import random
+
+# Типы синтетических проектов (совпадают с PROJECT_TYPES)
+CORPUS_TYPES = ("python", "yii2", "bitrix", "react")
+
+# Каталоги верхнего уровня: обработчики Yii2 и Bitrix определяют тип файла по имени каталога
+_TOP_DIRECTORIES = {
+    "python": ("app", "services", "core"),
+    "yii2": ("controllers", "models", "widgets", "helpers"),
+    "bitrix": (os.path.join("local", "modules"), os.path.join("local", "components")),
+    "react": (os.path.join("src", "components"), os.path.join("src", "hooks"), os.path.join("src", "services")),
+}
+
+_WORDS = ("order", "user", "invoice", "report", "cache", "queue", "item", "price", "stock", "event",
+          "payment", "session", "profile", "message", "task", "route")
+
+
+def _name(rng, capitalize=False):
+    words = rng.sample(_WORDS, 2)
+    if capitalize:
+        return "".join(word.capitalize() for word in words)
+    return words[0] + words[1].capitalize()
+
+
+def _body_lines(rng, count, assign, call):
+    lines = []
+    for index in range(count):
+        if index % 3 == 2:
+            lines.append(call(_name(rng), f"value{index - 1}"))
+        else:
+            lines.append(assign(f"value{index}", rng.randint(0, 1000)))
+    return lines
+
+
+def _render_python(rng, index, classes, methods, method_lines):
+    parts = ["import os", "from collections import defaultdict", "", f"LIMIT_{index} = {rng.randint(1, 100)}", ""]
+    for class_index in range(classes):
+        parts.append(f"class {_name(rng, True)}{index}_{class_index}:")
+        parts.append(f'    """Synthetic class {class_index}."""')
+        parts.append("    enabled = True")
+        for method_index in range(methods):
+            parts.append("")
+            parts.append(f"    def {_name(rng)}_{method_index}(self, value):")
+            parts.extend("        " + line for line in _body_lines(
+                rng, method_lines, lambda name, value: f"{name} = value + {value}",
+                lambda name, arg: f"print({arg})"))
+            parts.append("        return value")
+        parts.append("")
+    parts.append(f"def {_name(rng)}_{index}(items):")
+    parts.append("    return [item for item in items if item]")
+    return "\n".join(parts) + "\n"
+
+
+def _render_php(rng, index, classes, methods, method_lines, namespace):
+    parts = ["<?php", "", f"namespace {namespace};", "", "use yii\\base\\Component;", ""]
+    for class_index in range(classes):
+        parts.append(f"class {_name(rng, True)}{index}_{class_index} extends Component")
+        parts.append("{")
+        parts.append(f"    public $limit = {rng.randint(1, 100)};")
+        parts.append("    protected $items = [];")
+        for method_index in range(methods):
+            parts.append("")
+            parts.append(f"    public function {_name(rng)}{method_index}($value)")
+            parts.append("    {")
+            parts.extend("        " + line for line in _body_lines(
+                rng, method_lines, lambda name, value: f"${name} = $value + {value};",
+                lambda name, arg: f"$this->items[] = ${arg};"))
+            parts.append("        return $value;")
+            parts.append("    }")
+        parts.append("}")
+        parts.append("")
+    parts.append(f"function {_name(rng)}{index}($items)")
+    parts.append("{")
+    parts.append("    return array_filter($items);")
+    parts.append("}")
+    return "\n".join(parts) + "\n"
+
+
+def _render_ts(rng, index, classes, methods, method_lines):
+    parts = ["import { useState } from 'react';", "",
+             f"export interface Props{index} {{", "  title: string;", "  count?: number;", "}", ""]
+    for class_index in range(classes):
+        parts.append(f"export class {_name(rng, True)}{index}_{class_index} {{")
+        parts.append("  private items: number[] = [];")
+        for method_index in range(methods):
+            parts.append("")
+            parts.append(f"  public {_name(rng)}{method_index}(value: number): number {{")
+            parts.extend("    " + line for line in _body_lines(
+                rng, method_lines, lambda name, value: f"const {name} = value + {value};",
+                lambda name, arg: f"this.items.push({arg});"))
+            parts.append("    return value;")
+            parts.append("  }")
+        parts.append("}")
+        parts.append("")
+    parts.append(f"export function Component{index}(props: Props{index}) {{")
+    parts.append("  const [state, setState] = useState(0);")
+    parts.append("  return state + (props.count || 0);")
+    parts.append("}")
+    return "\n".join(parts) + "\n"
+
+
+def _get_relative_path(rng, project_type, index, depth):
+    top = _TOP_DIRECTORIES[project_type][index % len(_TOP_DIRECTORIES[project_type])]
+    nested = [f"d{rng.randint(0, 3)}" for _ in range(max(depth - 1, 0))]
+    if project_type == "python":
+        file_name = f"module_{index}.py"
+    elif project_type == "react":
+        file_name = f"Component{index}.{'tsx' if index % 2 else 'ts'}"
+    else:
+        file_name = f"File{index}.php"
+    return os.path.join(top, *nested, file_name)
+
+
+def generate_corpus(root, project_type, files=100, depth=2, classes_per_file=2, methods_per_class=4,
+                    method_lines=8, duplicate_ratio=0.1, seed=0):
+    """
+    Создаёт синтетический проект для бенчмарков: дерево файлов с классами, методами и функциями
+    в структуре, которую ожидает обработчик типа проекта.
+
+    :param root: Каталог проекта (создаётся при необходимости).
+    :param project_type: Тип проекта из CORPUS_TYPES.
+    :param files: Количество файлов.
+    :param depth: Глубина вложенности каталогов (1 — файлы в каталогах верхнего уровня).
+    :param classes_per_file: Количество классов в файле.
+    :param methods_per_class: Количество методов в классе.
+    :param method_lines: Количество строк в теле метода.
+    :param duplicate_ratio: Доля файлов — точных копий других файлов корпуса (от 0 до 1).
+    :param seed: Начальное значение генератора (одинаковые параметры дают одинаковый корпус).
+    :return: Словарь {"files", "duplicates", "bytes", "paths"}; paths — относительные пути файлов.
+    :raises ValueError: Если тип проекта или параметры некорректны.
+    """
+    if project_type not in CORPUS_TYPES:
+        raise ValueError(f"Unsupported corpus type '{project_type}'. Available: {', '.join(CORPUS_TYPES)}.")
+    if not 0 <= duplicate_ratio < 1:
+        raise ValueError("duplicate_ratio must be in [0, 1).")
+
+    rng = random.Random(f"{seed}:{project_type}")
+    duplicates = int(files * duplicate_ratio)
+    contents, paths, size = [], [], 0
+    for index in range(files):
+        relative_path = _get_relative_path(rng, project_type, index, depth)
+        if index >= files - duplicates and contents:
+            content = rng.choice(contents[:files - duplicates])
+        elif project_type == "python":
+            content = _render_python(rng, index, classes_per_file, methods_per_class, method_lines)
+        elif project_type == "react":
+            content = _render_ts(rng, index, classes_per_file, methods_per_class, method_lines)
+        else:
+            namespace = "app\\models" if project_type == "yii2" else "Local\\Modules"
+            content = _render_php(rng, index, classes_per_file, methods_per_class, method_lines, namespace)
+        contents.append(content)
+
+        file_path = os.path.join(root, relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        paths.append(relative_path)
+        size += len(content.encode("utf-8"))
+
+    return {"files": files, "duplicates": duplicates, "bytes": size, "paths": paths}
@@ -0,0 +1,261 @@
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+from dotenv import dotenv_values
+from benchmarks.corpus import generate_corpus
+from extractors.bitrix_extractor import BitrixExtractor
+from extractors.python_extractor import PythonExtractor
+from extractors.react_extractor import ReactExtractor
+from extractors.yii2_extractor import Yii2Extractor
+from formatters.json_manager import JSONManager
+from formatters.output_writers import atomic_open
+from utils.metrics import get_metrics_report_path
+from utils.query_cache import get_cached_response, save_response
+from utils.serializer import dump, loads
+
+# Обработчики по типам синтетических проектов
+EXTRACTORS = {
+    "python": PythonExtractor,
+    "yii2": Yii2Extractor,
+    "bitrix": BitrixExtractor,
+    "react": ReactExtractor,
+}
+
+# Корень репозитория (для запуска main.py в сквозном бенчмарке)
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def summarize(durations):
+    """
+    Сводка длительностей.
+
+    :param durations: Список длительностей в секундах.
+    :return: Словарь {"count", "total", "min", "mean", "p50", "p95", "max"}.
+    """
+    if not durations:
+        return {"count": 0}
+    ordered = sorted(durations)
+    return {
+        "count": len(ordered),
+        "total": round(sum(ordered), 6),
+        "min": round(ordered[0], 6),
+        "mean": round(sum(ordered) / len(ordered), 6),
+        "p50": round(ordered[(len(ordered) - 1) // 2], 6),
+        "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 6),
+        "max": round(ordered[-1], 6),
+    }
+
+
+def measure(func, repeat):
+    """
+    Выполняет функцию repeat раз и возвращает сводку длительностей и результат последнего вызова.
+
+    :param func: Функция без аргументов.
+    :param repeat: Количество повторов.
+    :return: Кортеж (сводка, результат).
+    """
+    durations, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+    return summarize(durations), result
+
+
+def create_extractor(project_type, project_root, output_dir, json_manager):
+    """
+    Создаёт обработчик типа проекта с настройками по умолчанию.
+    """
+    return EXTRACTORS[project_type](
+        project_root=project_root,
+        output_dir=output_dir,
+        prefix="bench",
+        json_manager=json_manager,
+    )
+
+
+def bench_discovery(extractor, repeat):
+    """
+    Обход файлов проекта (iter_discovered_files) без чтения и разбора.
+    """
+    summary, files = measure(lambda: list(extractor.iter_discovered_files()), repeat)
+    return dict(summary, files=len(files))
+
+
+def bench_parse(extractor, files):
+    """
+    Разбор структуры каждого файла (parse_structure, без LLM). Если парсер недоступен
+    (например, не установлен PHP или Node.js), бенчмарк пропускается.
+
+    :return: Кортеж (результат, записи файлов).
+    """
+    durations, records = [], []
+    for file_path, _ in files:
+        content = extractor.read_source(file_path)
+        started = time.perf_counter()
+        try:
+            file_records = extractor.parse_structure(file_path, content)
+        except Exception as e:
+            message = str(e).strip().splitlines()
+            return {"skipped": f"{type(e).__name__}: {message[0] if message else ''}"}, []
+        durations.append(time.perf_counter() - started)
+        records.extend(file_records or [])
+    summary = summarize(durations)
+    if durations:
+        summary["files_per_second"] = round(len(durations) / max(sum(durations), 1e-9), 1)
+    return summary, records
+
+
+def bench_serialization(project_type, records, output_dir, repeat):
+    """
+    Сохранение записей JSONManager.save_all (JSONL, JSON, сводные файлы).
+    """
+    scope = f"{project_type}_bench"
+
+    def save():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        json_manager = JSONManager(output_directory=output_dir, project_prefix="bench")
+        json_manager.add_data(scope, list(records))
+        json_manager.save_all()
+        json_manager.close()
+
+    summary, _ = measure(save, repeat)
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(output_dir) for name in names)
+    return dict(summary, records=len(records), bytes=size)
+
+
+def bench_cache(operations):
+    """
+    Запись и чтение кэша запросов LLM (utils.query_cache): промахи, записи и попадания.
+    """
+    keys = [f"benchmark:{time.time_ns()}:{index}" for index in range(operations)]
+    results = {}
+    for name, func in (
+        ("miss", lambda key: get_cached_response(key)),
+        ("write", lambda key: save_response(key, f"answer for {key}")),
+        ("hit", lambda key: get_cached_response(key)),
+    ):
+        durations = []
+        for key in keys:
+            started = time.perf_counter()
+            func(key)
+            durations.append(time.perf_counter() - started)
+        results[name] = summarize(durations)
+    return results
+
+
+def bench_end_to_end(project_type, project_root, output_dir, env, work_dir):
+    """
+    Полный запуск main.py без LLM для одного типа проекта (отдельный процесс).
+
+    Процесс запускается в рабочем каталоге (журналы logs/ пишутся туда, а не в репозиторий) с настройками
+    default.env: load_dotenv не переопределяет заданные переменные, поэтому .env разработчика не влияет
+    на результаты.
+    """
+    shutil.rmtree(output_dir, ignore_errors=True)
+    defaults = {key: value or "" for key, value in dotenv_values(os.path.join(REPOSITORY_ROOT, "default.env")).items()}
+    run_env = dict(defaults, **env)
+    run_env.update(SOURCE_DIR=project_root, OUTPUT_DIR=output_dir, PROJECT_TYPES=project_type,
+                   PROJECT_PREFIX="bench", INCLUDED_FILES="", RUN_JOURNAL="false", METRICS_REPORT="true")
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, os.path.join(REPOSITORY_ROOT, "main.py")], cwd=work_dir,
+                               env=run_env, capture_output=True, text=True)
+    result = {"seconds": round(time.perf_counter() - started, 6), "returncode": completed.returncode}
+    report_path = get_metrics_report_path(output_dir, "bench")
+    if os.path.exists(report_path):
+        with open(report_path, 'r', encoding='utf-8') as file:
+            result["summary"] = loads(file.read()).get("summary")
+    if completed.returncode != 0:
+        result["stderr"] = completed.stderr[-2000:]
+    return result
+
+
+def run_suite(work_dir, project_types, corpus_options, repeat=3, cache_operations=1000, end_to_end=True):
+    """
+    Выполняет бенчмарки на синтетических проектах: обход файлов, разбор, сериализация, кэш запросов
+    и сквозной запуск без LLM.
+
+    :param work_dir: Рабочий каталог (корпуса и выгрузки).
+    :param project_types: Типы проектов из CORPUS_TYPES.
+    :param corpus_options: Параметры generate_corpus (files, depth, classes_per_file, ...).
+    :param repeat: Количество повторов обхода и сериализации.
+    :param cache_operations: Количество ключей в бенчмарке кэша.
+    :param end_to_end: Выполнять ли сквозной запуск main.py.
+    :return: Словарь результатов.
+    """
+    results = {
+        "started_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": corpus_options,
+        "repeat": repeat,
+        "types": {},
+        "cache": bench_cache(cache_operations),
+    }
+
+    for project_type in project_types:
+        project_root = os.path.join(work_dir, "corpus", project_type)
+        shutil.rmtree(project_root, ignore_errors=True)
+        corpus = generate_corpus(project_root, project_type, **corpus_options)
+        output_dir = os.path.join(work_dir, "output", project_type)
+        json_manager = JSONManager(output_directory=output_dir, project_prefix="bench")
+        extractor = create_extractor(project_type, project_root, output_dir, json_manager)
+
+        type_results = {"corpus": {key: corpus[key] for key in ("files", "duplicates", "bytes")}}
+        type_results["discovery"] = bench_discovery(extractor, repeat)
+        files = list(extractor.iter_discovered_files())
+        type_results["parse"], records = bench_parse(extractor, files)
+        if records:
+            type_results["serialization"] = bench_serialization(
+                project_type, records, os.path.join(work_dir, "serialization", project_type), repeat
+            )
+        if end_to_end:
+            type_results["end_to_end"] = bench_end_to_end(
+                project_type, project_root, os.path.join(work_dir, "end_to_end", project_type), os.environ, work_dir
+            )
+        results["types"][project_type] = type_results
+        print(f"Бенчмарк {project_type}: {type_results['parse']}")
+
+    return results
+
+
+def save_results(results, path):
+    """
+    Сохраняет результаты бенчмарков в JSON.
+
+    :param results: Словарь результатов run_suite.
+    :param path: Путь к файлу.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with atomic_open(path) as file:
+        dump(results, file, indent=4)
+
+
+def _iter_timings(results, path=()):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from _iter_timings(value, path + (key,))
+        elif key in ("mean", "seconds"):
+            yield "/".join(path + (key,)), value
+
+
+def compare_results(baseline, current):
+    """
+    Сравнивает средние длительности двух запусков бенчмарков.
+
+    :param baseline: Результаты предыдущего запуска.
+    :param current: Результаты текущего запуска.
+    :return: Список кортежей (метрика, было, стало, отношение стало/было).
+    """
+    before = dict(_iter_timings(baseline))
+    rows = []
+    for name, value in _iter_timings(current):
+        if name in before and before[name]:
+            rows.append((name, before[name], value, round(value / before[name], 3)))
+    return rows
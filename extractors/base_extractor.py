@@ -1,7 +1,11 @@
 import os
 from abc import ABC
 from formatters.json_manager import JSONManager
-from utils.logger import global_logger as logger
+from utils.logger import ProgressLogger, get_logger
+from utils.metrics import metrics
+from utils.profiler import profile_file
+
+logger = get_logger("extractors")
 
 
 class BaseExtractor(ABC):
@@ -9,6 +13,12 @@ class BaseExtractor(ABC):
     Базовый класс для всех обработчиков исходного кода.
     """
 
+    # Расширения обрабатываемых файлов
+    file_extensions = ()
+
+    # Название вида файлов для сообщений (например, "PHP файлом")
+    file_kind = "поддерживаемым файлом"
+
     def __init__(self, project_root, output_dir, prefix, json_manager, chunk_size=5000, excluded_dirs=None, included_files=None):
         """
         Инициализация базового обработчика.
@@ -51,6 +61,9 @@ class BaseExtractor(ABC):
         self.json_manager = json_manager  # Менеджер для сохранения данных
         self.chunk_size = chunk_size
         self.included_files = included_files
+        self.journal = None  # Журнал запуска (utils.journal.RunJournal) для пропуска и отметки файлов
+        self.file_filter = None  # Функция (относительный путь) -> bool, например отбор файлов шарда
+        self.progress = ProgressLogger(logger, type(self).__name__)  # Сводка по файлам на INFO
 
     def is_excluded(self, directory):
         """
@@ -77,6 +90,162 @@ class BaseExtractor(ABC):
 
         return False
 
+    def extract(self):
+        """
+        Обрабатывает все файлы проекта, перечисленные iter_files, кроме отклонённых should_process.
+        Если подключён журнал, обработанные файлы отмечаются в нём.
+        """
+        for file_path, directory_type in self.iter_discovered_files():
+            if not self.should_process(file_path):
+                continue
+            with metrics.timer("file_seconds", extractor=type(self).__name__), \
+                    profile_file(os.path.relpath(file_path, self.project_root)):
+                self.process_file(file_path, directory_type)
+            if self.journal is not None:
+                self.journal.mark_completed(os.path.relpath(file_path, self.project_root))
+
+    def should_process(self, file_path):
+        """
+        Проверяет, нужно ли обрабатывать найденный файл: он проходит file_filter
+        и не был обработан в прерванном запуске (по журналу).
+
+        :param file_path: Абсолютный путь к файлу.
+        :return: bool.
+        """
+        relative_path = os.path.relpath(file_path, self.project_root)
+        if self.file_filter is not None and not self.file_filter(relative_path):
+            return False
+        if self.journal is not None and self.journal.is_completed(relative_path):
+            logger.debug(f"Файл {file_path} обработан в прерванном запуске. Пропуск.")
+            return False
+        return True
+
+    def iter_files(self):
+        """
+        Перечисляет файлы проекта, которые обрабатывает обработчик, в порядке обработки.
+
+        :yield: Кортежи (абсолютный путь к файлу, тип каталога или None).
+        """
+        raise NotImplementedError
+
+    def iter_discovered_files(self):
+        """
+        Перечисляет файлы iter_files, учитывая время обхода и количество найденных файлов в метриках
+        (discovery_seconds_total, discovery_items_total).
+
+        :yield: Кортежи (абсолютный путь к файлу, тип каталога или None).
+        """
+        return metrics.timed_iter(self.iter_files(), "discovery", extractor=type(self).__name__)
+
+    def iter_included_files(self, relative_paths):
+        """
+        Перечисляет указанные файлы, пропуская отсутствующие и файлы с неподходящим расширением.
+
+        :param relative_paths: Список путей относительно корня проекта.
+        :yield: Кортежи (абсолютный путь к файлу, тип каталога или None).
+        """
+        for relative_file_path in relative_paths:
+            file_path = os.path.join(self.project_root, relative_file_path)
+
+            # Проверяем существование файла
+            if not os.path.isfile(file_path):
+                logger.warning(f"Файл {file_path} не существует. Пропуск.")
+                continue
+
+            # Проверяем расширение файла
+            if not file_path.endswith(tuple(self.file_extensions)):
+                logger.warning(f"Файл {file_path} не является {self.file_kind}. Пропуск.")
+                continue
+
+            logger.debug(f"Обработка файла из списка: {file_path}")
+            yield file_path, self.detect_directory_type(os.path.dirname(file_path))
+
+    def extract_files(self, relative_paths):
+        """
+        Обрабатывает только указанные файлы (используется инкрементальным режимом).
+
+        :param relative_paths: Список путей относительно корня проекта.
+        """
+        for file_path, directory_type in self.iter_included_files(relative_paths):
+            with profile_file(os.path.relpath(file_path, self.project_root)):
+                self.process_file(file_path, directory_type)
+
+    def accepts_file(self, file_path):
+        """
+        Проверяет, обрабатывает ли обработчик файл: подходящее расширение и ни один
+        из каталогов на пути от корня проекта не исключён.
+
+        :param file_path: Абсолютный путь к файлу.
+        :return: bool.
+        """
+        if not file_path.endswith(tuple(self.file_extensions)):
+            return False
+        project_root = os.path.abspath(self.project_root)
+        directory = os.path.dirname(os.path.abspath(file_path))
+        while directory.startswith(project_root + os.sep):
+            if self.is_excluded(directory):
+                return False
+            directory = os.path.dirname(directory)
+        return directory == project_root
+
+    def detect_directory_type(self, directory):
+        """
+        Определяет тип каталога. Обработчики без типов каталогов возвращают None.
+
+        :param directory: Путь к каталогу.
+        :return: Тип каталога или None.
+        """
+        return None
+
+    def process_file(self, file_path, directory_type=None):
+        """
+        Обрабатывает отдельный файл.
+
+        :param file_path: Путь к файлу.
+        :param directory_type: Тип каталога (для обработчиков, которые его различают).
+        """
+        raise NotImplementedError
+
+    def get_scope(self, directory_type=None):
+        """
+        Возвращает область данных для записей файла.
+
+        :param directory_type: Тип каталога (для обработчиков, которые его различают).
+        :return: Название области.
+        """
+        raise NotImplementedError
+
+    def read_source(self, file_path):
+        """
+        Читает содержимое файла для стадий разбора и обогащения конвейера.
+
+        :param file_path: Путь к файлу.
+        :return: Содержимое файла (str) или None, если парсер читает файл сам.
+        """
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def parse_structure(self, file_path, content=None):
+        """
+        Разбирает структуру файла без обращений к LLM.
+
+        :param file_path: Путь к файлу.
+        :param content: Содержимое файла, прочитанное read_source.
+        :return: Список записей файла.
+        """
+        raise NotImplementedError
+
+    def enrich_records(self, records, content=None, register_qa=True):
+        """
+        Дополняет записи описаниями от LLM. По умолчанию записи не меняются.
+
+        :param records: Список записей файла (изменяется на месте).
+        :param content: Содержимое файла, прочитанное read_source.
+        :param register_qa: Добавлять ли ответы QA в глобальный QAManager.
+        :return: Те же записи.
+        """
+        return records
+
     def add_chunks(self, scope, data):
         """
         Добавляет чанки данных в указанный scope через JSONManager.
@@ -84,4 +253,4 @@ class BaseExtractor(ABC):
         :param data: Данные для добавления.
         """
         self.json_manager.add_data(scope, data)
-        logger.info(f"Добавлено {len(data) if isinstance(data, list) else 1} чанков в область: {scope}")
+        self.progress.tick(f"добавлено {len(data) if isinstance(data, list) else 1} чанков в область {scope}")
@@ -1,8 +1,11 @@
 import os
 from extractors.base_extractor import BaseExtractor
-from parsers.python_parser import parse_python_code
+from parsers.python_parser import enrich_python_records, parse_python_code, parse_python_structure
 from utils.file_utils import get_all_files
-from utils.logger import global_logger as logger
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger("extractors")
 
 
 class PythonExtractor(BaseExtractor):
@@ -10,6 +13,9 @@ class PythonExtractor(BaseExtractor):
     Обработчик для извлечения данных из Python-кода.
     """
 
+    file_extensions = (".py",)
+    file_kind = "Python-файлом"
+
     def __init__(self, project_root, output_dir, prefix, json_manager, chunk_size=5000, excluded_dirs=None, included_files=None):
         """
         Инициализация обработчика Python-кода.
@@ -47,25 +53,18 @@ class PythonExtractor(BaseExtractor):
         Обрабатывает всю структуру каталогов проекта, за исключением исключенных каталогов.
         """
         logger.info(f"Начало обработки Python-кода в проекте: {self.project_root}")
+        super().extract()
 
+    def iter_files(self):
+        """
+        Перечисляет Python-файлы проекта (или только указанные в included_files).
+
+        :yield: Кортежи (путь к файлу, None).
+        """
         # Если указаны файлы для обработки, работаем только с ними
         if self.included_files:
             logger.info("Обработка только указанных файлов.")
-            for relative_file_path in self.included_files:
-                file_path = os.path.join(self.project_root, relative_file_path)
-
-                # Проверяем существование файла
-                if not os.path.isfile(file_path):
-                    logger.warning(f"Файл {file_path} не существует. Пропуск.")
-                    continue
-
-                # Проверяем расширение файла
-                if not file_path.endswith(".py"):
-                    logger.warning(f"Файл {file_path} не является Python-файлом. Пропуск.")
-                    continue
-
-                logger.info(f"Обработка файла из списка: {file_path}")
-                self.process_file(file_path)
+            yield from self.iter_included_files(self.included_files)
             return
 
         for root, dirs, _ in os.walk(self.project_root):
@@ -74,8 +73,9 @@ class PythonExtractor(BaseExtractor):
 
             # Определяем, содержит ли каталог Python-файлы
             if self.contains_python_files(root):
-                logger.info(f"Обработка каталога: {root}")
-                self.process_directory(root)
+                logger.debug(f"Обработка каталога: {root}")
+                for file_path in get_all_files(root, extensions=["py"], exclude_dirs=self.excluded_dirs):
+                    yield file_path, None
 
     def contains_python_files(self, directory):
         """
@@ -97,11 +97,29 @@ class PythonExtractor(BaseExtractor):
         for file_path in files:
             self.process_file(file_path)
 
-    def process_file(self, file_path):
+    def get_scope(self, directory_type=None):
+        """
+        Возвращает область данных для записей файла.
+        """
+        return "python_files"
+
+    def parse_structure(self, file_path, content=None):
+        """
+        Разбирает структуру файла без обращений к LLM.
+        """
+        return parse_python_structure(file_path, self.project_root, content)
+
+    def enrich_records(self, records, content=None, register_qa=True):
+        """
+        Дополняет записи описаниями от LLM.
+        """
+        return enrich_python_records(records, content, "python")
+
+    def process_file(self, file_path, directory_type=None):
         """
         Обрабатывает отдельный файл Python.
         """
-        logger.info(f"Обработка файла: {file_path}")
+        logger.debug(f"Обработка файла: {file_path}")
         try:
             # Парсинг Python файла
             parsed_file_data = parse_python_code(file_path, self.project_root, "python")
@@ -112,14 +130,18 @@ class PythonExtractor(BaseExtractor):
                 return
 
             # Добавляем данные в область через JSONManager
-            self.add_chunks("python_files", parsed_file_data)
-            logger.info(f"Файл успешно обработан: {file_path}")
+            self.add_chunks(self.get_scope(directory_type), parsed_file_data)
+            logger.debug(f"Файл успешно обработан: {file_path}")
 
         except FileNotFoundError as e:
             logger.error(f"Ошибка: Python файл не найден. {e}")
+            metrics.record_error(e, "process_file")
         except RuntimeError as e:
             logger.error(f"Ошибка выполнения парсера для файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
         except ValueError as e:
             logger.error(f"Ошибка парсинга файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
         except Exception as e:
             logger.error(f"Неизвестная ошибка при обработке файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
@@ -1,14 +1,19 @@
-import os
 from extractors.base_extractor import BaseExtractor
 from utils.file_utils import get_all_files
-from utils.logger import global_logger as logger
+from utils.logger import get_logger
+from utils.metrics import metrics
 from parsers.ts_parser import parse_ts_code  # Предполагается наличие парсера TypeScript
 
+logger = get_logger("extractors")
+
 class ReactExtractor(BaseExtractor):
     """
     Обработчик для React проектов на TypeScript.
     """
 
+    file_extensions = (".ts", ".tsx")
+    file_kind = "файлом React проекта"
+
     def __init__(self, project_root, output_dir, prefix, json_manager, chunk_size=5000, excluded_dirs=None, included_files=None):
         """
         Инициализация обработчика Python-кода.
@@ -46,37 +51,44 @@ class ReactExtractor(BaseExtractor):
         Обрабатывает все файлы проекта, относящиеся к React на TypeScript.
         """
         logger.info(f"Начало обработки React проекта в директории: {self.project_root}")
+        super().extract()
+        logger.info("Обработка React проекта завершена.")
 
+    def iter_files(self):
+        """
+        Перечисляет файлы .ts и .tsx проекта (или только указанные в included_files).
+
+        :yield: Кортежи (путь к файлу, None).
+        """
         if self.included_files:
             logger.info("Обработка только указанных файлов.")
-            allowed_extensions = [".ts", ".tsx"]
-            for relative_file_path in self.included_files:
-                file_path = os.path.join(self.project_root, relative_file_path)
-
-                # Проверяем существование файла
-                if not os.path.isfile(file_path):
-                    logger.warning(f"Файл {file_path} не существует. Пропуск.")
-                    continue
-
-                # Проверяем расширение файла
-                if not any(file_path.endswith(ext) for ext in allowed_extensions):
-                    logger.warning(f"Файл {file_path} не является файлом React проекта. Пропуск.")
-                    continue
-
-                logger.info(f"Обработка файла из списка: {file_path}")
-                self.process_file(file_path)
+            yield from self.iter_included_files(self.included_files)
             return
 
         # Получаем список файлов с расширениями .ts и .tsx
-        files = get_all_files(self.project_root, extensions=["ts", "tsx"], exclude_dirs=self.excluded_dirs)
+        for file_path in get_all_files(self.project_root, extensions=["ts", "tsx"], exclude_dirs=self.excluded_dirs):
+            yield file_path, None
+
+    def get_scope(self, directory_type=None):
+        """
+        Возвращает область данных для записей файла.
+        """
+        return "react_ts"
 
-        for file_path in files:
-            self.process_file(file_path)
+    def read_source(self, file_path):
+        """
+        Не читает файл: TS-парсер читает его сам.
+        """
+        return None
 
-        logger.info("Обработка React проекта завершена.")
+    def parse_structure(self, file_path, content=None):
+        """
+        Разбирает структуру файла без обращений к LLM.
+        """
+        return parse_ts_code(file_path, self.project_root)
 
-    def process_file(self, file_path):
-        logger.info(f"Обработка файла: {file_path}")
+    def process_file(self, file_path, directory_type=None):
+        logger.debug(f"Обработка файла: {file_path}")
         try:
             # Парсим файл с помощью TypeScript парсера
             parsed_data = parse_ts_code(file_path, self.project_root)
@@ -87,14 +99,18 @@ class ReactExtractor(BaseExtractor):
                 return
 
             # Добавляем данные в JSONManager
-            self.add_chunks("react_ts", parsed_data)
-            logger.info(f"Файл успешно обработан: {file_path}")
+            self.add_chunks(self.get_scope(directory_type), parsed_data)
+            logger.debug(f"Файл успешно обработан: {file_path}")
 
         except FileNotFoundError as e:
             logger.error(f"Ошибка: TypeScript парсер не найден. {e}")
+            metrics.record_error(e, "process_file")
         except RuntimeError as e:
             logger.error(f"Ошибка выполнения TypeScript парсера для файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
         except ValueError as e:
             logger.error(f"Ошибка парсинга файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
         except Exception as e:
             logger.error(f"Неизвестная ошибка при обработке файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
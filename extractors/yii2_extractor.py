@@ -1,8 +1,11 @@
 import os
 from extractors.base_extractor import BaseExtractor
-from parsers.php_parser import parse_php_code
+from parsers.php_parser import enrich_php_records, parse_php_code, parse_php_structure
 from utils.file_utils import get_all_files
-from utils.logger import global_logger as logger
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger("extractors")
 
 
 class Yii2Extractor(BaseExtractor):
@@ -10,6 +13,9 @@ class Yii2Extractor(BaseExtractor):
     Обработчик для извлечения данных из Yii2 проектов.
     """
 
+    file_extensions = (".php",)
+    file_kind = "PHP файлом"
+
     def __init__(self, project_root, output_dir, prefix, json_manager, chunk_size=5000, excluded_dirs=None, included_files=None):
         """
         Инициализация обработчика Python-кода.
@@ -50,23 +56,17 @@ class Yii2Extractor(BaseExtractor):
         """
         logger.info(f"Начало обработки структуры проекта: {self.project_root}")
 
-        if self.included_files:
-            logger.info("Обработка только указанных файлов.")
-            for relative_file_path in self.included_files:
-                file_path = os.path.join(self.project_root, relative_file_path)
-
-                # Проверяем существование файла
-                if not os.path.isfile(file_path):
-                    logger.warning(f"Файл {file_path} не существует. Пропуск.")
-                    continue
+        super().extract()
 
-                # Проверяем расширение файла
-                if not file_path.endswith(".php"):
-                    logger.warning(f"Файл {file_path} не является PHP файлом. Пропуск.")
-                    continue
+    def iter_files(self):
+        """
+        Перечисляет PHP-файлы проекта с типами их каталогов (или только указанные в included_files).
 
-                logger.info(f"Обработка файла из списка: {file_path}")
-                self.process_file(file_path, directory_type=self.detect_directory_type(os.path.dirname(file_path)))
+        :yield: Кортежи (путь к файлу, тип каталога).
+        """
+        if self.included_files:
+            logger.info("Обработка только указанных файлов.")
+            yield from self.iter_included_files(self.included_files)
             return
 
         # Если included_files не заданы, обрабатываем всю структуру проекта
@@ -77,8 +77,19 @@ class Yii2Extractor(BaseExtractor):
             # Определяем тип каталога Yii2 (контроллеры, модели, представления, конфиги)
             directory_type = self.detect_directory_type(root)
             if directory_type:
-                logger.info(f"Обработка каталога: {root} как {directory_type}")
-                self.process_directory(root, directory_type)
+                logger.debug(f"Обработка каталога: {root} как {directory_type}")
+                for file_path in get_all_files(root, extensions=["php"], exclude_dirs=self.excluded_dirs):
+                    yield file_path, directory_type
+
+    def accepts_file(self, file_path):
+        """
+        Проверяет, обрабатывает ли обработчик файл: кроме расширения и исключений,
+        каталог файла должен иметь известный тип.
+
+        :param file_path: Абсолютный путь к файлу.
+        :return: bool.
+        """
+        return super().accepts_file(file_path) and self.detect_directory_type(os.path.dirname(file_path)) is not None
 
     def detect_directory_type(self, directory):
         """
@@ -118,9 +129,26 @@ class Yii2Extractor(BaseExtractor):
         for file_path in files:
             self.process_file(file_path, directory_type)
 
+    def get_scope(self, directory_type=None):
+        """
+        Возвращает область данных для записей файла.
+        """
+        return f"yii2_{directory_type}"
+
+    def parse_structure(self, file_path, content=None):
+        """
+        Разбирает структуру файла без обращений к LLM.
+        """
+        return parse_php_structure(file_path, self.project_root, file_code=content)
+
+    def enrich_records(self, records, content=None, register_qa=True):
+        """
+        Дополняет записи описаниями от LLM.
+        """
+        return enrich_php_records(records, content, "yii2", register_qa=register_qa)
 
     def process_file(self, file_path, directory_type):
-        logger.info(f"Обработка файла: {file_path}")
+        logger.debug(f"Обработка файла: {file_path}")
         try:
             # Вызываем PHP-парсер для анализа файла
             parsed_file_data = parse_php_code(file_path=file_path, source_dir=self.project_root, project_type="yii2")
@@ -131,14 +159,18 @@ class Yii2Extractor(BaseExtractor):
                 return
 
             # Добавляем данные в область через JSONManager
-            self.add_chunks(f"yii2_{directory_type}", parsed_file_data)
-            logger.info(f"Файл успешно обработан: {file_path}")
+            self.add_chunks(self.get_scope(directory_type), parsed_file_data)
+            logger.debug(f"Файл успешно обработан: {file_path}")
 
         except FileNotFoundError as e:
             logger.error(f"Ошибка: PHP парсер не найден. {e}")
+            metrics.record_error(e, "process_file")
         except RuntimeError as e:
             logger.error(f"Ошибка выполнения PHP парсера для файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
         except ValueError as e:
             logger.error(f"Ошибка парсинга файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
         except Exception as e:
             logger.error(f"Неизвестная ошибка при обработке файла {file_path}: {e}")
+            metrics.record_error(e, "process_file")
@@ -0,0 +1,279 @@
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+from collections.abc import Mapping
+from formatters.output_writers import TEMP_SUFFIX, atomic_open
+
+# Способы хранения исходного кода в записях: "inline" — строкой в поле code (по умолчанию),
+# "spans" — ссылкой на участок текста файла в хранилище блобов
+CODE_STORAGE_MODES = ("inline", "spans")
+
+
+def get_blob_directory(output_dir, prefix):
+    """
+    Возвращает каталог хранилища блобов.
+
+    :param output_dir: Каталог вывода.
+    :param prefix: Префикс проекта.
+    :return: Путь {output_dir}/{prefix}_blobs.
+    """
+    return os.path.join(output_dir, f"{prefix}_blobs")
+
+
+def is_span(value):
+    """
+    Проверяет, является ли значение ссылкой на участок блоба.
+
+    :param value: Значение поля code.
+    :return: bool.
+    """
+    return isinstance(value, Mapping) and "blob" in value and "start" in value and "end" in value
+
+
+def iter_spans(record):
+    """
+    Перебирает ссылки на блобы в записи и всех её вложенных чанках.
+
+    :param record: Запись (словарь или чанк).
+    :yield: Ссылки {"blob", "start", "end"}.
+    """
+    for key, value in record.items():
+        if key == "code" and is_span(value):
+            yield value
+        elif isinstance(value, Mapping):
+            yield from iter_spans(value)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, Mapping):
+                    yield from iter_spans(item)
+
+
+class BlobStore:
+    """
+    Хранилище текста исходных файлов, адресуемое по содержимому (SHA-256).
+
+    Текст каждого файла сохраняется один раз в {каталог}/{первые 2 символа хэша}/{хэш}, а поле code
+    записей и чанков заменяется ссылкой {"blob": хэш, "start": смещение, "end": смещение} — смещения
+    в байтах UTF-8 текста файла. Так код класса, его методов и файла целиком не дублируется в выгрузке.
+    Прочитать код по ссылке можно через SpanResolver.
+    """
+
+    def __init__(self, directory, source_root):
+        """
+        :param directory: Каталог хранилища (см. get_blob_directory).
+        :param source_root: Корень проекта, относительно которого указан metadata.source записей.
+        """
+        self.directory = directory
+        self.source_root = source_root
+        self.written = 0  # Новых блобов за запуск
+        self.inline_fallbacks = 0  # Фрагментов кода, не найденных в тексте файла и оставленных строкой
+
+    def get_path(self, blob):
+        """
+        Возвращает путь к файлу блоба.
+
+        :param blob: Хэш блоба.
+        :return: Путь к файлу.
+        """
+        return os.path.join(self.directory, blob[:2], blob)
+
+    def put(self, data):
+        """
+        Сохраняет блоб, если такого ещё нет.
+
+        :param data: Содержимое (bytes).
+        :return: Хэш блоба.
+        """
+        blob = hashlib.sha256(data).hexdigest()
+        path = self.get_path(blob)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with atomic_open(path, "wb") as file:
+                file.write(data)
+            self.written += 1
+        return blob
+
+    def externalize(self, record):
+        """
+        Заменяет поля code записи и её чанков ссылками на блоб с текстом исходного файла.
+        Фрагменты, которых нет в тексте файла (например, если парсер изменил переводы строк),
+        остаются строками.
+
+        :param record: Запись файла (изменяется на месте).
+        :return: Та же запись.
+        """
+        source = (record.get("metadata") or {}).get("source")
+        if not source or not self._has_inline_code(record):
+            # Перенесённые из прошлой выгрузки записи уже хранят ссылки: исходный файл не читается
+            return record
+        try:
+            # Файл читается так же, как его читают парсеры (текстовый режим, UTF-8)
+            with open(os.path.join(self.source_root, source), 'r', encoding='utf-8') as file:
+                data = file.read().encode("utf-8")
+        except (OSError, UnicodeDecodeError):
+            return record
+
+        line_offsets = [0]
+        position = data.find(b"\n")
+        while position != -1:
+            line_offsets.append(position + 1)
+            position = data.find(b"\n", position + 1)
+
+        state = {"blob": None}
+        self._externalize_item(record, data, line_offsets, state)
+        return record
+
+    def _has_inline_code(self, item):
+        """
+        Проверяет, есть ли в записи или её чанках поле code с непустой строкой.
+        """
+        code = item.get("code")
+        if isinstance(code, str) and code:
+            return True
+        for key, value in item.items():
+            if key == "code":
+                continue
+            if isinstance(value, Mapping):
+                if self._has_inline_code(value):
+                    return True
+            elif isinstance(value, list):
+                if any(isinstance(child, Mapping) and self._has_inline_code(child) for child in value):
+                    return True
+        return False
+
+    def _externalize_item(self, item, data, line_offsets, state):
+        code = item.get("code")
+        if isinstance(code, str) and code:
+            item["code"] = self._make_span(code, item.get("start_line"), data, line_offsets, state)
+        for key, value in item.items():
+            if key == "code":
+                continue
+            if isinstance(value, Mapping):
+                self._externalize_item(value, data, line_offsets, state)
+            elif isinstance(value, list):
+                for child in value:
+                    if isinstance(child, Mapping):
+                        self._externalize_item(child, data, line_offsets, state)
+
+    def _make_span(self, code, start_line, data, line_offsets, state):
+        encoded = code.encode("utf-8")
+        start = -1
+        # Номер строки лишь ускоряет поиск: одинаковый текст в любом месте файла даёт тот же код
+        if isinstance(start_line, int) and 0 < start_line <= len(line_offsets):
+            start = data.find(encoded, line_offsets[start_line - 1])
+        if start == -1:
+            start = data.find(encoded)
+        if start == -1:
+            self.inline_fallbacks += 1
+            return code
+        if state["blob"] is None:
+            state["blob"] = self.put(data)
+        return {"blob": state["blob"], "start": start, "end": start + len(encoded)}
+
+    def import_from(self, directory):
+        """
+        Копирует отсутствующие блобы из другого хранилища (например, из выгрузки шарда).
+
+        :param directory: Каталог другого хранилища.
+        :return: Количество скопированных блобов.
+        """
+        copied = 0
+        if not os.path.isdir(directory):
+            return copied
+        for root, _, files in os.walk(directory):
+            for name in files:
+                target = self.get_path(name)
+                if len(name) != 64 or os.path.exists(target):
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(os.path.join(root, name), target + TEMP_SUFFIX)
+                os.replace(target + TEMP_SUFFIX, target)
+                copied += 1
+        return copied
+
+    def prune(self, records):
+        """
+        Удаляет блобы, на которые не ссылается ни одна запись (файлы, изменённые или удалённые
+        с прошлых запусков).
+
+        :param records: Все записи выгрузки.
+        :return: Количество удалённых блобов.
+        """
+        referenced = {span["blob"] for record in records for span in iter_spans(record)}
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name not in referenced:  # В том числе временные файлы прерванной записи
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        return removed
+
+
+class SpanResolver:
+    """
+    Чтение кода по ссылкам на блобы. Блобы загружаются при первом обращении и кэшируются
+    (не более cache_size последних).
+
+    Пример:
+        resolver = SpanResolver(get_blob_directory("output", "project"))
+        code = resolver.read(chunk["code"])      # Строка для одного чанка
+        record = resolver.resolve(record)       # Запись со всеми фрагментами кода в виде строк
+    """
+
+    def __init__(self, directory, cache_size=64):
+        """
+        :param directory: Каталог хранилища блобов.
+        :param cache_size: Количество блобов, хранимых в памяти.
+        """
+        self.directory = directory
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def _load(self, blob):
+        data = self._cache.get(blob)
+        if data is not None:
+            self._cache.move_to_end(blob)
+            return data
+        path = os.path.join(self.directory, blob[:2], blob)
+        if not os.path.exists(path):
+            raise KeyError(f"Blob '{blob}' not found in {self.directory}.")
+        with open(path, 'rb') as file:
+            data = file.read()
+        self._cache[blob] = data
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return data
+
+    def read(self, value):
+        """
+        Возвращает код по ссылке на блоб.
+
+        :param value: Значение поля code: ссылка, строка или None (возвращаются как есть).
+        :return: Код (str) или None.
+        :raises KeyError: Если блоба нет в хранилище.
+        """
+        if not is_span(value):
+            return value
+        return self._load(value["blob"])[value["start"]:value["end"]].decode("utf-8")
+
+    def resolve(self, record):
+        """
+        Возвращает копию записи, в которой все ссылки на блобы заменены кодом.
+
+        :param record: Запись (словарь или чанк).
+        :return: Новый словарь.
+        """
+        resolved = {}
+        for key, value in record.items():
+            if key == "code":
+                resolved[key] = self.read(value)
+            elif isinstance(value, Mapping):
+                resolved[key] = self.resolve(value)
+            elif isinstance(value, list):
+                resolved[key] = [self.resolve(item) if isinstance(item, Mapping) else item for item in value]
+            else:
+                resolved[key] = value
+        return resolved
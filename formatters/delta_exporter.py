@@ -0,0 +1,158 @@
+import argparse
+import hashlib
+import os
+from formatters.output_writers import COMPRESSION_SUFFIXES, iter_jsonl_lines, open_jsonl_writer
+from formatters.record_index import KEY_ID, iter_record_keys
+from utils.serializer import dumps, loads
+
+# Операции дельты
+OP_ADDED = "added"
+OP_CHANGED = "changed"
+OP_REMOVED = "removed"
+
+# Поля, не влияющие на содержимое записи (меняются в каждом запуске)
+VOLATILE_METADATA_FIELDS = ("timestamp",)
+
+
+def find_jsonl_file(path):
+    """
+    Находит JSONL-файл предыдущего запуска с учётом сжатия.
+
+    :param path: Путь к файлу без суффикса сжатия.
+    :return: Путь к существующему файлу или None.
+    """
+    for candidate in [path] + [path + suffix for suffix in COMPRESSION_SUFFIXES.values()]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def record_identity(entry):
+    """
+    Возвращает ключ, по которому записи сопоставляются между запусками: metadata.source,
+    а для записей без источника — id.
+
+    :param entry: Запись.
+    :return: Строка-ключ.
+    """
+    metadata = entry.get("metadata")
+    if isinstance(metadata, dict) and metadata.get("source"):
+        return metadata["source"]
+    return entry.get("id")
+
+
+def record_fingerprint(entry):
+    """
+    Считает отпечаток содержимого записи без изменчивых полей (времени обработки).
+
+    :param entry: Запись.
+    :return: Шестнадцатеричная строка sha256.
+    """
+    metadata = entry.get("metadata")
+    if isinstance(metadata, dict) and any(field in metadata for field in VOLATILE_METADATA_FIELDS):
+        entry = dict(entry)
+        entry["metadata"] = {key: value for key, value in metadata.items() if key not in VOLATILE_METADATA_FIELDS}
+    return hashlib.sha256(dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def record_ids(entry):
+    """
+    Возвращает идентификаторы записи и всех её чанков (нужны получателю для удаления старых версий).
+
+    :param entry: Запись.
+    :return: Список идентификаторов.
+    """
+    return [key for kind, key in iter_record_keys(entry) if kind == KEY_ID]
+
+
+def load_previous_state(previous_file):
+    """
+    Читает JSONL предыдущего запуска и запоминает для каждой записи только отпечаток и идентификаторы.
+
+    :param previous_file: Путь к JSONL (.jsonl или .jsonl.gz) или None.
+    :return: Словарь {ключ записи: (отпечаток, список идентификаторов)}.
+    """
+    state = {}
+    if previous_file:
+        for line in iter_jsonl_lines(previous_file):
+            entry = loads(line)
+            state[record_identity(entry)] = (record_fingerprint(entry), record_ids(entry))
+    return state
+
+
+def write_delta(previous_file, current_entries, output_file, compression=None):
+    """
+    Сравнивает записи текущего запуска с JSONL предыдущего и записывает только изменения.
+
+    Каждая строка дельты — {"op", "key", "id", "previous_ids", "record"}:
+    "added" и "changed" содержат новую запись, "changed" и "removed" — идентификаторы
+    старой версии (previous_ids). Идентификаторы сопоставимы между запусками только в режиме
+    ID_MODE=deterministic; в режиме uuid каждая запись окажется изменённой.
+
+    :param previous_file: Путь к JSONL предыдущего запуска или None (тогда все записи добавлены).
+    :param current_entries: Итерируемые записи текущего запуска.
+    :param output_file: Путь к JSONL дельты (без суффикса сжатия).
+    :param compression: Режим сжатия дельты (None или "gzip").
+    :return: Словарь с количеством записей по операциям.
+    """
+    previous = load_previous_state(previous_file)
+    stats = {OP_ADDED: 0, OP_CHANGED: 0, OP_REMOVED: 0, "unchanged": 0}
+
+    with open_jsonl_writer(output_file, compression=compression) as writer:
+        for entry in current_entries:
+            key = record_identity(entry)
+            fingerprint = record_fingerprint(entry)
+            previous_record = previous.pop(key, None)
+            if previous_record is None:
+                operation, previous_ids = OP_ADDED, []
+            elif previous_record[0] != fingerprint:
+                operation, previous_ids = OP_CHANGED, previous_record[1]
+            else:
+                stats["unchanged"] += 1
+                continue
+            writer.write(dumps({
+                "op": operation,
+                "key": key,
+                "id": entry.get("id"),
+                "previous_ids": previous_ids,
+                "record": entry,
+            }) + "\n")
+            stats[operation] += 1
+
+        # Оставшиеся записи предыдущего запуска отсутствуют в текущем
+        for key, (_, previous_ids) in previous.items():
+            writer.write(dumps({
+                "op": OP_REMOVED,
+                "key": key,
+                "id": previous_ids[0] if previous_ids else None,
+                "previous_ids": previous_ids,
+                "record": None,
+            }) + "\n")
+            stats[OP_REMOVED] += 1
+
+    return stats
+
+
+def main(argv=None):
+    """
+    Консольная команда:
+    python -m formatters.delta_exporter previous/project_python_files.jsonl output/project_python_files.jsonl -o delta.jsonl
+    """
+    parser = argparse.ArgumentParser(description="Дельта между JSONL двух запусков.")
+    parser.add_argument("previous", help="JSONL предыдущего запуска (.jsonl или .jsonl.gz).")
+    parser.add_argument("current", help="JSONL текущего запуска (.jsonl или .jsonl.gz).")
+    parser.add_argument("-o", "--output", required=True, help="Выходной JSONL дельты.")
+    parser.add_argument("--compression", default=None, choices=list(COMPRESSION_SUFFIXES), help="Сжатие дельты.")
+    args = parser.parse_args(argv)
+
+    stats = write_delta(
+        args.previous,
+        (loads(line) for line in iter_jsonl_lines(args.current)),
+        args.output,
+        compression=args.compression
+    )
+    print(f"Delta saved to {args.output}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
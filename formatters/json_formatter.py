@@ -1,49 +1,260 @@
-import json
+import argparse
+import glob
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from formatters.output_writers import atomic_open, iter_jsonl_lines
+from formatters.streaming_json import (
+    INDENT,
+    UNKNOWN_GROUP,
+    indent_text,
+    iter_merged_groups,
+    render_item,
+    resolve_group_key,
+    sort_run,
+    write_groups,
+)
+from utils.logger import configure_worker_logging, get_log_queue
+from utils.serializer import dumps, loads
 
-def jsonl_to_human_readable_json(jsonl_file, output_json_file, group_by=None):
+# Группа, которая выводится при отсутствии данных (как в прежней реализации)
+EMPTY_GROUP = "ungrouped"
+
+# Объём входных данных на один раздел внешней группировки
+DEFAULT_PARTITION_BYTES = 64 * 1024 * 1024
+
+
+def resolve_input_files(jsonl_file):
+    """
+    Разворачивает вход в упорядоченный список файлов.
+
+    :param jsonl_file: Путь, шаблон glob (например, "out/project_bitrix_summary_*.jsonl")
+                       или список путей. Шарды упорядочиваются по номеру (…_2 раньше …_10).
+    :return: Список путей.
+    """
+    if isinstance(jsonl_file, (list, tuple)):
+        return list(jsonl_file)
+    if glob.has_magic(jsonl_file):
+        def natural_key(path):
+            return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)]
+        return sorted(glob.glob(jsonl_file), key=natural_key)
+    return [jsonl_file]
+
+
+def _partition_of(key_json, partitions):
+    """Стабильный между процессами номер раздела для ключа (hash() в Python рандомизирован)."""
+    return zlib.crc32(key_json.encode("utf-8")) % partitions
+
+
+def _partition_shard(shard_path, shard_index, work_dir, partitions, group_by, missing_group):
+    """
+    Фаза 1 (по шарду): раскладывает записи шарда по разделам на диске по хэшу ключа группы.
+
+    :return: Список ключей шарда (в виде JSON) в порядке первого появления.
+    """
+    partition_files = [
+        open(os.path.join(work_dir, f"s{shard_index}_p{partition}.tsv"), 'w', encoding='utf-8')
+        for partition in range(partitions)
+    ]
+    seen = {}
+    try:
+        for line in iter_jsonl_lines(shard_path):
+            chunk = loads(line)
+            key_json = dumps(resolve_group_key(chunk, group_by, missing_group))
+            if key_json not in seen:
+                seen[key_json] = None
+            partition_files[_partition_of(key_json, partitions)].write(f"{key_json}\t{line}\n")
+    finally:
+        for partition_file in partition_files:
+            partition_file.close()
+    return list(seen)
+
+
+def _iter_partition_lines(partition, shard_count, work_dir):
+    """Строки раздела из всех шардов в исходном порядке; прочитанные файлы раздела удаляются."""
+    for shard_index in range(shard_count):
+        partition_path = os.path.join(work_dir, f"s{shard_index}_p{partition}.tsv")
+        with open(partition_path, 'r', encoding='utf-8') as file:
+            yield from file
+        os.remove(partition_path)
+
+
+def _sort_partition(partition, shard_count, work_dir, ranks, max_run_bytes=None):
+    """
+    Фаза 2 (по разделу): собирает раздел из всех шардов в исходном порядке, форматирует записи
+    и устойчиво сортирует их по номеру группы в файлы-прогоны.
+
+    Раздел делится по хэшу ключа, поэтому при перекосе групп (одна крупная группа) он может быть
+    намного больше max_run_bytes. Раздел читается частями не более max_run_bytes входных данных,
+    и каждая часть сортируется в свой прогон: слияние прогонов устойчиво, поэтому порядок записей
+    внутри группы сохраняется.
+
+    :param ranks: Номера групп для ключей этого раздела (ключ в виде JSON -> номер).
+    :param max_run_bytes: Наибольший объём входных данных на один прогон (None — раздел целиком).
+    :return: Список путей к прогонам в порядке чтения.
+    """
+    run_paths = []
+    lines = []
+    size = 0
+
+    def flush():
+        run_path = os.path.join(work_dir, f"run_{partition}_{len(run_paths)}.tsv")
+        sort_run(lines, run_path)
+        run_paths.append(run_path)
+
+    for line in _iter_partition_lines(partition, shard_count, work_dir):
+        key_json, record = line.split("\t", 1)
+        # Записи форматируются здесь, параллельно, а слияние только копирует готовый текст
+        rendered = render_item(loads(record), 3)
+        lines.append(f"{ranks[key_json]}\t{dumps(rendered)}\n")
+        size += len(line)
+        if max_run_bytes is not None and size >= max_run_bytes:
+            flush()
+            lines, size = [], 0
+    if lines or not run_paths:
+        flush()
+    return run_paths
+
+
+def _render_shard_list(shard_path, output_path):
+    """
+    Форматирует записи шарда как элементы списка верхнего уровня.
+
+    :return: Количество записей.
+    """
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as file:
+        for line in iter_jsonl_lines(shard_path):
+            file.write((",\n" if count else "") + " " * INDENT + indent_text(dumps(loads(line), indent=INDENT), 1))
+            count += 1
+    return count
+
+
+def _run_tasks(executor, function, arguments):
+    """Выполняет задачи в пуле процессов или последовательно, если пул не задан."""
+    if executor is None:
+        return [function(*args) for args in arguments]
+    return list(executor.map(function, *zip(*arguments))) if arguments else []
+
+
+def jsonl_to_human_readable_json(jsonl_file, output_json_file, group_by=None, workers=1,
+                                 partition_bytes=DEFAULT_PARTITION_BYTES, spill_dir=None,
+                                 missing_group=UNKNOWN_GROUP):
     """
     Универсальная функция для преобразования JSONL в человекопонятный JSON.
 
-    :param jsonl_file: Путь к входному файлу JSONL.
+    Записи не накапливаются в памяти: при группировке они раскладываются по разделам на диске
+    по хэшу ключа, каждый раздел сортируется по порядку первого появления групп, а затем разделы
+    сливаются в выходной файл. Порядок групп и записей совпадает с однопроходной группировкой.
+    Шарды (например, "_summary_*.jsonl") могут обрабатываться параллельно в нескольких процессах.
+
+    :param jsonl_file: Путь к входному файлу JSONL (.jsonl или .jsonl.gz), шаблон glob или список шардов.
     :param output_json_file: Путь к выходному файлу JSON.
     :param group_by: Ключ для группировки данных (например, "file_path" или "metadata.source").
                      Если None, данные сохраняются как есть.
+    :param workers: Количество процессов.
+    :param partition_bytes: Примерный объём входных данных на один раздел и наибольший — на один прогон
+                            (ограничивает память процесса и при перекосе групп).
+    :param spill_dir: Каталог для временных файлов (по умолчанию — системный).
+    :param missing_group: Группа для записей без ключа группировки.
     """
-    grouped_data = {}
-
-    # Чтение JSONL-файла
-    with open(jsonl_file, 'r', encoding='utf-8') as file:
-        for line in file:
-            chunk = json.loads(line.strip())
-
-            if group_by:
-                # Достать значение для группировки
-                group_key = chunk
-                for part in group_by.split('.'):
-                    group_key = group_key.get(part)
-                    if group_key is None:
-                        raise KeyError(f"Grouping key '{group_by}' not found in chunk: {chunk}")
-
-                # Инициализация группы, если её ещё нет
-                if group_key not in grouped_data:
-                    grouped_data[group_key] = {
-                        "group_key": group_key,
-                        "items": []
-                    }
-
-                # Добавление текущего чанка в группу
-                grouped_data[group_key]["items"].append(chunk)
-            else:
-                # Если группировка не указана, добавляем в общий список
-                grouped_data.setdefault("ungrouped", []).append(chunk)
-
-    # Проверяем, есть ли данные
-    if not grouped_data:
-        grouped_data = {"ungrouped": []}  # Добавляем пустую группу, если данные отсутствуют
-
-    # Формирование выходной структуры
-    output_data = grouped_data if group_by else grouped_data["ungrouped"]
-
-    # Сохранение в человекопонятный JSON
-    with open(output_json_file, 'w', encoding='utf-8') as json_file:
-        json.dump(output_data, json_file, ensure_ascii=False, indent=4)
+    input_files = resolve_input_files(jsonl_file)
+    work_dir = tempfile.mkdtemp(prefix="jsonl_to_json_", dir=spill_dir)
+    # Дочерние процессы передают записи журнала в очередь родителя, а не пишут файлы журнала сами
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=configure_worker_logging,
+                                   initargs=(get_log_queue(),)) if workers > 1 else None
+
+    try:
+        if not group_by:
+            # Без группировки — список записей верхнего уровня, шарды форматируются параллельно
+            parts = [os.path.join(work_dir, f"list_{index}.part") for index in range(len(input_files))]
+            counts = _run_tasks(executor, _render_shard_list, list(zip(input_files, parts)))
+            with atomic_open(output_json_file) as json_file:
+                if not any(counts):
+                    json_file.write("[]")
+                    return
+                json_file.write("[\n")
+                written = False
+                for part, count in zip(parts, counts):
+                    if not count:
+                        continue
+                    if written:
+                        json_file.write(",\n")
+                    with open(part, 'r', encoding='utf-8') as part_file:
+                        shutil.copyfileobj(part_file, json_file)
+                    written = True
+                json_file.write("\n]")
+            return
+
+        total_bytes = sum(os.path.getsize(path) for path in input_files)
+        partitions = max(1, -(-total_bytes // partition_bytes))
+
+        # Фаза 1: раскладка записей каждого шарда по разделам
+        shard_keys = _run_tasks(executor, _partition_shard, [
+            (path, index, work_dir, partitions, group_by, missing_group) for index, path in enumerate(input_files)
+        ])
+
+        # Номера групп — в порядке первого появления ключа во входных данных
+        ranks = {}
+        for keys in shard_keys:
+            for key_json in keys:
+                if key_json not in ranks:
+                    ranks[key_json] = len(ranks)
+        del shard_keys
+        group_keys = [loads(key_json) for key_json in ranks]
+
+        partition_ranks = [{} for _ in range(partitions)]
+        for key_json, rank in ranks.items():
+            partition_ranks[_partition_of(key_json, partitions)][key_json] = rank
+        del ranks
+
+        # Фаза 2: сортировка разделов
+        partition_runs = _run_tasks(executor, _sort_partition, [
+            (partition, len(input_files), work_dir, partition_ranks[partition], partition_bytes)
+            for partition in range(partitions)
+        ])
+        del partition_ranks
+        run_paths = [run_path for runs in partition_runs for run_path in runs]
+
+        # Фаза 3: слияние прогонов в выходной файл
+        write_groups(output_json_file, iter_merged_groups(run_paths, group_keys), group_by,
+                     empty_group=EMPTY_GROUP, pre_rendered=True)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    """
+    Консольная команда:
+    python -m formatters.json_formatter "output/project_bitrix_summary_*.jsonl" -o summary.json --group-by metadata.source
+    """
+    parser = argparse.ArgumentParser(description="Преобразование JSONL в человекопонятный JSON.")
+    parser.add_argument("inputs", nargs="+", help="Входные файлы JSONL (.jsonl, .jsonl.gz) или шаблоны glob.")
+    parser.add_argument("-o", "--output", required=True, help="Выходной файл JSON.")
+    parser.add_argument("--group-by", default=None, help="Ключ группировки, например metadata.source.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Количество процессов.")
+    parser.add_argument("--partition-mb", type=int, default=DEFAULT_PARTITION_BYTES // (1024 * 1024),
+                        help="Объём входных данных на один раздел, МБ.")
+    parser.add_argument("--spill-dir", default=None, help="Каталог для временных файлов.")
+    parser.add_argument("--missing-group", default=UNKNOWN_GROUP, help="Группа для записей без ключа.")
+    args = parser.parse_args(argv)
+
+    input_files = [path for pattern in args.inputs for path in resolve_input_files(pattern)]
+    jsonl_to_human_readable_json(
+        input_files,
+        args.output,
+        group_by=args.group_by,
+        workers=args.workers,
+        partition_bytes=args.partition_mb * 1024 * 1024,
+        spill_dir=args.spill_dir,
+        missing_group=args.missing_group
+    )
+
+
+if __name__ == "__main__":
+    main()
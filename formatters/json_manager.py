@@ -1,6 +1,16 @@
-import json
+import glob
+import math
 import os
 from collections import defaultdict
+from formatters.delta_exporter import find_jsonl_file, write_delta
+from formatters.output_writers import atomic_open, get_output_path, iter_jsonl_lines, open_jsonl_writer
+from formatters.record_index import RecordIndexWriter
+from formatters.sqlite_exporter import SQLiteExporter
+from formatters.streaming_json import write_grouped_json
+from formatters.shard_manifest import SHARD_BALANCE_MODES, ShardManifest, get_record_source, plan_balanced_shards
+from utils.common import CHARS_PER_TOKEN
+from utils.metrics import metrics
+from utils.serializer import dumps, dump, loads
 
 
 class JSONManager:
@@ -8,18 +18,54 @@ class JSONManager:
     Класс для работы с JSON и JSONL файлами с поддержкой нескольких областей данных (scopes).
     """
 
-    def __init__(self, output_directory="output", project_prefix="project"):
+    def __init__(self, output_directory="output", project_prefix="project", compression=None,
+                 compression_block_size=1048576, compression_level=6, write_index=True, sqlite_path=None,
+                 max_group_records_in_memory=100000, spill_directory=None, blob_store=None):
         """
         Инициализация менеджера JSON/JSONL с поддержкой нескольких областей.
 
         :param output_directory: Директория, куда будут сохраняться файлы.
         :param project_prefix: Префикс для выходных файлов.
+        :param compression: Режим сжатия JSONL-файлов (None или "gzip").
+                            Человекопонятные JSON-файлы не сжимаются.
+        :param compression_block_size: Размер несжатого блока в байтах для режима gzip.
+        :param compression_level: Уровень сжатия для режима gzip.
+        :param write_index: Сохранять ли рядом с JSONL индекс-спутник (.idx) для произвольного доступа
+                            к записям по id, metadata.source и именам чанков (см. formatters.record_index).
+        :param sqlite_path: Путь к базе SQLite для дополнительной выгрузки записей (см. formatters.sqlite_exporter).
+                            Если None, выгрузка в SQLite не выполняется.
+        :param max_group_records_in_memory: Количество записей области, выше которого неупорядоченные
+                                            по ключу группировки данные группируются через временные файлы.
+        :param spill_directory: Каталог для временных файлов группировки (по умолчанию — системный).
+        :param blob_store: Хранилище блобов (formatters.blob_store.BlobStore). Если задано, поля code
+                           записей заменяются ссылками на текст файла в хранилище; приёмники записей
+                           (например, SQLite с полнотекстовым поиском) получают код строками.
         """
         self.data = defaultdict(list)
         self.output_directory = output_directory
         self.project_prefix = project_prefix
+        self.compression = compression or None
+        self.compression_block_size = compression_block_size
+        self.compression_level = compression_level
+        self.write_index = write_index
+        self.max_group_records_in_memory = max_group_records_in_memory
+        self.spill_directory = spill_directory
+        self.sinks = []  # Приёмники, получающие записи по мере добавления
+        self.blob_store = blob_store
         os.makedirs(self.output_directory, exist_ok=True)
 
+        if sqlite_path:
+            self.add_sink(SQLiteExporter(sqlite_path))
+
+    def add_sink(self, sink):
+        """
+        Подключает приёмник записей. Приёмник получает записи в add_records(scope, entries)
+        по мере их добавления, flush() при сохранении и close() при закрытии менеджера.
+
+        :param sink: Объект приёмника (например, SQLiteExporter).
+        """
+        self.sinks.append(sink)
+
     def add_data(self, scope, entries):
         """
         Добавляет данные в указанную область.
@@ -31,9 +77,35 @@ class JSONManager:
             raise ValueError("Entries must be a list or a dictionary.")
 
         if isinstance(entries, dict):
-            self.data[scope].append(entries)
-        else:
-            self.data[scope].extend(entries)
+            entries = [entries]
+        self.data[scope].extend(entries)
+        metrics.inc("records_added_total", len(entries), scope=scope)
+
+        for sink in self.sinks:
+            sink.add_records(scope, entries)
+
+        if self.blob_store is not None:
+            for entry in entries:
+                self.blob_store.externalize(entry)
+
+    def remove_source(self, source):
+        """
+        Удаляет из всех областей записи исходного файла (metadata.source).
+
+        :param source: Относительный путь к исходному файлу.
+        :return: Множество областей, из которых были удалены записи.
+        """
+        affected = set()
+        for scope, entries in self.data.items():
+            kept = [entry for entry in entries if get_record_source(entry) != source]
+            if len(kept) != len(entries):
+                self.data[scope] = kept
+                affected.add(scope)
+
+        for sink in self.sinks:
+            if hasattr(sink, "remove_source"):
+                sink.remove_source(source)
+        return affected
 
     def _save_jsonl(self, scope, output_file):
         """
@@ -45,14 +117,60 @@ class JSONManager:
         if scope not in self.data:
             raise KeyError(f"No data found for scope '{scope}'.")
 
-        with open(output_file, 'w', encoding='utf-8') as file:
-            for entry in self.data[scope]:
-                file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        index = self._new_index(os.path.splitext(output_file)[0] + ".idx")
+        with metrics.timer("save_seconds", scope=scope, format="jsonl"):
+            with self._open_jsonl(output_file) as writer:
+                file_number = index.add_file(writer) if index else None
+                for entry in self.data[scope]:
+                    location = writer.write(dumps(entry) + '\n')
+                    if index:
+                        index.add_record(file_number, location, entry)
+            if index:
+                index.save()
+        self._count_written(scope, len(self.data[scope]), writer.size)
+
+    @staticmethod
+    def _count_written(scope, records, size):
+        """
+        Учитывает записанные записи и байты (после сжатия) в метриках.
+
+        :param scope: Область данных или summary ("{тип}_summary").
+        :param records: Количество записей.
+        :param size: Размер записанного файла в байтах.
+        """
+        metrics.inc("records_written_total", records, scope=scope)
+        metrics.inc("bytes_written_total", size, scope=scope)
+
+    def _new_index(self, index_file):
+        """
+        Создаёт сборщик индекса-спутника, если индексирование включено.
+
+        :param index_file: Путь к файлу индекса.
+        :return: RecordIndexWriter или None.
+        """
+        return RecordIndexWriter(index_file) if self.write_index else None
+
+    def _open_jsonl(self, output_file):
+        """
+        Открывает запись JSONL с учётом режима сжатия.
+
+        :param output_file: Путь к выходному файлу JSONL (без суффикса сжатия).
+        :return: Объект записи (см. formatters.output_writers).
+        """
+        return open_jsonl_writer(
+            output_file,
+            compression=self.compression,
+            block_size=self.compression_block_size,
+            level=self.compression_level
+        )
 
     def _save_json(self, scope, output_file, group_by=None):
         """
         Сохраняет данные из указанной области в человекопонятный JSON.
 
+        Группы записываются потоково (см. formatters.streaming_json), без построения
+        промежуточного словаря для всей области.
+
         :param scope: Название области данных.
         :param output_file: Путь к выходному файлу JSON.
         :param group_by: Ключ для группировки данных (например, "file_path" или "metadata.source").
@@ -61,57 +179,47 @@ class JSONManager:
         if scope not in self.data:
             raise KeyError(f"No data found for scope '{scope}'.")
 
-        grouped_data = {}
-
-        # Группировка данных
-        for chunk in self.data[scope]:
-            group_key = "unknown_group"  # Устанавливаем значение по умолчанию
-
-            if group_by:
-                try:
-                    # Достаем значение для группировки
-                    group_key = chunk
-                    for part in group_by.split('.'):
-                        group_key = group_key.get(part)
-                        if group_key is None:
-                            raise KeyError(f"Key '{group_by}' not found in chunk.")
-                except (KeyError, AttributeError) as e:
-                    group_key = "unknown_group"  # Сохраняем в группу с неизвестным ключом
-                    print(f"Warning: {e}. Chunk added to 'unknown_group'.")
-
-            # Инициализация группы
-            if group_key not in grouped_data:
-                grouped_data[group_key] = {
-                    "group_key": group_key,
-                    "items": []
-                }
-
-            # Добавление текущего чанка в группу
-            grouped_data[group_key]["items"].append(chunk)
-
-        # Проверяем, есть ли данные
-        if not grouped_data:
-            grouped_data = {"unknown_group": []}
-
-        # Формирование выходной структуры
-        output_data = grouped_data if group_by else grouped_data["unknown_group"]
-
-        # Сохранение в человекопонятный JSON
-        with open(output_file, 'w', encoding='utf-8') as json_file:
-            json.dump(output_data, json_file, ensure_ascii=False, indent=4)
-
-    def save_all(self, group_by=None, max_summary_file_size=None):
+        with metrics.timer("save_seconds", scope=scope, format="json"):
+            write_grouped_json(
+                self.data[scope],
+                output_file,
+                group_by=group_by,
+                max_records_in_memory=self.max_group_records_in_memory,
+                spill_dir=self.spill_directory
+            )
+        metrics.inc("bytes_written_total", os.path.getsize(output_file), scope=scope)
+
+    def save_all(self, group_by=None, max_summary_file_size=None, shard_balance=None, shard_count=None, scopes=None):
         """
         Сохраняет все области данных в соответствующие файлы JSON и JSONL,
         разделяя только summary-файлы при превышении max_summary_file_size.
+        Для каждого summary сохраняется манифест шардов {prefix}_{type}_summary.manifest.json.
 
         :param group_by: Ключ для группировки данных в человекопонятном JSON (например, "file_path" или "metadata.source").
                          Если None, данные сохраняются как есть.
         :param max_summary_file_size: Максимальный размер summary-файла в байтах.
+        :param shard_balance: Режим разбиения summary: "size" (по умолчанию, по max_summary_file_size),
+                              "records" (равное количество записей) или "tokens" (равная оценка токенов).
+        :param shard_count: Количество шардов для режимов "records" и "tokens". Если не задано,
+                            вычисляется из общего размера данных и max_summary_file_size.
+        :param scopes: Области, которые нужно перезаписать (например, после изменения отдельных файлов).
+                       Summary перезаписываются только для типов проектов этих областей.
+                       Если None, сохраняются все области.
         """
+        if shard_balance and shard_balance not in SHARD_BALANCE_MODES:
+            raise ValueError(f"Unknown shard balance '{shard_balance}'. Available: {', '.join(SHARD_BALANCE_MODES)}.")
+
         project_data = defaultdict(list)
+        project_types = {scope.split("_")[0] for scope in scopes} if scopes is not None else None
 
         for scope, entries in self.data.items():
+            project_type = scope.split("_")[0]  # Извлекаем тип проекта из названия scope
+            if project_types is not None:
+                if project_type in project_types:
+                    project_data[project_type].extend(entries)
+                if scope not in scopes:
+                    continue
+
             # Определяем пути к файлам с учетом префикса
             jsonl_file = os.path.join(self.output_directory, f"{self.project_prefix}_{scope}.jsonl")
             json_file = os.path.join(self.output_directory, f"{self.project_prefix}_{scope}.json")
@@ -123,65 +231,271 @@ class JSONManager:
             self._save_json(scope, json_file, group_by)
 
             # Собираем данные для общего файла
-            project_type = scope.split("_")[0]  # Извлекаем тип проекта из названия scope
-            project_data[project_type].extend(entries)
+            if project_types is None:
+                project_data[project_type].extend(entries)
 
         # Сохраняем только общий summary файл для каждого типа проекта
-        if max_summary_file_size:
-            for project_type, data in project_data.items():
-                summary_jsonl_base = os.path.join(self.output_directory,
-                                                  f"{self.project_prefix}_{project_type}_summary")
-                summary_json_base = os.path.join(self.output_directory, f"{self.project_prefix}_{project_type}_summary")
-
-                # Сохраняем summary JSONL с разделением по размеру
-                file_index = 0
-                current_jsonl_file = f"{summary_jsonl_base}_{file_index}.jsonl"
-                current_size = 0
-
-                with open(current_jsonl_file, 'w', encoding='utf-8') as jsonl_file:
-                    for entry in data:
-                        entry_json = json.dumps(entry, ensure_ascii=False) + '\n'
-                        entry_size = len(entry_json.encode('utf-8'))
-
-                        if current_size + entry_size > max_summary_file_size:
-                            # Закрываем текущий файл и начинаем новый
-                            file_index += 1
-                            current_jsonl_file = f"{summary_jsonl_base}_{file_index}.jsonl"
-                            jsonl_file.close()
-                            jsonl_file = open(current_jsonl_file, 'w', encoding='utf-8')
-                            current_size = 0
-
-                        jsonl_file.write(entry_json)
-                        current_size += entry_size
-
-                # Сохраняем summary JSON без разделения (общий)
-                summary_json_file = f"{summary_json_base}.json"
-                with open(summary_json_file, 'w', encoding='utf-8') as json_file:
-                    json.dump(data, json_file, ensure_ascii=False, indent=4)
-
-                print(f"Summary files saved for project type '{project_type}':")
-                print(f" - JSONL (split by size): {summary_jsonl_base}_*.jsonl")
-                print(f" - JSON: {summary_json_file}")
+        for project_type, data in project_data.items():
+            summary_base = os.path.join(self.output_directory, f"{self.project_prefix}_{project_type}_summary")
+            index = self._new_index(f"{summary_base}.idx")
+
+            if shard_balance in ("records", "tokens"):
+                manifest = self._save_balanced_summary(project_type, data, summary_base, shard_balance,
+                                                       shard_count, max_summary_file_size, index)
+            elif max_summary_file_size:
+                manifest = self._save_size_split_summary(project_type, data, summary_base, max_summary_file_size,
+                                                         index)
+            else:
+                manifest = self._save_single_summary(project_type, data, summary_base, index)
+
+            if index:
+                index.save()
+            self._remove_stale_shards(summary_base, manifest)
+
+            manifest_file = f"{summary_base}.manifest.json"
+            manifest.save(manifest_file)
+            print(f" - Manifest: {manifest_file}")
+
+        if self.blob_store is not None:
+            removed = self.blob_store.prune(entry for entries in self.data.values() for entry in entries)
+            print(f"Blob store: {self.blob_store.directory} (new {self.blob_store.written}, removed {removed}, "
+                  f"inline fallbacks {self.blob_store.inline_fallbacks})")
+
+        for sink in self.sinks:
+            sink.flush()
+
+    def _remove_stale_shards(self, summary_base, manifest):
+        """
+        Удаляет файлы шардов summary, оставшиеся от предыдущего сохранения и не вошедшие в манифест
+        (например, когда после удаления записей шардов стало меньше).
+
+        :param summary_base: Базовый путь summary.
+        :param manifest: ShardManifest текущего сохранения.
+        """
+        current = {shard["file"] for shard in manifest.shards}
+        current.update(shard["json_file"] for shard in manifest.shards if shard.get("json_file"))
+        current.update(manifest.json_files)
+        for path in glob.glob(glob.escape(summary_base) + "_*"):
+            suffix = os.path.basename(path)[len(os.path.basename(summary_base)) + 1:]
+            if suffix.split(".")[0].isdigit() and os.path.basename(path) not in current:
+                os.remove(path)
+
+    def _write_summary_shard(self, manifest, index, entries, jsonl_file, tokens=None, json_file=None):
+        """
+        Записывает один шард summary в JSONL и добавляет его в манифест и индекс.
+
+        :param manifest: ShardManifest.
+        :param index: RecordIndexWriter или None.
+        :param entries: Записи шарда.
+        :param jsonl_file: Путь к JSONL-файлу шарда (без суффикса сжатия).
+        :param tokens: Оценка количества токенов в шарде.
+        :param json_file: Путь к человекопонятному JSON шарда, если он пишется отдельно.
+        """
+        with self._open_jsonl(jsonl_file) as jsonl_writer:
+            file_number = index.add_file(jsonl_writer) if index else None
+            for entry in entries:
+                location = jsonl_writer.write(dumps(entry) + '\n')
+                if index:
+                    index.add_record(file_number, location, entry)
+        self._count_written(f"{manifest.project_type}_summary", len(entries), jsonl_writer.size)
+        manifest.add_shard(
+            jsonl_writer,
+            records=len(entries),
+            first_source=get_record_source(entries[0]) if entries else None,
+            last_source=get_record_source(entries[-1]) if entries else None,
+            tokens=tokens,
+            json_file=json_file
+        )
+
+    def _save_single_summary(self, project_type, data, summary_base, index=None):
+        """
+        Сохраняет summary одним JSONL и одним JSON (без ограничения размера).
+
+        :return: ShardManifest.
+        """
+        manifest = ShardManifest(project_type, balance="none")
+        summary_jsonl_file = f"{summary_base}.jsonl"
+        summary_json_file = f"{summary_base}.json"
+
+        # Сохраняем JSONL
+        self._write_summary_shard(manifest, index, data, summary_jsonl_file)
+
+        # Сохраняем JSON
+        with atomic_open(summary_json_file) as json_file:
+            dump(data, json_file, indent=4)
+        manifest.add_json_file(summary_json_file)
+
+        print(f"Summary files saved for project type '{project_type}':")
+        print(f" - JSONL: {get_output_path(summary_jsonl_file, self.compression)}")
+        print(f" - JSON: {summary_json_file}")
+        return manifest
+
+    def _save_size_split_summary(self, project_type, data, summary_base, max_summary_file_size, index=None):
+        """
+        Сохраняет summary JSONL с разделением по размеру и общий summary JSON.
+
+        :return: ShardManifest.
+        """
+        manifest = ShardManifest(project_type, balance="size")
+
+        # Сохраняем summary JSONL с разделением по размеру.
+        # В режиме сжатия размер считается по сжатым данным.
+        file_index = 0
+        jsonl_writer = self._open_jsonl(f"{summary_base}_{file_index}.jsonl")
+        file_number = index.add_file(jsonl_writer) if index else None
+        current_records = 0
+        first_source = last_source = None
+
+        try:
+            for entry in data:
+                entry_json = dumps(entry) + '\n'
+                entry_size = len(entry_json.encode('utf-8'))
+
+                if current_records and jsonl_writer.projected_size(entry_size) > max_summary_file_size:
+                    # Закрываем текущий файл и начинаем новый
+                    jsonl_writer.close()
+                    self._count_written(f"{project_type}_summary", current_records, jsonl_writer.size)
+                    manifest.add_shard(jsonl_writer, current_records, first_source, last_source)
+                    file_index += 1
+                    jsonl_writer = self._open_jsonl(f"{summary_base}_{file_index}.jsonl")
+                    file_number = index.add_file(jsonl_writer) if index else None
+                    current_records = 0
+
+                if not current_records:
+                    first_source = get_record_source(entry)
+                last_source = get_record_source(entry)
+                location = jsonl_writer.write(entry_json)
+                if index:
+                    index.add_record(file_number, location, entry)
+                current_records += 1
+        finally:
+            jsonl_writer.close()
+        self._count_written(f"{project_type}_summary", current_records, jsonl_writer.size)
+        manifest.add_shard(jsonl_writer, current_records, first_source, last_source)
+
+        # Сохраняем summary JSON без разделения (общий)
+        summary_json_file = f"{summary_base}.json"
+        with atomic_open(summary_json_file) as json_file:
+            dump(data, json_file, indent=4)
+        manifest.add_json_file(summary_json_file)
+
+        print(f"Summary files saved for project type '{project_type}':")
+        print(f" - JSONL (split by size): {get_output_path(summary_base + '_*.jsonl', self.compression)}")
+        print(f" - JSON: {summary_json_file}")
+        return manifest
+
+    def _save_balanced_summary(self, project_type, data, summary_base, shard_balance, shard_count,
+                               max_summary_file_size, index=None):
+        """
+        Сохраняет summary в шарды, сбалансированные по количеству записей или по оценке токенов.
+        Каждому JSONL-шарду соответствует собственный человекопонятный JSON.
+
+        :return: ShardManifest.
+        """
+        manifest = ShardManifest(project_type, balance=shard_balance)
+
+        # Веса записей считаются отдельным проходом, чтобы не держать сериализованные строки в памяти
+        if shard_balance == "tokens" or not shard_count:
+            line_sizes = [len(dumps(entry)) for entry in data]
         else:
-            # Без ограничения размера сохраняем как обычно
-            for project_type, data in project_data.items():
-                summary_jsonl_file = os.path.join(self.output_directory,
-                                                  f"{self.project_prefix}_{project_type}_summary.jsonl")
-                summary_json_file = os.path.join(self.output_directory,
-                                                 f"{self.project_prefix}_{project_type}_summary.json")
-
-                # Сохраняем JSONL
-                with open(summary_jsonl_file, 'w', encoding='utf-8') as jsonl_file:
-                    for entry in data:
-                        jsonl_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
-
-                # Сохраняем JSON
-                with open(summary_json_file, 'w', encoding='utf-8') as json_file:
-                    json.dump(data, json_file, ensure_ascii=False, indent=4)
-
-                print(f"Summary files saved for project type '{project_type}':")
-                print(f" - JSONL: {summary_jsonl_file}")
-                print(f" - JSON: {summary_json_file}")
+            line_sizes = None
+
+        if shard_balance == "tokens":
+            weights = [math.ceil(size / CHARS_PER_TOKEN) for size in line_sizes]
+        else:
+            weights = [1] * len(data)
+
+        if not shard_count:
+            total_size = sum(line_sizes) + len(data)
+            shard_count = math.ceil(total_size / max_summary_file_size) if max_summary_file_size else 1
+
+        for file_index, (start, end) in enumerate(plan_balanced_shards(weights, shard_count)):
+            shard = data[start:end]
+            shard_json_file = f"{summary_base}_{file_index}.json"
+            self._write_summary_shard(
+                manifest,
+                index,
+                shard,
+                f"{summary_base}_{file_index}.jsonl",
+                tokens=sum(weights[start:end]) if shard_balance == "tokens" else None,
+                json_file=shard_json_file
+            )
+            with atomic_open(shard_json_file) as json_file:
+                dump(shard, json_file, indent=4)
+
+        print(f"Summary files saved for project type '{project_type}':")
+        print(f" - JSONL (balanced by {shard_balance}): {get_output_path(summary_base + '_*.jsonl', self.compression)}")
+        print(f" - JSON: {summary_base}_*.json")
+        return manifest
+
+    def save_deltas(self, base_directory):
+        """
+        Сохраняет для каждой области дельту {prefix}_{scope}_delta.jsonl относительно выгрузки
+        предыдущего запуска: только добавленные, изменённые и удалённые записи (см. formatters.delta_exporter).
+
+        :param base_directory: Каталог с выходными файлами предыдущего запуска (не совпадающий с текущим).
+        :return: Словарь {область: статистика операций}.
+        """
+        if os.path.abspath(base_directory) == os.path.abspath(self.output_directory):
+            raise ValueError("Delta base directory must differ from the output directory.")
+
+        results = {}
+        for scope, entries in self.data.items():
+            previous_file = find_jsonl_file(
+                os.path.join(base_directory, f"{self.project_prefix}_{scope}.jsonl")
+            )
+            delta_file = os.path.join(self.output_directory, f"{self.project_prefix}_{scope}_delta.jsonl")
+            results[scope] = write_delta(previous_file, entries, delta_file, compression=self.compression)
+            print(f"Delta saved for scope '{scope}': {get_output_path(delta_file, self.compression)} {results[scope]}")
+        return results
+
+    def save_tombstones(self, tombstones):
+        """
+        Сохраняет надгробия {prefix}_tombstones.jsonl — записи об исходных файлах, удалённых
+        или переименованных с предыдущей выгрузки, чтобы потребители убрали их записи из своих индексов.
+
+        :param tombstones: Список словарей {"source", "status", "renamed_to", "ids", "scopes"}.
+        :return: Путь к сохранённому файлу.
+        """
+        output_file = os.path.join(self.output_directory, f"{self.project_prefix}_tombstones.jsonl")
+        with self._open_jsonl(output_file) as writer:
+            for tombstone in tombstones:
+                writer.write(dumps(tombstone) + '\n')
+        print(f"Tombstones saved: {writer.path} ({len(tombstones)} files)")
+        return writer.path
+
+    def close(self):
+        """
+        Закрывает подключённые приёмники записей.
+        """
+        for sink in self.sinks:
+            sink.close()
+
+    def iter_saved_records(self, scope):
+        """
+        Читает записи области из JSONL, сохранённого предыдущим запуском в каталоге вывода.
+
+        :param scope: Название области данных.
+        :yield: Записи. Если файла нет, ничего не возвращается.
+        """
+        saved_file = find_jsonl_file(os.path.join(self.output_directory, f"{self.project_prefix}_{scope}.jsonl"))
+        if saved_file:
+            for line in iter_jsonl_lines(saved_file):
+                yield loads(line)
+
+    def get_source_scopes(self):
+        """
+        Возвращает, в какие области попали записи каждого исходного файла.
+
+        :return: Словарь {metadata.source: множество областей}.
+        """
+        source_scopes = defaultdict(set)
+        for scope, entries in self.data.items():
+            for entry in entries:
+                source = get_record_source(entry)
+                if source:
+                    source_scopes[source].add(scope)
+        return source_scopes
 
     def reset_scope(self, scope):
         """
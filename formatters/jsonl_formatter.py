@@ -1,7 +1,8 @@
-import json
+from formatters.output_writers import open_jsonl_writer
+from utils.serializer import dumps
 
-def save_to_jsonl(data, output_file):
-    """Сохраняет данные в формате JSONL."""
-    with open(output_file, 'w', encoding='utf-8') as file:
+def save_to_jsonl(data, output_file, compression=None):
+    """Сохраняет данные в формате JSONL (при compression="gzip" — в блочно-сжатый .jsonl.gz)."""
+    with open_jsonl_writer(output_file, compression=compression) as writer:
         for entry in data:
-            file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            writer.write(dumps(entry) + '\n')
@@ -0,0 +1,433 @@
+import gzip
+import hashlib
+import os
+import queue
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Суффиксы файлов для поддерживаемых режимов сжатия
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+}
+
+# Идентификатор подполя FEXTRA, в котором хранится полный размер блока (как "BC" в BGZF)
+BLOCK_SUBFIELD_ID = b"PJ"
+
+# Начальная оценка степени сжатия исходного кода, пока нет статистики по реальным блокам
+DEFAULT_COMPRESSION_RATIO = 0.35
+
+# Метка в очереди фонового потока BlockGzipWriter: сбросить файл на диск
+FLUSH = object()
+
+# Суффикс временного файла: выходные файлы пишутся рядом и заменяют старые атомарно
+TEMP_SUFFIX = ".tmp"
+
+
+def get_output_path(path, compression=None):
+    """
+    Возвращает путь к файлу с учётом суффикса режима сжатия.
+
+    :param path: Базовый путь к файлу (например, "output/project_files.jsonl").
+    :param compression: Режим сжатия (None или "gzip").
+    :return: Путь к файлу (например, "output/project_files.jsonl.gz").
+    """
+    if not compression:
+        return path
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression '{compression}'. Available: {', '.join(COMPRESSION_SUFFIXES)}.")
+    return path + COMPRESSION_SUFFIXES[compression]
+
+
+@contextmanager
+def atomic_open(path, mode="w", encoding="utf-8"):
+    """
+    Открывает файл на запись так, что читатели видят либо старую, либо полностью записанную версию:
+    данные пишутся во временный файл, который по завершении заменяет целевой (os.replace).
+    При ошибке временный файл удаляется, а прежний файл остаётся нетронутым.
+
+    :param path: Путь к целевому файлу.
+    :param mode: Режим открытия ("w" или "wb").
+    :param encoding: Кодировка для текстового режима.
+    :yield: Открытый файл.
+    """
+    temp_path = path + TEMP_SUFFIX
+    file = open(temp_path, mode, encoding=None if "b" in mode else encoding)
+    try:
+        yield file
+    except BaseException:
+        file.close()
+        os.remove(temp_path)
+        raise
+    file.close()
+    os.replace(temp_path, path)
+
+
+class PlainJsonlWriter:
+    """
+    Запись JSONL без сжатия с подсчётом записанных байт.
+    Файл пишется во временный и атомарно заменяет целевой при close().
+    """
+
+    compression = None
+
+    def __init__(self, path):
+        """
+        :param path: Путь к выходному файлу.
+        """
+        self.path = path
+        self._file = open(path + TEMP_SUFFIX, "wb")
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, line):
+        """
+        Записывает строку JSONL (вместе с переводом строки).
+
+        :param line: Строка для записи.
+        :return: Кортеж (смещение, длина) строки в файле (в байтах).
+        """
+        data = line.encode("utf-8")
+        offset = self.size
+        self._file.write(data)
+        self._sha256.update(data)
+        self.size += len(data)
+        return offset, len(data)
+
+    @property
+    def checksum(self):
+        """SHA-256 записанных на диск байт (hex)."""
+        return self._sha256.hexdigest()
+
+    def projected_size(self, extra_bytes=0):
+        """
+        Оценивает размер файла на диске после записи ещё extra_bytes байт.
+
+        :param extra_bytes: Размер предстоящей записи в байтах.
+        :return: Размер файла в байтах.
+        """
+        return self.size + extra_bytes
+
+    def flush(self):
+        """Сбрасывает записанные строки во временный файл на диске."""
+        self._file.flush()
+
+    def close(self):
+        """Закрывает файл и заменяет им целевой."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.replace(self.path + TEMP_SUFFIX, self.path)
+
+    def abort(self):
+        """Закрывает и удаляет временный файл, не трогая целевой."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self.path + TEMP_SUFFIX)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class BlockGzipWriter:
+    """
+    Запись JSONL в gzip, разбитый на независимые блоки (по аналогии с BGZF).
+
+    Каждый блок — отдельный gzip-член, содержащий только целые записи. Полный размер блока
+    хранится в подполе FEXTRA, поэтому читатель может перечислить блоки, читая только их
+    заголовки, и распаковывать их параллельно. Обычный gzip/zcat читает файл целиком.
+    Сжатие и запись выполняются в фоновом потоке; файл атомарно заменяет целевой при close().
+    """
+
+    compression = "gzip"
+
+    def __init__(self, path, block_size=1048576, level=6, max_pending_blocks=4):
+        """
+        :param path: Путь к выходному файлу.
+        :param block_size: Размер несжатого блока в байтах, после которого блок отправляется на сжатие.
+        :param level: Уровень сжатия zlib (1-9).
+        :param max_pending_blocks: Максимальное количество блоков в очереди фонового потока.
+        """
+        self.path = path
+        self.block_size = block_size
+        self.level = level
+        self._file = open(path + TEMP_SUFFIX, "wb")
+        self._block = bytearray()
+        self._raw_size = 0  # Несжатый размер всех записанных строк
+        self._compressed_size = 0  # Байт записано на диск фоновым потоком
+        self._compressed_raw = 0  # Несжатый размер уже сжатых блоков
+        self._pending_raw = 0  # Несжатый размер блоков в очереди
+        self._lock = threading.Lock()
+        self._sha256 = hashlib.sha256()
+        # Таблица блоков: (несжатое смещение, несжатая длина, сжатое смещение, сжатая длина)
+        self.blocks = []
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_pending_blocks)
+        self._thread = threading.Thread(target=self._run, name=f"gzip-writer:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    @property
+    def size(self):
+        """Размер сжатых данных, уже записанных на диск."""
+        with self._lock:
+            return self._compressed_size
+
+    @property
+    def checksum(self):
+        """SHA-256 сжатых байт, записанных на диск (hex). Окончательное значение доступно после close()."""
+        with self._lock:
+            return self._sha256.hexdigest()
+
+    def _ratio(self):
+        with self._lock:
+            if self._compressed_raw:
+                return self._compressed_size / self._compressed_raw
+        return DEFAULT_COMPRESSION_RATIO
+
+    def write(self, line):
+        """
+        Добавляет строку JSONL в текущий блок.
+
+        :param line: Строка для записи.
+        :return: Кортеж (смещение, длина) строки в несжатом потоке (в байтах).
+        """
+        self._raise_if_failed()
+        data = line.encode("utf-8")
+        offset = self._raw_size
+        self._block += data
+        self._raw_size += len(data)
+        if len(self._block) >= self.block_size:
+            self._submit_block()
+        return offset, len(data)
+
+    def projected_size(self, extra_bytes=0):
+        """
+        Оценивает сжатый размер файла после записи ещё extra_bytes несжатых байт.
+
+        Для блоков, которые ещё не сжаты, используется наблюдаемая степень сжатия.
+
+        :param extra_bytes: Несжатый размер предстоящей записи в байтах.
+        :return: Оценка размера файла в байтах.
+        """
+        with self._lock:
+            pending = self._pending_raw
+            written = self._compressed_size
+        return written + int((pending + len(self._block) + extra_bytes) * self._ratio())
+
+    def flush(self):
+        """
+        Отправляет текущий неполный блок на сжатие и сбрасывает файл после его записи:
+        уже записанные строки оказываются на диске в виде целых gzip-членов.
+        """
+        self._raise_if_failed()
+        if self._block:
+            self._submit_block()
+        self._queue.put(FLUSH)
+
+    def _submit_block(self):
+        block = bytes(self._block)
+        self._block = bytearray()
+        with self._lock:
+            self._pending_raw += len(block)
+        self._queue.put((self._raw_size - len(block), block))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            if item is FLUSH:
+                try:
+                    self._file.flush()
+                except Exception as e:
+                    self._error = e
+                continue
+            raw_start, block = item
+            try:
+                member = compress_block(block, self.level)
+                self._file.write(member)
+                with self._lock:
+                    self.blocks.append((raw_start, len(block), self._compressed_size, len(member)))
+                    self._sha256.update(member)
+                    self._pending_raw -= len(block)
+                    self._compressed_raw += len(block)
+                    self._compressed_size += len(member)
+            except Exception as e:
+                self._error = e
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError(f"Ошибка фоновой записи в {self.path}: {self._error}")
+
+    def close(self):
+        """Сжимает оставшиеся данные, дожидается фонового потока, закрывает файл и заменяет им целевой."""
+        if self._file is None:
+            return
+        if self._block:
+            self._submit_block()
+        self._finish()
+        if self._error is not None:
+            os.remove(self.path + TEMP_SUFFIX)
+            self._raise_if_failed()
+        os.replace(self.path + TEMP_SUFFIX, self.path)
+
+    def abort(self):
+        """Останавливает фоновый поток и удаляет временный файл, не трогая целевой."""
+        if self._file is None:
+            return
+        self._block = bytearray()
+        self._finish()
+        os.remove(self.path + TEMP_SUFFIX)
+
+    def _finish(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def compress_block(data, level=6):
+    """
+    Сжимает блок в самостоятельный gzip-член с размером блока в подполе FEXTRA.
+
+    :param data: Несжатые байты блока (целые строки JSONL).
+    :param level: Уровень сжатия zlib.
+    :return: Байты gzip-члена.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    deflated = compressor.compress(data) + compressor.flush()
+
+    extra = BLOCK_SUBFIELD_ID + struct.pack("<H", 4)
+    # Заголовок (10) + XLEN (2) + подполе (8) + данные + CRC32 и ISIZE (8)
+    total_size = 10 + 2 + len(extra) + 4 + len(deflated) + 8
+    header = (
+        b"\x1f\x8b\x08\x04"  # ID1, ID2, CM=deflate, FLG=FEXTRA
+        + b"\x00\x00\x00\x00"  # MTIME не задаётся, чтобы вывод был воспроизводимым
+        + b"\x00\xff"  # XFL, OS=unknown
+        + struct.pack("<H", len(extra) + 4)
+        + extra
+        + struct.pack("<I", total_size)
+    )
+    trailer = struct.pack("<II", zlib.crc32(data) & 0xFFFFFFFF, len(data) & 0xFFFFFFFF)
+    return header + deflated + trailer
+
+
+def read_block_table(path):
+    """
+    Перечисляет блоки файла, записанного BlockGzipWriter, читая только заголовки.
+
+    :param path: Путь к файлу .gz.
+    :return: Список кортежей (смещение, длина) сжатых блоков.
+    """
+    blocks = []
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        offset = 0
+        while offset < file_size:
+            file.seek(offset)
+            header = file.read(12)
+            if len(header) < 12 or header[:2] != b"\x1f\x8b" or not header[3] & 0x04:
+                raise ValueError(f"File {path} is not block-compressed (offset {offset}).")
+            xlen = struct.unpack("<H", header[10:12])[0]
+            extra = file.read(xlen)
+            block_size = None
+            position = 0
+            while position + 4 <= len(extra):
+                subfield_id = extra[position:position + 2]
+                subfield_len = struct.unpack("<H", extra[position + 2:position + 4])[0]
+                if subfield_id == BLOCK_SUBFIELD_ID and subfield_len == 4:
+                    block_size = struct.unpack("<I", extra[position + 4:position + 8])[0]
+                position += 4 + subfield_len
+            if block_size is None:
+                raise ValueError(f"Block size subfield not found in {path} at offset {offset}.")
+            blocks.append((offset, block_size))
+            offset += block_size
+    return blocks
+
+
+def decompress_block(data):
+    """
+    Распаковывает один gzip-член.
+
+    :param data: Сжатые байты блока.
+    :return: Несжатые байты.
+    """
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+
+def open_jsonl_writer(path, compression=None, block_size=1048576, level=6):
+    """
+    Открывает запись JSONL в выбранном режиме сжатия.
+
+    :param path: Базовый путь к файлу (суффикс сжатия добавляется автоматически).
+    :param compression: Режим сжатия (None или "gzip").
+    :param block_size: Размер несжатого блока для режима gzip.
+    :param level: Уровень сжатия для режима gzip.
+    :return: PlainJsonlWriter или BlockGzipWriter.
+    """
+    output_path = get_output_path(path, compression)
+    if compression == "gzip":
+        return BlockGzipWriter(output_path, block_size=block_size, level=level)
+    return PlainJsonlWriter(output_path)
+
+
+def iter_jsonl_lines(path):
+    """
+    Построчно читает JSONL-файл, сжатый или нет.
+
+    :param path: Путь к файлу (.jsonl или .jsonl.gz).
+    :yield: Строки файла без завершающего перевода строки.
+    """
+    opener = gzip.open if path.endswith(COMPRESSION_SUFFIXES["gzip"]) else open
+    with opener(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            line = line.rstrip("\n")
+            if line:
+                yield line
+
+
+def iter_jsonl_lines_parallel(path, workers=4):
+    """
+    Читает блочно-сжатый JSONL, распаковывая блоки параллельно (zlib освобождает GIL).
+    Порядок строк сохраняется.
+
+    :param path: Путь к файлу .jsonl.gz, записанному BlockGzipWriter.
+    :param workers: Количество потоков распаковки.
+    :yield: Строки файла без завершающего перевода строки.
+    """
+    blocks = read_block_table(path)
+
+    def load(block):
+        offset, length = block
+        with open(path, "rb") as file:
+            file.seek(offset)
+            return decompress_block(file.read(length))
+
+    # Ограничиваем число распакованных, но ещё не прочитанных блоков
+    window = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(blocks), window):
+            for data in executor.map(load, blocks[start:start + window]):
+                for line in data.decode("utf-8").split("\n"):
+                    if line:
+                        yield line
@@ -0,0 +1,294 @@
+import bisect
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from formatters.output_writers import atomic_open, decompress_block
+from utils.serializer import dumps, loads
+
+# Версия формата индекса
+INDEX_VERSION = 1
+
+# Виды ключей индекса
+KEY_ID = "id"
+KEY_SOURCE = "source"
+KEY_NAME = "name"
+
+
+def iter_record_keys(entry):
+    """
+    Перечисляет ключи, по которым запись должна находиться в индексе:
+    id записи и её чанков, metadata.source и имена чанков (для членов классов — "Класс.член").
+
+    :param entry: Запись (словарь файла).
+    :yield: Кортежи (вид ключа, ключ).
+    """
+    if entry.get("id"):
+        yield KEY_ID, entry["id"]
+    metadata = entry.get("metadata") or {}
+    if metadata.get("source"):
+        yield KEY_SOURCE, metadata["source"]
+
+    for chunk in entry.get("chunks") or []:
+        if chunk.get("id"):
+            yield KEY_ID, chunk["id"]
+        chunk_name = chunk.get("name")
+        if chunk_name:
+            yield KEY_NAME, chunk_name
+        for member_list in ("methods", "properties", "attributes"):
+            for member in chunk.get(member_list) or []:
+                if member.get("id"):
+                    yield KEY_ID, member["id"]
+                if chunk_name and member.get("name"):
+                    yield KEY_NAME, f"{chunk_name}.{member['name']}"
+
+
+class RecordIndexWriter:
+    """
+    Собирает индекс записей JSONL по мере их записи и сохраняет его в компактный файл-спутник.
+
+    Формат файла: первая строка — JSON-заголовок с таблицей файлов данных, далее строки
+    "вид<TAB>ключ<TAB>номер файла<TAB>смещение<TAB>длина", отсортированные по ключу.
+    Для блочно-сжатых файлов смещения указаны в несжатом потоке, а заголовок содержит таблицу блоков.
+
+    Строки сортируются при сохранении, поэтому все ключи хранятся в памяти до save(): память растёт
+    с количеством ключей (id записи и чанков, путь, имена чанков) — порядка сотни байт на ключ.
+    """
+
+    def __init__(self, index_path):
+        """
+        :param index_path: Путь к файлу индекса.
+        """
+        self.index_path = index_path
+        self._files = []
+        self._writers = []
+        self._entries = []
+
+    def add_file(self, writer):
+        """
+        Регистрирует файл данных, в который будут записываться индексируемые записи.
+
+        :param writer: Объект записи JSONL (см. formatters.output_writers).
+        :return: Номер файла в индексе.
+        """
+        self._writers.append(writer)
+        self._files.append({"file": os.path.basename(writer.path), "compression": writer.compression})
+        return len(self._files) - 1
+
+    def add_record(self, file_number, location, entry):
+        """
+        Добавляет запись в индекс.
+
+        :param file_number: Номер файла, возвращённый add_file.
+        :param location: Кортеж (смещение, длина), возвращённый writer.write.
+        :param entry: Записанная запись.
+        """
+        offset, length = location
+        for kind, key in iter_record_keys(entry):
+            key = str(key)
+            # Ключи с разделителями формата не индексируются
+            if "\t" in key or "\n" in key:
+                continue
+            self._entries.append((kind, key, file_number, offset, length))
+
+    def save(self):
+        """
+        Сохраняет индекс. Вызывается после закрытия всех файлов данных (нужна их таблица блоков).
+        """
+        for file_info, writer in zip(self._files, self._writers):
+            if writer.compression:
+                file_info["blocks"] = [
+                    [raw_start, compressed_offset, compressed_length]
+                    for raw_start, _, compressed_offset, compressed_length in writer.blocks
+                ]
+
+        self._entries.sort()
+        header = {"version": INDEX_VERSION, "files": self._files}
+        with atomic_open(self.index_path) as file:
+            file.write(dumps(header) + "\n")
+            for kind, key, file_number, offset, length in self._entries:
+                file.write(f"{kind}\t{key}\t{file_number}\t{offset}\t{length}\n")
+
+
+class RecordIndex:
+    """
+    Произвольный доступ к записям JSONL по индексу-спутнику.
+
+    Индекс и файлы данных отображаются в память (mmap). Ключи не загружаются: строки индекса
+    отсортированы, и нужная находится бинарным поиском, поэтому открытие индекса не зависит от его размера.
+    Читается только байтовый диапазон записи; для блочно-сжатых файлов распаковывается только
+    содержащий её блок (с небольшим LRU-кэшем блоков). Экземпляр можно использовать из нескольких потоков.
+    """
+
+    def __init__(self, index_path, block_cache_size=16):
+        """
+        :param index_path: Путь к файлу индекса.
+        :param block_cache_size: Количество распакованных блоков, хранимых в кэше.
+        """
+        self.index_path = index_path
+        self.directory = os.path.dirname(os.path.abspath(index_path))
+        self._maps = {}
+        self._handles = {}
+        self._block_cache = OrderedDict()
+        self._block_cache_size = block_cache_size
+        self._lock = threading.Lock()
+
+        self._index_handle = open(index_path, "rb")
+        try:
+            self._index_map = mmap.mmap(self._index_handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data_start = self._index_map.find(b"\n") + 1
+            header = loads(self._index_map[:self._data_start])
+        except Exception:
+            self._index_handle.close()
+            raise
+        if header.get("version") != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported index version in {index_path}: {header.get('version')}")
+        self.files = header["files"]
+
+        # Начала блоков для бинарного поиска по несжатому смещению
+        self._block_starts = [
+            [block[0] for block in file_info.get("blocks", [])] for file_info in self.files
+        ]
+
+    def _line_key(self, start):
+        """
+        Возвращает (вид, ключ) строки индекса, начинающейся со смещения start, и конец строки.
+        Байты UTF-8 сравниваются в том же порядке, что и строки при сортировке в RecordIndexWriter.
+        """
+        end = self._index_map.find(b"\n", start)
+        kind, key, _ = self._index_map[start:end].split(b"\t", 2)
+        return (kind, key), end
+
+    def _locate(self, key, kind):
+        """
+        Находит расположения записей по ключу бинарным поиском по отсортированным строкам индекса.
+
+        :return: Список кортежей (номер файла, смещение, длина).
+        """
+        target = (kind.encode("utf-8"), str(key).encode("utf-8"))
+        index_map = self._index_map
+        # Поиск первой строки с ключом не меньше искомого; low и high — начала строк
+        low, high = self._data_start, len(index_map)
+        while low < high:
+            middle = (low + high) // 2
+            start = index_map.rfind(b"\n", 0, middle) + 1
+            line_key, end = self._line_key(start)
+            if line_key < target:
+                low = end + 1
+            else:
+                high = start
+
+        locations = []
+        while low < len(index_map):
+            line_key, end = self._line_key(low)
+            if line_key != target:
+                break
+            _, _, file_number, offset, length = index_map[low:end].split(b"\t")
+            locations.append((int(file_number), int(offset), int(length)))
+            low = end + 1
+        return locations
+
+    def lookup(self, key, kind=KEY_ID):
+        """
+        Возвращает расположения записей по ключу.
+
+        :param key: Значение ключа (id, путь или имя чанка).
+        :param kind: Вид ключа: "id", "source" или "name".
+        :return: Список кортежей (имя файла, смещение, длина).
+        """
+        return [
+            (self.files[file_number]["file"], offset, length)
+            for file_number, offset, length in self._locate(key, kind)
+        ]
+
+    def read_raw(self, key, kind=KEY_ID):
+        """
+        Читает байты всех записей, найденных по ключу, без разбора JSON.
+
+        :param key: Значение ключа.
+        :param kind: Вид ключа.
+        :return: Список байтовых строк JSONL (без перевода строки).
+        """
+        return [
+            self._read(file_number, offset, length).rstrip(b"\n")
+            for file_number, offset, length in self._locate(key, kind)
+        ]
+
+    def get(self, key, kind=KEY_ID):
+        """
+        Возвращает первую запись, найденную по ключу.
+
+        :param key: Значение ключа.
+        :param kind: Вид ключа.
+        :return: Запись или None, если ключ не найден.
+        """
+        locations = self._locate(key, kind)
+        if not locations:
+            return None
+        return loads(self._read(*locations[0]))
+
+    def get_all(self, key, kind=KEY_ID):
+        """
+        Возвращает все записи, найденные по ключу.
+
+        :param key: Значение ключа.
+        :param kind: Вид ключа.
+        :return: Список записей.
+        """
+        return [loads(data) for data in self.read_raw(key, kind)]
+
+    def _get_map(self, file_number):
+        with self._lock:
+            mapped = self._maps.get(file_number)
+            if mapped is None:
+                path = os.path.join(self.directory, self.files[file_number]["file"])
+                handle = open(path, "rb")
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                self._handles[file_number] = handle
+                self._maps[file_number] = mapped
+            return mapped
+
+    def _read(self, file_number, offset, length):
+        file_info = self.files[file_number]
+        mapped = self._get_map(file_number)
+        if not file_info.get("compression"):
+            return mapped[offset:offset + length]
+
+        # Находим блок, содержащий запись (записи не пересекают границы блоков)
+        block_number = bisect.bisect_right(self._block_starts[file_number], offset) - 1
+        raw_start, compressed_offset, compressed_length = file_info["blocks"][block_number]
+        cache_key = (file_number, block_number)
+        with self._lock:
+            data = self._block_cache.get(cache_key)
+            if data is not None:
+                self._block_cache.move_to_end(cache_key)
+        if data is None:
+            data = decompress_block(mapped[compressed_offset:compressed_offset + compressed_length])
+            with self._lock:
+                self._block_cache[cache_key] = data
+                while len(self._block_cache) > self._block_cache_size:
+                    self._block_cache.popitem(last=False)
+        start = offset - raw_start
+        return data[start:start + length]
+
+    def close(self):
+        """Закрывает отображённые файлы."""
+        with self._lock:
+            if self._index_map is not None:
+                self._index_map.close()
+                self._index_map = None
+            self._index_handle.close()
+            for mapped in self._maps.values():
+                mapped.close()
+            for handle in self._handles.values():
+                handle.close()
+            self._maps.clear()
+            self._handles.clear()
+            self._block_cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,121 @@
+import os
+from formatters.output_writers import atomic_open
+from utils.serializer import dump
+
+# Режимы разбиения summary-файлов на шарды
+SHARD_BALANCE_MODES = ("size", "records", "tokens")
+
+
+def get_record_source(entry):
+    """
+    Возвращает путь к исходному файлу записи (metadata.source), если он есть.
+
+    :param entry: Запись.
+    :return: Путь или None.
+    """
+    metadata = entry.get("metadata") if hasattr(entry, "get") else None
+    return metadata.get("source") if metadata else None
+
+
+def plan_balanced_shards(weights, shard_count):
+    """
+    Делит последовательность записей на непрерывные диапазоны с примерно равным суммарным весом.
+
+    Порядок записей сохраняется, поэтому у каждого шарда определены первый и последний источник.
+
+    :param weights: Список весов записей (1 для балансировки по количеству, токены — по объёму).
+    :param shard_count: Желаемое количество шардов.
+    :return: Список кортежей (start, end) — границ диапазонов в списке записей.
+    """
+    total_records = len(weights)
+    shard_count = max(1, min(shard_count, total_records))
+    if total_records == 0:
+        return [(0, 0)]
+
+    total_weight = sum(weights)
+    ranges = []
+    start = 0
+    cumulative = 0
+    for shard_index in range(1, shard_count):
+        ideal = total_weight * shard_index / shard_count
+        end = start
+        # Оставляем хотя бы по одной записи на каждый из оставшихся шардов
+        max_end = total_records - (shard_count - shard_index)
+        while end < max_end and (end == start or cumulative + weights[end] / 2 <= ideal):
+            cumulative += weights[end]
+            end += 1
+        ranges.append((start, end))
+        start = end
+    ranges.append((start, total_records))
+    return ranges
+
+
+class ShardManifest:
+    """
+    Описание шардов одного summary: файлы, количество записей, размер, контрольная сумма
+    и первый/последний источник. Пути к файлам хранятся относительно каталога манифеста.
+    """
+
+    def __init__(self, project_type, balance):
+        """
+        :param project_type: Тип проекта (например, "bitrix").
+        :param balance: Режим разбиения ("none", "size", "records" или "tokens").
+        """
+        self.project_type = project_type
+        self.balance = balance
+        self.shards = []
+        self.json_files = []
+
+    def add_shard(self, writer, records, first_source, last_source, tokens=None, json_file=None):
+        """
+        Добавляет в манифест закрытый шард.
+
+        :param writer: Закрытый объект записи JSONL (см. formatters.output_writers).
+        :param records: Количество записей в шарде.
+        :param first_source: metadata.source первой записи.
+        :param last_source: metadata.source последней записи.
+        :param tokens: Оценка количества токенов в шарде (если считалась).
+        :param json_file: Путь к человекопонятному JSON этого шарда, если он пишется отдельно.
+        """
+        shard = {
+            "index": len(self.shards),
+            "file": os.path.basename(writer.path),
+            "records": records,
+            "bytes": os.path.getsize(writer.path),
+            "sha256": writer.checksum,
+            "first_source": first_source,
+            "last_source": last_source,
+        }
+        if tokens is not None:
+            shard["tokens"] = tokens
+        if json_file:
+            shard["json_file"] = os.path.basename(json_file)
+        self.shards.append(shard)
+
+    def add_json_file(self, json_file):
+        """
+        Добавляет в манифест общий человекопонятный JSON.
+
+        :param json_file: Путь к файлу.
+        """
+        self.json_files.append(os.path.basename(json_file))
+
+    def to_dict(self):
+        """Возвращает манифест в виде словаря."""
+        return {
+            "project_type": self.project_type,
+            "balance": self.balance,
+            "records": sum(shard["records"] for shard in self.shards),
+            "bytes": sum(shard["bytes"] for shard in self.shards),
+            "shards": self.shards,
+            "json_files": self.json_files,
+        }
+
+    def save(self, output_file):
+        """
+        Сохраняет манифест в JSON.
+
+        :param output_file: Путь к файлу манифеста.
+        """
+        with atomic_open(output_file) as file:
+            dump(self.to_dict(), file, indent=4)
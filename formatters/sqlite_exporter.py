@@ -0,0 +1,301 @@
+import os
+import sqlite3
+import threading
+from utils.serializer import dumps
+
+# Схема базы. Таблицы используют существующие идентификаторы чанков.
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS files (
+        id TEXT PRIMARY KEY,
+        scope TEXT,
+        source TEXT,
+        name TEXT,
+        file_type TEXT,
+        description TEXT,
+        code TEXT,
+        record TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS files_source ON files (source)",
+    """CREATE TABLE IF NOT EXISTS classes (
+        id TEXT PRIMARY KEY,
+        file_id TEXT,
+        name TEXT,
+        description TEXT,
+        code TEXT,
+        start_line INTEGER,
+        end_line INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS classes_file ON classes (file_id)",
+    "CREATE INDEX IF NOT EXISTS classes_name ON classes (name)",
+    """CREATE TABLE IF NOT EXISTS methods (
+        id TEXT PRIMARY KEY,
+        class_id TEXT,
+        file_id TEXT,
+        name TEXT,
+        description TEXT,
+        code TEXT,
+        start_line INTEGER,
+        end_line INTEGER,
+        modifiers TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS methods_class ON methods (class_id)",
+    "CREATE INDEX IF NOT EXISTS methods_name ON methods (name)",
+    """CREATE TABLE IF NOT EXISTS functions (
+        id TEXT PRIMARY KEY,
+        file_id TEXT,
+        name TEXT,
+        description TEXT,
+        code TEXT,
+        start_line INTEGER,
+        end_line INTEGER
+    )""",
+    "CREATE INDEX IF NOT EXISTS functions_file ON functions (file_id)",
+    "CREATE INDEX IF NOT EXISTS functions_name ON functions (name)",
+    """CREATE TABLE IF NOT EXISTS qa (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        class_id TEXT,
+        file_id TEXT,
+        question TEXT,
+        answer TEXT
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS qa_class_question ON qa (class_id, question)",
+]
+
+# Полнотекстовый индекс по именам, описаниям и коду всех видов чанков
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5("
+    "kind UNINDEXED, chunk_id UNINDEXED, file_id UNINDEXED, name, description, code, tokenize='unicode61')"
+)
+
+INSERTS = {
+    "files": "INSERT OR REPLACE INTO files (id, scope, source, name, file_type, description, code, record) "
+             "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    "classes": "INSERT OR REPLACE INTO classes (id, file_id, name, description, code, start_line, end_line) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "methods": "INSERT OR REPLACE INTO methods "
+               "(id, class_id, file_id, name, description, code, start_line, end_line, modifiers) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "functions": "INSERT OR REPLACE INTO functions (id, file_id, name, description, code, start_line, end_line) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "qa": "INSERT OR REPLACE INTO qa (class_id, file_id, question, answer) VALUES (?, ?, ?, ?)",
+    "search": "INSERT INTO search (kind, chunk_id, file_id, name, description, code) VALUES (?, ?, ?, ?, ?, ?)",
+}
+
+# Таблицы со строками, принадлежащими записи файла (ключ file_id)
+FILE_TABLES = ("classes", "methods", "functions", "qa")
+
+# Количество параметров в одном запросе IN (...) — ниже ограничения старых сборок SQLite
+MAX_QUERY_PARAMETERS = 500
+
+
+class SQLiteExporter:
+    """
+    Записывает записи JSONManager в локальную базу SQLite с полнотекстовым индексом FTS5.
+
+    Подключается к JSONManager как приёмник (sink): записи разбираются на строки таблиц
+    files, classes, methods, functions и qa по мере добавления и вставляются пакетами
+    в одной транзакции на пакет. Повторно добавленная запись файла заменяет прежние строки
+    этого файла (в том числе строки полнотекстового индекса), поэтому повторы не накапливаются.
+
+    База создаётся (и при reset очищается) при первом обращении, а не при создании экспортёра:
+    запуск, не добавляющий записей (например, --dry-run), существующую базу не трогает.
+    """
+
+    def __init__(self, db_path, batch_size=500, reset=True):
+        """
+        :param db_path: Путь к файлу базы данных.
+        :param batch_size: Количество записей файлов, после которого буфер сбрасывается в базу.
+        :param reset: Удалить существующую базу перед началом записи.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._rows = {table: [] for table in INSERTS}
+        self._pending_records = 0
+        self._pending_ids = set()
+        self.reset = reset
+        self.conn = None
+        self.fts_enabled = None  # Определяется при открытии базы
+
+    def _connect_locked(self):
+        """
+        Открывает базу при первом обращении: при reset удаляет существующую и создаёт схему.
+        """
+        if self.conn is not None:
+            return
+        if self.reset and os.path.exists(self.db_path):
+            os.remove(self.db_path)
+        self.reset = False  # После close() база открывается повторно без очистки
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+            try:
+                self.conn.execute(FTS_SCHEMA)
+                self.fts_enabled = True
+            except sqlite3.OperationalError as e:
+                # Сборка SQLite без FTS5: таблицы пишутся, полнотекстовый поиск недоступен
+                print(f"Warning: FTS5 is not available ({e}). Full-text index is disabled.")
+                self.fts_enabled = False
+
+    def add_records(self, scope, entries):
+        """
+        Добавляет записи файлов в буфер и сбрасывает его в базу при заполнении.
+
+        :param scope: Область данных JSONManager.
+        :param entries: Список записей файлов.
+        """
+        with self._lock:
+            self._connect_locked()
+            for entry in entries:
+                if entry.get("id") in self._pending_ids:
+                    # Файл уже в буфере: прежние строки записываются, чтобы затем замениться целиком
+                    self._flush_locked()
+                self._collect_rows(scope, entry)
+                self._pending_ids.add(entry.get("id"))
+                self._pending_records += 1
+            if self._pending_records >= self.batch_size:
+                self._flush_locked()
+
+    def _collect_rows(self, scope, entry):
+        file_id = entry.get("id")
+        metadata = entry.get("metadata") or {}
+        self._rows["files"].append((
+            file_id,
+            scope,
+            metadata.get("source"),
+            entry.get("name"),
+            metadata.get("file_type"),
+            entry.get("description"),
+            entry.get("code"),
+            dumps(entry),
+        ))
+        self._add_search_row("file", file_id, file_id, metadata.get("source") or entry.get("name"),
+                             entry.get("description"), entry.get("code"))
+
+        for chunk in entry.get("chunks") or []:
+            chunk_type = chunk.get("type")
+            if chunk_type == "class":
+                self._collect_class_rows(file_id, chunk)
+            elif chunk_type == "function":
+                self._rows["functions"].append((
+                    chunk.get("id"), file_id, chunk.get("name"), chunk.get("description"), chunk.get("code"),
+                    chunk.get("start_line"), chunk.get("end_line"),
+                ))
+                self._add_search_row("function", chunk.get("id"), file_id, chunk.get("name"),
+                                     chunk.get("description"), chunk.get("code"))
+
+    def _collect_class_rows(self, file_id, class_chunk):
+        class_id = class_chunk.get("id")
+        self._rows["classes"].append((
+            class_id, file_id, class_chunk.get("name"), class_chunk.get("description"), class_chunk.get("code"),
+            class_chunk.get("start_line"), class_chunk.get("end_line"),
+        ))
+        self._add_search_row("class", class_id, file_id, class_chunk.get("name"),
+                             class_chunk.get("description"), class_chunk.get("code"))
+
+        for method in class_chunk.get("methods") or []:
+            modifiers = method.get("modifiers")
+            self._rows["methods"].append((
+                method.get("id"), class_id, file_id, method.get("name"), method.get("description"),
+                method.get("code"), method.get("start_line"), method.get("end_line"),
+                dumps(modifiers) if isinstance(modifiers, (list, dict)) else modifiers,
+            ))
+            self._add_search_row("method", method.get("id"), file_id,
+                                 f"{class_chunk.get('name')}.{method.get('name')}",
+                                 method.get("description"), method.get("code"))
+
+        for qa_entry in class_chunk.get("qa") or []:
+            self._rows["qa"].append((class_id, file_id, qa_entry.get("question"), qa_entry.get("answer")))
+
+    def _add_search_row(self, kind, chunk_id, file_id, name, description, code):
+        if self.fts_enabled:
+            self._rows["search"].append((kind, chunk_id, file_id, name, description, code))
+
+    def remove_source(self, source):
+        """
+        Удаляет из базы записи исходного файла и все их классы, методы, функции, QA и строки поиска.
+
+        :param source: Относительный путь к исходному файлу (metadata.source).
+        """
+        with self._lock:
+            self._connect_locked()
+            self._flush_locked()
+            with self.conn:
+                file_ids = [row[0] for row in self.conn.execute("SELECT id FROM files WHERE source = ?", (source,))]
+                self._delete_files_locked(file_ids)
+
+    def _delete_files_locked(self, file_ids):
+        """
+        Удаляет записи файлов по id вместе со строками дочерних таблиц и поиска (в открытой транзакции).
+        """
+        rows = [(file_id,) for file_id in file_ids]
+        if not rows:
+            return
+        if self.fts_enabled:
+            self.conn.executemany("DELETE FROM search WHERE file_id = ?", rows)
+        for table in FILE_TABLES:
+            self.conn.executemany(f"DELETE FROM {table} WHERE file_id = ?", rows)
+        self.conn.executemany("DELETE FROM files WHERE id = ?", rows)
+
+    def _find_existing_files_locked(self, file_ids):
+        """
+        Возвращает id файлов из списка, уже записанных в базу.
+        """
+        existing = []
+        for start in range(0, len(file_ids), MAX_QUERY_PARAMETERS):
+            part = file_ids[start:start + MAX_QUERY_PARAMETERS]
+            placeholders = ", ".join("?" * len(part))
+            existing.extend(
+                row[0] for row in self.conn.execute(f"SELECT id FROM files WHERE id IN ({placeholders})", part)
+            )
+        return existing
+
+    def flush(self):
+        """Сбрасывает буфер в базу одной транзакцией."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending_records:
+            return
+        with self.conn:
+            # Повторно добавленные файлы: прежние строки заменяются целиком
+            self._delete_files_locked(self._find_existing_files_locked([row[0] for row in self._rows["files"]]))
+            for table, rows in self._rows.items():
+                if rows:
+                    self.conn.executemany(INSERTS[table], rows)
+                    rows.clear()
+        self._pending_records = 0
+        self._pending_ids.clear()
+
+    def search(self, query, limit=20):
+        """
+        Полнотекстовый поиск по именам, описаниям и коду.
+
+        :param query: Запрос в синтаксисе FTS5 MATCH.
+        :param limit: Максимальное количество результатов.
+        :return: Список кортежей (вид чанка, id чанка, имя), отсортированных по релевантности.
+        """
+        with self._lock:
+            self._connect_locked()
+            if not self.fts_enabled:
+                raise RuntimeError("FTS5 is not available in this SQLite build.")
+            self._flush_locked()
+            return self.conn.execute(
+                "SELECT kind, chunk_id, name FROM search WHERE search MATCH ? ORDER BY rank LIMIT ?",
+                (query, limit)
+            ).fetchall()
+
+    def close(self):
+        """Сбрасывает буфер и закрывает соединение."""
+        with self._lock:
+            if self.conn is None:
+                return
+            self._flush_locked()
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,306 @@
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+from formatters.output_writers import atomic_open
+from utils.serializer import dumps, loads
+
+# Группа для записей без ключа группировки
+UNKNOWN_GROUP = "unknown_group"
+
+# Отступ человекопонятного JSON
+INDENT = 4
+
+
+def get_group_key(chunk, group_by):
+    """
+    Достаёт значение ключа группировки по пути через точку (например, "metadata.source").
+
+    :param chunk: Запись.
+    :param group_by: Путь к ключу.
+    :return: Значение ключа.
+    :raises KeyError: Если ключ отсутствует.
+    :raises AttributeError: Если промежуточное значение не является словарём.
+    """
+    group_key = chunk
+    for part in group_by.split('.'):
+        group_key = group_key.get(part)
+        if group_key is None:
+            raise KeyError(f"Key '{group_by}' not found in chunk.")
+    return group_key
+
+
+def resolve_group_key(chunk, group_by, missing_group=UNKNOWN_GROUP):
+    """
+    Возвращает ключ группы записи; записи без ключа попадают в missing_group с предупреждением.
+
+    :param chunk: Запись.
+    :param group_by: Путь к ключу или None.
+    :param missing_group: Группа для записей без ключа.
+    :return: Ключ группы.
+    """
+    if not group_by:
+        return missing_group
+    try:
+        return get_group_key(chunk, group_by)
+    except (KeyError, AttributeError) as e:
+        print(f"Warning: {e}. Chunk added to '{missing_group}'.")
+        return missing_group
+
+
+def _json_dict_key(key):
+    """Преобразует ключ словаря так же, как стандартный json (ключи объектов JSON — строки)."""
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, float):
+        return dumps(key)
+    return str(key)
+
+
+def indent_text(text, level):
+    """Сдвигает многострочный JSON на level уровней (строки JSON не содержат переводов строк)."""
+    return text.replace("\n", "\n" + " " * (INDENT * level))
+
+
+def render_item(item, level):
+    """
+    Форматирует запись так, как её вывел бы json.dump(..., indent=4) на уровне вложенности level.
+
+    :param item: Запись.
+    :param level: Уровень вложенности.
+    :return: Строка JSON.
+    """
+    return indent_text(dumps(item, indent=INDENT), level)
+
+
+def write_group(file, group_key, items, level, pre_rendered=False):
+    """
+    Записывает группу {"group_key": ..., "items": [...]} по одной записи, в том же виде,
+    в каком её вывел бы json.dump(..., indent=4) на уровне вложенности level.
+
+    :param file: Файл, открытый на запись в текстовом режиме.
+    :param group_key: Ключ группы.
+    :param items: Итерируемый набор записей группы.
+    :param level: Уровень вложенности группы.
+    :param pre_rendered: Записи уже отформатированы render_item(item, level + 2).
+    """
+    inner = " " * (INDENT * (level + 1))
+    item_indent = " " * (INDENT * (level + 2))
+    file.write("{\n" + inner + '"group_key": ' + dumps(group_key) + ",\n" + inner + '"items": [')
+    empty = True
+    for item in items:
+        file.write(("\n" if empty else ",\n") + item_indent + (item if pre_rendered else render_item(item, level + 2)))
+        empty = False
+    file.write("]" if empty else "\n" + inner + "]")
+    file.write("\n" + " " * (INDENT * level) + "}")
+
+
+def write_groups(output_file, groups, group_by, empty_group=UNKNOWN_GROUP, pre_rendered=False):
+    """
+    Записывает сгруппированные данные в человекопонятный JSON, по одной группе за раз.
+
+    Формат совпадает с json.dump(grouped_data, indent=4) прежней реализации:
+    при group_by — объект {ключ: {"group_key", "items"}}, без группировки — единственная группа.
+
+    :param output_file: Путь к выходному файлу.
+    :param groups: Итератор пар (ключ группы, итерируемые записи) в порядке первого появления ключа.
+    :param group_by: Ключ группировки или None.
+    :param empty_group: Имя пустой группы, которая выводится при отсутствии данных.
+    :param pre_rendered: Записи уже отформатированы (см. write_group).
+    """
+    with atomic_open(output_file) as file:
+        if not group_by:
+            # Без группировки все записи образуют одну группу, а пустые данные — пустой список
+            for group_key, items in groups:
+                write_group(file, group_key, items, 0, pre_rendered)
+                return
+            file.write("[]")
+            return
+
+        empty = True
+        for group_key, items in groups:
+            file.write(("{\n" if empty else ",\n") + " " * INDENT + dumps(_json_dict_key(group_key)) + ": ")
+            write_group(file, group_key, items, 1, pre_rendered)
+            empty = False
+        if empty:
+            file.write("{\n" + " " * INDENT + dumps(empty_group) + ": []\n}")
+        else:
+            file.write("\n}")
+
+
+def _iter_clustered_groups(records, keys):
+    """Группирует записи, у которых одинаковые ключи уже идут подряд."""
+    index = 0
+    while index < len(records):
+        group_key = keys[index]
+        end = index
+        while end < len(records) and keys[end] == group_key:
+            end += 1
+        yield group_key, (records[position] for position in range(index, end))
+        index = end
+
+
+def _iter_grouped_in_memory(records, keys):
+    """Группирует записи в памяти (хранятся только индексы записей)."""
+    positions = {}
+    for position, group_key in enumerate(keys):
+        positions.setdefault(group_key, []).append(position)
+    for group_key, group_positions in positions.items():
+        yield group_key, (records[position] for position in group_positions)
+
+
+def sort_run(lines, run_path):
+    """
+    Устойчиво сортирует строки "номер группы<TAB>данные" по номеру группы и записывает прогон.
+
+    :param lines: Список строк раздела.
+    :param run_path: Путь к файлу прогона.
+    """
+    lines.sort(key=lambda line: int(line[:line.index("\t")]))
+    with open(run_path, 'w', encoding='utf-8') as file:
+        file.writelines(lines)
+
+
+def spill_sorted_runs(ranked_lines, spill_dir, partitions, max_run_lines=None):
+    """
+    Внешняя группировка, фаза 1: раскладывает строки по разделам на диске по номеру группы
+    и сортирует каждый раздел в файлы-прогоны.
+
+    Раздел читается частями не более max_run_lines строк, каждая часть сортируется в свой прогон,
+    поэтому в памяти одновременно находится не больше max_run_lines строк — даже если одна крупная
+    группа занимает почти весь раздел. Прогоны одного раздела идут в списке в порядке частей,
+    а слияние (heapq.merge) при равных номерах групп сохраняет порядок прогонов.
+
+    :param ranked_lines: Итератор пар (номер группы, строка JSON записи) в исходном порядке.
+    :param spill_dir: Каталог временных файлов.
+    :param partitions: Количество разделов.
+    :param max_run_lines: Наибольшее количество строк в одном прогоне (None — раздел целиком).
+    :return: Список путей к отсортированным прогонам.
+    """
+    partition_paths = [os.path.join(spill_dir, f"partition_{index}.tsv") for index in range(partitions)]
+    partition_files = [open(path, 'w', encoding='utf-8') for path in partition_paths]
+    try:
+        for rank, line in ranked_lines:
+            partition_files[rank % partitions].write(f"{rank}\t{line}\n")
+    finally:
+        for partition_file in partition_files:
+            partition_file.close()
+
+    run_paths = []
+    for index, partition_path in enumerate(partition_paths):
+        with open(partition_path, 'r', encoding='utf-8') as file:
+            part = 0
+            while True:
+                lines = list(itertools.islice(file, max_run_lines))
+                if not lines:
+                    break
+                # Сортировка устойчива: записи одной группы сохраняют исходный порядок
+                run_path = os.path.join(spill_dir, f"run_{index}_{part}.tsv")
+                sort_run(lines, run_path)
+                del lines
+                run_paths.append(run_path)
+                part += 1
+        os.remove(partition_path)
+    return run_paths
+
+
+def iter_merged_groups(run_paths, group_keys, decode=loads):
+    """
+    Внешняя группировка, фаза 2: слияние отсортированных прогонов в порядке номеров групп.
+
+    :param run_paths: Пути к прогонам, отсортированным по номеру группы.
+    :param group_keys: Список ключей групп, индексированный номером группы.
+    :param decode: Функция преобразования строки прогона в элемент группы.
+    :yield: Пары (ключ группы, итератор записей группы).
+    """
+    def read_run(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                separator = line.index("\t")
+                yield int(line[:separator]), line[separator + 1:]
+
+    merged = heapq.merge(*(read_run(path) for path in run_paths), key=lambda item: item[0])
+    current = next(merged, None)
+
+    def group_items(rank):
+        nonlocal current
+        while current is not None and current[0] == rank:
+            yield decode(current[1])
+            current = next(merged, None)
+
+    while current is not None:
+        rank = current[0]
+        items = group_items(rank)
+        yield group_keys[rank], items
+        # Дочитываем группу, если потребитель не исчерпал итератор
+        for _ in items:
+            pass
+
+
+def write_grouped_json(records, output_file, group_by=None, max_records_in_memory=100000, spill_dir=None):
+    """
+    Потоково записывает записи, сгруппированные по ключу, в человекопонятный JSON.
+
+    Если записи с одинаковым ключом идут подряд (обычный случай: группировка по metadata.source),
+    группы выводятся за один проход без промежуточных структур. Иначе при небольшом объёме
+    группировка выполняется по индексам в памяти, а при объёме больше max_records_in_memory —
+    внешней группировкой через временные файлы, так что в памяти не больше max_records_in_memory
+    строк прогона.
+
+    :param records: Последовательность записей (список; читается несколько раз).
+    :param output_file: Путь к выходному файлу JSON.
+    :param group_by: Ключ группировки (например, "metadata.source") или None.
+    :param max_records_in_memory: Порог количества записей для перехода к внешней группировке.
+    :param spill_dir: Каталог для временных файлов (по умолчанию — системный).
+    """
+    if not group_by:
+        write_groups(output_file, iter([(UNKNOWN_GROUP, iter(records))]) if records else iter([]), group_by)
+        return
+
+    keys = [resolve_group_key(chunk, group_by) for chunk in records]
+
+    # Проверяем, идут ли записи одной группы подряд
+    clustered = True
+    closed = set()
+    previous = object()
+    for group_key in keys:
+        if group_key != previous:
+            if group_key in closed:
+                clustered = False
+                break
+            closed.add(previous)
+            previous = group_key
+    del closed
+
+    if clustered:
+        write_groups(output_file, _iter_clustered_groups(records, keys), group_by)
+    elif len(records) <= max_records_in_memory:
+        write_groups(output_file, _iter_grouped_in_memory(records, keys), group_by)
+    else:
+        ranks = {}
+        group_keys = []
+        for group_key in keys:
+            if group_key not in ranks:
+                ranks[group_key] = len(group_keys)
+                group_keys.append(group_key)
+
+        work_dir = tempfile.mkdtemp(prefix="grouped_json_", dir=spill_dir)
+        try:
+            partitions = -(-len(records) // max_records_in_memory)
+            run_paths = spill_sorted_runs(
+                ((ranks[group_key], dumps(chunk)) for group_key, chunk in zip(keys, records)),
+                work_dir,
+                partitions,
+                max_run_lines=max_records_in_memory
+            )
+            del keys
+            write_groups(output_file, iter_merged_groups(run_paths, group_keys), group_by)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
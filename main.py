@@ -1,12 +1,24 @@
+import argparse
+import importlib
 import os
+from collections import defaultdict
 from dotenv import load_dotenv
 from utils.logger import setup_global_logger
+from formatters.blob_store import CODE_STORAGE_MODES, BlobStore, get_blob_directory
 from formatters.json_manager import JSONManager
-from extractors.python_extractor import PythonExtractor
-from extractors.yii2_extractor import Yii2Extractor
-from extractors.react_extractor import ReactExtractor
-from extractors.bitrix_extractor import BitrixExtractor
+from formatters.shard_manifest import get_record_source
 from utils.qa_manager import QAManager
+from utils.file_manifest import FileManifest, get_manifest_path
+from utils.git_changes import diff_name_status
+from utils.journal import RunJournal, get_journal_path
+from utils.llm_estimate import LLMCostEstimate, get_estimate_report_path, set_cost_estimate
+from utils.memory_report import MemoryReporter, get_memory_report_path
+from utils.metrics import TextfileExporter, get_metrics_report_path, metrics
+from utils.pipeline import Pipeline, Stage
+from utils.profiler import RunProfiler, get_profile_paths, profile_file
+from utils.sharding import (ShardOrder, get_shard_info_path, hash_shard, iter_merged_records, load_shard_infos,
+                            parse_shard_spec, plan_size_balanced_shards)
+from utils.watcher import ChangeWatcher
 
 # Загрузка конфигурации
 load_dotenv()
@@ -18,27 +30,93 @@ PROJECT_PREFIX = os.getenv("PROJECT_PREFIX", "project")
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "5000"))
 PROJECT_TYPES = os.getenv("PROJECT_TYPES", "").split(",")  # Список типов проектов
 MAX_SUMMARY_FILE_SIZE = int(os.getenv("MAX_SUMMARY_FILE_SIZE", "1048576"))
+SUMMARY_SHARD_BALANCE = os.getenv("SUMMARY_SHARD_BALANCE", "size").strip().lower() or None  # size, records, tokens
+SUMMARY_SHARD_COUNT = int(os.getenv("SUMMARY_SHARD_COUNT") or 0) or None  # Пустое значение — не задано
 INCLUDED_FILES = os.getenv("INCLUDED_FILES", "").split(",")
 INCLUDED_FILES = [f.strip() for f in INCLUDED_FILES if f.strip()] or None
+OUTPUT_COMPRESSION = os.getenv("OUTPUT_COMPRESSION", "").strip().lower() or None  # Например, "gzip"
+COMPRESSION_BLOCK_SIZE = int(os.getenv("COMPRESSION_BLOCK_SIZE", "1048576"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+WRITE_INDEX = os.getenv("WRITE_INDEX", "true").lower() == "true"
+MAX_GROUP_RECORDS_IN_MEMORY = int(os.getenv("MAX_GROUP_RECORDS_IN_MEMORY", "100000"))
+SQLITE_EXPORT = os.getenv("SQLITE_EXPORT", "false").lower() == "true"
+SQLITE_PATH = os.getenv("SQLITE_PATH") or os.path.join(OUTPUT_DIR or "output", f"{PROJECT_PREFIX}.sqlite")
+DELTA_BASE_DIR = os.getenv("DELTA_BASE_DIR", "").strip() or None  # Выгрузка предыдущего запуска для дельты
+HASH_WORKERS = int(os.getenv("HASH_WORKERS") or 0) or os.cpu_count() or 1
+WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "2"))  # Интервал опроса в режиме наблюдения, сек.
+WATCH_DEBOUNCE = float(os.getenv("WATCH_DEBOUNCE", "1"))  # Пауза, завершающая серию изменений, сек.
+RUN_JOURNAL = os.getenv("RUN_JOURNAL", "true").lower() == "true"  # Журнал для возобновления (--resume)
+JOURNAL_SYNC_INTERVAL = float(os.getenv("JOURNAL_SYNC_INTERVAL", "5"))  # Интервал fsync журнала, сек.
+PIPELINE_ENABLED = os.getenv("PIPELINE_ENABLED", "true").lower() == "true"  # Стадии с очередями вместо цепочки вызовов
+PIPELINE_READ_WORKERS = int(os.getenv("PIPELINE_READ_WORKERS", "2"))
+PIPELINE_PARSE_WORKERS = int(os.getenv("PIPELINE_PARSE_WORKERS", "2"))
+PIPELINE_ENRICH_WORKERS = int(os.getenv("PIPELINE_ENRICH_WORKERS", "4"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "16"))
+PIPELINE_REPORT_INTERVAL = int(os.getenv("PIPELINE_REPORT_INTERVAL", "100"))  # Файлов между отчётами об очередях
+SHARD_BALANCE = os.getenv("SHARD_BALANCE", "hash").strip().lower() or "hash"  # hash или size (--shard)
+METRICS_REPORT = os.getenv("METRICS_REPORT", "true").lower() == "true"  # Отчёт {prefix}_metrics.json
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "").strip() or None  # Textfile Prometheus (.prom)
+METRICS_TEXTFILE_INTERVAL = float(os.getenv("METRICS_TEXTFILE_INTERVAL", "30"))  # Интервал обновления, сек.
+CODE_STORAGE = os.getenv("CODE_STORAGE", "inline").strip().lower() or "inline"  # inline или spans (код в блобах)
+MAX_TOKENS = int(os.getenv("MAX_TOKENS", "256"))
+LLM_PROMPT_TOKENS_PER_SECOND = float(os.getenv("LLM_PROMPT_TOKENS_PER_SECOND", "500"))  # Для оценки --dry-run
+LLM_COMPLETION_TOKENS_PER_SECOND = float(os.getenv("LLM_COMPLETION_TOKENS_PER_SECOND", "20"))
+LLM_REQUEST_OVERHEAD = float(os.getenv("LLM_REQUEST_OVERHEAD", "0.2"))  # Накладные расходы на запрос, сек.
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))  # Интервал выборки стеков (--profile), сек.
+PROFILE_SORT = os.getenv("PROFILE_SORT", "cumulative").strip() or "cumulative"  # Сортировка отчёта pstats
+PROFILE_LIMIT = int(os.getenv("PROFILE_LIMIT", "80"))  # Строк функций в отчёте
+MEMORY_REPORT_TOP = int(os.getenv("MEMORY_REPORT_TOP", "20"))  # Мест выделения памяти в снимке (--memory-report)
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "1"))  # Глубина стека выделений tracemalloc
 
 # Настройка глобального логгера
-logger = setup_global_logger(PROJECT_PREFIX)
+logger = setup_global_logger(PROJECT_PREFIX, subsystem="main")
 
-# Создаем экземпляр JSONManager
-json_manager = JSONManager(output_directory=OUTPUT_DIR, project_prefix=PROJECT_PREFIX)
+# Экземпляр JSONManager создаётся при первом обращении (get_json_manager): импорт модуля
+# не создаёт директорию вывода и не требует OUTPUT_DIR
+_json_manager = None
 
+# Отчёт о памяти запуска (--memory-report)
+memory_reporter = None
 
-def clear_output_directory(output_dir):
+
+def get_json_manager():
+    """
+    Возвращает общий экземпляр JSONManager, создавая его при первом обращении.
+
+    :return: JSONManager.
+    """
+    global _json_manager
+    if _json_manager is None:
+        _json_manager = JSONManager(
+            output_directory=OUTPUT_DIR,
+            project_prefix=PROJECT_PREFIX,
+            compression=OUTPUT_COMPRESSION,
+            compression_block_size=COMPRESSION_BLOCK_SIZE,
+            compression_level=COMPRESSION_LEVEL,
+            write_index=WRITE_INDEX,
+            sqlite_path=SQLITE_PATH if SQLITE_EXPORT else None,
+            max_group_records_in_memory=MAX_GROUP_RECORDS_IN_MEMORY,
+            blob_store=BlobStore(get_blob_directory(OUTPUT_DIR, PROJECT_PREFIX), SOURCE_DIR)
+            if CODE_STORAGE == "spans" else None
+        )
+    return _json_manager
+
+
+def clear_output_directory(output_dir, keep=()):
     """
-    Удаляет все файлы с расширением .json и .jsonl в указанной директории.
+    Удаляет все файлы с расширением .json, .jsonl, .jsonl.gz и индексы .idx в указанной директории.
 
     :param output_dir: Путь к директории для очистки.
+    :param keep: Пути файлов, которые не удаляются (например, журнал возобновляемого запуска).
     """
     logger.info(f"Очистка директории вывода: {output_dir}")
+    keep = {os.path.abspath(path) for path in keep}
     for root, dirs, files in os.walk(output_dir):
         for file in files:
-            if file.endswith(".json") or file.endswith(".jsonl"):
+            if file.endswith((".json", ".jsonl", ".jsonl.gz", ".idx")):
                 file_path = os.path.join(root, file)
+                if os.path.abspath(file_path) in keep:
+                    continue
                 try:
                     os.remove(file_path)
                     logger.info(f"Удален файл: {file_path}")
@@ -46,93 +124,766 @@ def clear_output_directory(output_dir):
                     logger.error(f"Не удалось удалить файл {file_path}: {e}")
 
 
-def process_project():
+# Обработчики по типам проектов: (тип, название для журнала, класс). Модули обработчиков (и их парсеров)
+# импортируются только для типов из PROJECT_TYPES
+EXTRACTORS = [
+    ("python", "Python", "extractors.python_extractor.PythonExtractor"),
+    ("yii2", "Yii2", "extractors.yii2_extractor.Yii2Extractor"),
+    ("react", "React", "extractors.react_extractor.ReactExtractor"),
+    ("bitrix", "Bitrix", "extractors.bitrix_extractor.BitrixExtractor"),
+    # Здесь можно добавить обработку других типов проектов:
+    # ("laravel", "Laravel", "extractors.laravel_extractor.LaravelExtractor"),
+]
+
+
+def load_extractor_class(path):
     """
-    Выполняет обработку проекта, основываясь на типах проектов.
+    Импортирует класс обработчика.
+
+    :param path: Полное имя класса ("extractors.python_extractor.PythonExtractor").
+    :return: Класс.
     """
-    if "python" in PROJECT_TYPES:
-        logger.info("Обработка Python файлов...")
-        python_extractor = PythonExtractor(
-            project_root=SOURCE_DIR,
-            output_dir=OUTPUT_DIR,
-            prefix=PROJECT_PREFIX,
-            json_manager=json_manager,
-            chunk_size=CHUNK_SIZE,
-            excluded_dirs=EXCLUDED_DIRS,
-            included_files=INCLUDED_FILES
-        )
-        python_extractor.extract()
-        logger.info("Обработка Python завершена.")
+    module_name, _, class_name = path.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)
+
 
-    if "yii2" in PROJECT_TYPES:
-        logger.info("Обработка Yii2 файлов...")
-        yii2_extractor = Yii2Extractor(
+def create_extractors():
+    """
+    Создаёт обработчики для типов проектов из PROJECT_TYPES.
+
+    :return: Список пар (название для журнала, обработчик).
+    """
+    return [
+        (title, load_extractor_class(extractor_class)(
             project_root=SOURCE_DIR,
             output_dir=OUTPUT_DIR,
             prefix=PROJECT_PREFIX,
-            json_manager=json_manager,
+            json_manager=get_json_manager(),
             chunk_size=CHUNK_SIZE,
             excluded_dirs=EXCLUDED_DIRS,
             included_files=INCLUDED_FILES
+        ))
+        for project_type, title, extractor_class in EXTRACTORS
+        if project_type in PROJECT_TYPES
+    ]
+
+
+def memory_checkpoint(stage, with_records=True):
+    """
+    Делает снимок памяти на границе стадии, если включён --memory-report.
+
+    :param stage: Название стадии (например, "extractor:Python").
+    :param with_records: Подсчитать объём записей JSONManager и счётчики QAManager (не из потоков конвейера,
+                         которые в это время добавляют записи).
+    """
+    if memory_reporter is not None:
+        if with_records:
+            memory_reporter.checkpoint(stage, get_json_manager(), QAManager())
+        else:
+            memory_reporter.checkpoint(stage)
+
+
+def process_project(extractors):
+    """
+    Выполняет обработку проекта, основываясь на типах проектов.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    """
+    if PIPELINE_ENABLED:
+        process_project_pipeline(extractors)
+        return
+
+    for title, extractor in extractors:
+        logger.info(f"Обработка {title} файлов...")
+        extractor.extract()
+        logger.info(f"Обработка {title} завершена.")
+        memory_checkpoint(f"extractor:{title}")
+
+
+def file_stage(step):
+    """
+    Оборачивает шаг обработки файла для стадии конвейера: ошибка файла записывается в журнал,
+    а файл отбрасывается, как при последовательной обработке.
+
+    :param step: Функция (задача) -> задача.
+    :return: Функция стадии.
+    """
+    def run(task):
+        try:
+            with profile_file(task["relative_path"]):
+                return step(task)
+        except Exception as e:
+            logger.error(f"Ошибка обработки файла {task['file_path']}: {e}")
+            metrics.record_error(e, "process_file")
+            return None
+    return run
+
+
+def read_step(task):
+    """
+    Стадия чтения: содержимое файла для разбора и обогащения.
+    """
+    task["content"] = task["extractor"].read_source(task["file_path"])
+    return task
+
+
+def parse_step(task):
+    """
+    Стадия разбора: структура файла без обращений к LLM.
+    """
+    task["records"] = task["extractor"].parse_structure(task["file_path"], task["content"])
+    return task
+
+
+def enrich_step(task):
+    """
+    Стадия обогащения: описания и QA от LLM.
+    """
+    # QA регистрируется при записи, чтобы порядок глобального QA не зависел от числа потоков
+    task["extractor"].enrich_records(task["records"], task["content"], register_qa=False)
+    task["content"] = None
+    return task
+
+
+def process_project_pipeline(extractors, dry_run=False):
+    """
+    Обработка проекта конвейером: обход -> чтение -> разбор -> обогащение LLM -> запись.
+    Стадии связаны ограниченными очередями и работают в своих потоках, поэтому медленная LLM
+    притормаживает чтение и разбор, а не накапливает файлы в памяти. Записи добавляются
+    в JSONManager в порядке обхода, поэтому выгрузка совпадает с последовательной обработкой.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :param dry_run: Пробный запуск: записи только подсчитываются и не добавляются в JSONManager.
+    :return: Количество записанных файлов.
+    """
+    def discover():
+        for title, extractor in extractors:
+            logger.info(f"Обработка {title} файлов...")
+            for file_path, directory_type in extractor.iter_discovered_files():
+                if not extractor.should_process(file_path):
+                    continue
+                yield {
+                    "title": title,
+                    "extractor": extractor,
+                    "file_path": file_path,
+                    "directory_type": directory_type,
+                    "relative_path": os.path.relpath(file_path, extractor.project_root),
+                    "content": None,
+                    "records": None,
+                }
+        memory_checkpoint("discovery", with_records=False)
+
+    pipeline = Pipeline([
+        Stage("read", file_stage(read_step), PIPELINE_READ_WORKERS, PIPELINE_QUEUE_SIZE),
+        Stage("parse", file_stage(parse_step), PIPELINE_PARSE_WORKERS, PIPELINE_QUEUE_SIZE),
+        Stage("enrich", file_stage(enrich_step), PIPELINE_ENRICH_WORKERS, PIPELINE_QUEUE_SIZE),
+    ], output_queue_size=PIPELINE_QUEUE_SIZE)
+
+    qa_manager = QAManager()
+    written = [0]
+    current_title = [None]
+
+    def write(task):
+        # Записи приходят в порядке обхода: первая запись следующего обработчика завершает предыдущий
+        if task["title"] != current_title[0]:
+            if current_title[0] is not None:
+                memory_checkpoint(f"extractor:{current_title[0]}")
+            current_title[0] = task["title"]
+        extractor, records = task["extractor"], task["records"]
+        if not records or not isinstance(records, list):
+            logger.warning(f"Некорректный формат данных от парсера для файла {task['file_path']}. Пропуск.")
+            return
+        if not dry_run:
+            extractor.add_chunks(extractor.get_scope(task["directory_type"]), records)
+            for entry in records:
+                add_record_qa(qa_manager, entry)
+            if extractor.journal is not None:
+                extractor.journal.mark_completed(task["relative_path"])
+
+        written[0] += 1
+        if PIPELINE_REPORT_INTERVAL and written[0] % PIPELINE_REPORT_INTERVAL == 0:
+            depths = ", ".join(
+                f"{name}={metrics['queue_depth']}" for name, metrics in pipeline.get_metrics().items()
+                if "queue_depth" in metrics
+            )
+            logger.info(f"Конвейер: записано файлов {written[0]}, очереди: {depths}")
+
+    pipeline.run(discover(), write)
+    if current_title[0] is not None:
+        memory_checkpoint(f"extractor:{current_title[0]}")
+
+    for name, metrics in pipeline.get_metrics().items():
+        logger.info(f"Стадия {name}: {metrics}")
+    return written[0]
+
+
+def process_project_journaled(extractors, resume=False):
+    """
+    Полная обработка проекта с журналом запуска. Записи каждого обработанного файла дописываются
+    в {prefix}_journal.jsonl; при возобновлении записи завершённых файлов восстанавливаются
+    из журнала, а сами файлы не обрабатываются повторно.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :param resume: Продолжить прерванный запуск по существующему журналу.
+    :return: RunJournal (удаляется после успешного сохранения выгрузки).
+    """
+    journal_path = get_journal_path(OUTPUT_DIR, PROJECT_PREFIX)
+    journal = RunJournal(journal_path, sync_interval=JOURNAL_SYNC_INTERVAL)
+    if resume:
+        records = journal.replay()
+        qa_manager = QAManager()
+        for scope, entry in records:
+            get_json_manager().add_data(scope, entry)
+            add_record_qa(qa_manager, entry)
+        logger.info(
+            f"Возобновление: восстановлено записей {len(records)} "
+            f"по {len(journal.resumed_files)} обработанным файлам."
         )
-        yii2_extractor.extract()
-        logger.info("Обработка Yii2 завершена.")
 
-    if "react" in PROJECT_TYPES:
-        logger.info("Обработка React файлов...")
-        react_extractor = ReactExtractor(
-            project_root=SOURCE_DIR,
-            output_dir=OUTPUT_DIR,
-            prefix=PROJECT_PREFIX,
-            json_manager=json_manager,
-            chunk_size=CHUNK_SIZE,
-            excluded_dirs=EXCLUDED_DIRS,
-            included_files=INCLUDED_FILES
+    clear_output_directory(OUTPUT_DIR, keep=[journal_path])
+    journal.open(append=resume)
+    get_json_manager().add_sink(journal)
+    for _, extractor in extractors:
+        extractor.journal = journal
+    process_project(extractors)
+    return journal
+
+
+def setup_shard(extractors, spec):
+    """
+    Настраивает обработку одного шарда (--shard i/N): файлы проекта детерминированно делятся
+    между N хостами по стабильному хэшу пути (SHARD_BALANCE=hash) или по размеру (SHARD_BALANCE=size),
+    обработчики получают фильтр файлов шарда. Каждый хост должен видеть одно и то же дерево файлов.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :param spec: Номер шарда в формате "i/N".
+    :return: ShardOrder, подключённый к JSONManager (сохраняется после выгрузки).
+    """
+    index, count = parse_shard_spec(spec)
+    if SHARD_BALANCE not in ("hash", "size"):
+        raise ValueError(f"Unsupported SHARD_BALANCE '{SHARD_BALANCE}'. Use 'hash' or 'size'.")
+
+    # Общий порядок обхода нужен merge для восстановления порядка записей
+    positions = defaultdict(list)
+    position = 0
+    for _, extractor in extractors:
+        for file_path, _ in extractor.iter_files():
+            positions[os.path.relpath(file_path, SOURCE_DIR)].append(position)
+            position += 1
+
+    if SHARD_BALANCE == "size":
+        assignment = plan_size_balanced_shards(
+            {path: os.path.getsize(os.path.join(SOURCE_DIR, path)) for path in positions}, count
         )
-        react_extractor.extract()
-        logger.info("Обработка React завершена.")
+        owns = lambda relative_path: assignment.get(relative_path) == index
+    else:
+        owns = lambda relative_path: hash_shard(relative_path, count) == index
 
-    if "bitrix" in PROJECT_TYPES:
-        logger.info("Обработка Bitrix файлов...")
-        bitrix_extractor = BitrixExtractor(
-            project_root=SOURCE_DIR,
-            output_dir=OUTPUT_DIR,
-            prefix=PROJECT_PREFIX,
-            json_manager=json_manager,
-            chunk_size=CHUNK_SIZE,
-            excluded_dirs=EXCLUDED_DIRS,
-            included_files=INCLUDED_FILES
+    own_positions = {path: occurrences for path, occurrences in positions.items() if owns(path)}
+    logger.info(f"Шард {index + 1}/{count} ({SHARD_BALANCE}): файлов {len(own_positions)} из {len(positions)}.")
+    for _, extractor in extractors:
+        extractor.file_filter = owns
+
+    shard_order = ShardOrder(index, count, SHARD_BALANCE, own_positions)
+    get_json_manager().add_sink(shard_order)
+    return shard_order
+
+
+def merge_shards(shard_dirs):
+    """
+    Объединяет выгрузки шардов в OUTPUT_DIR: записи областей — в порядке обработки на одном хосте,
+    глобальный QA собирается из записей, манифесты файлов объединяются.
+
+    :param shard_dirs: Каталоги вывода всех шардов одного разбиения.
+    :return: Объединённый FileManifest.
+    """
+    if any(os.path.abspath(shard_dir) == os.path.abspath(OUTPUT_DIR) for shard_dir in shard_dirs):
+        raise ValueError("Merge output directory must differ from the shard directories.")
+    load_shard_infos(shard_dirs, PROJECT_PREFIX)  # Проверка полноты набора до очистки вывода
+
+    json_manager = get_json_manager()
+    clear_output_directory(OUTPUT_DIR)
+    if json_manager.blob_store is not None:
+        # Записи шардов ссылаются на блобы в каталогах шардов
+        for shard_dir in shard_dirs:
+            json_manager.blob_store.import_from(get_blob_directory(shard_dir, PROJECT_PREFIX))
+
+    qa_manager = QAManager()
+    merged = 0
+    for scope, entry in iter_merged_records(shard_dirs, PROJECT_PREFIX):
+        json_manager.add_data(scope, entry)
+        add_record_qa(qa_manager, entry)
+        merged += 1
+    logger.info(f"Объединено записей из {len(shard_dirs)} шардов: {merged}")
+
+    files = {}
+    for shard_dir in shard_dirs:
+        files.update(FileManifest.load(get_manifest_path(shard_dir, PROJECT_PREFIX)).files)
+    return FileManifest(files)
+
+
+def list_project_files(extractors):
+    """
+    Перечисляет файлы проекта, которые обрабатывает каждый обработчик.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :return: Список кортежей (название, обработчик, отсортированные относительные пути).
+    """
+    return [
+        (title, extractor, sorted({os.path.relpath(file_path, SOURCE_DIR) for file_path, _ in extractor.iter_files()}))
+        for title, extractor in extractors
+    ]
+
+
+def carry_forward_records(previous_manifest, unchanged, removed_ids=None):
+    """
+    Переносит записи неизменённых файлов из предыдущей выгрузки в JSONManager,
+    а ответы QA их классов — в QAManager. Записи удалённых и изменённых файлов не переносятся.
+
+    :param previous_manifest: Манифест предыдущего запуска.
+    :param unchanged: Множество относительных путей неизменённых файлов.
+    :param removed_ids: Словарь {путь: список ID}; для его путей собираются ID отброшенных записей.
+    :return: Количество перенесённых записей.
+    """
+    json_manager = get_json_manager()
+    qa_manager = QAManager()
+    carried = 0
+    for scope in sorted(previous_manifest.get_scopes()):
+        for entry in json_manager.iter_saved_records(scope):
+            source = (entry.get("metadata") or {}).get("source")
+            if source not in unchanged:
+                if removed_ids is not None and source in removed_ids:
+                    removed_ids[source].append(entry.get("id"))
+                continue
+            json_manager.add_data(scope, entry)
+            carried += 1
+            add_record_qa(qa_manager, entry)
+    return carried
+
+
+def iter_record_qa(entry):
+    """
+    Перечисляет вопросы и ответы, сохранённые в классах записи.
+
+    :param entry: Запись файла.
+    :return: Итератор пар (вопрос, ответ).
+    """
+    for chunk in entry.get("chunks") or []:
+        for qa_entry in chunk.get("qa") or []:
+            yield qa_entry.get("question"), qa_entry.get("answer")
+
+
+def add_record_qa(qa_manager, entry):
+    """
+    Добавляет в QAManager вопросы и ответы, сохранённые в классах записи.
+
+    :param qa_manager: QAManager.
+    :param entry: Запись файла.
+    """
+    for question, answer in iter_record_qa(entry):
+        qa_manager.add_qa(question, answer)
+
+
+def process_incremental(extractors, manifest_path):
+    """
+    Инкрементальная обработка: повторно разбираются только добавленные и изменённые файлы,
+    записи неизменённых файлов переносятся из предыдущей выгрузки, записи удалённых — отбрасываются.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :param manifest_path: Путь к манифесту файлов.
+    :return: Состояние файлов (см. FileManifest.scan).
+    """
+    previous_manifest = FileManifest.load(manifest_path)
+    project_files = list_project_files(extractors)
+    all_files = {path for _, _, files in project_files for path in files}
+
+    state, added, changed, unchanged, removed = previous_manifest.scan(SOURCE_DIR, all_files, workers=HASH_WORKERS)
+    logger.info(
+        f"Инкрементальный режим: добавлено {len(added)}, изменено {len(changed)}, "
+        f"без изменений {len(unchanged)}, удалено {len(removed)}."
+    )
+
+    # Предыдущие записи читаются до очистки каталога вывода
+    carried = carry_forward_records(previous_manifest, set(unchanged))
+    logger.info(f"Перенесено записей из предыдущей выгрузки: {carried}")
+    clear_output_directory(OUTPUT_DIR)
+
+    to_process = set(added) | set(changed)
+    for title, extractor, files in project_files:
+        files = [path for path in files if path in to_process]
+        if files:
+            logger.info(f"Обработка {title} файлов: {len(files)} изменено...")
+            extractor.extract_files(files)
+            logger.info(f"Обработка {title} завершена.")
+    return state
+
+
+def process_since(extractors, manifest_path, revision):
+    """
+    Обработка файлов, изменённых относительно ревизии git (git diff --name-status -M).
+    Добавленные и изменённые файлы разбираются заново, записи переименованных файлов переходят
+    к новому пути, записи удалённых отбрасываются и попадают в {prefix}_tombstones.jsonl.
+    Записи остальных файлов переносятся из предыдущей выгрузки.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :param manifest_path: Путь к манифесту файлов.
+    :param revision: Ревизия, с которой сравнивается рабочее дерево SOURCE_DIR.
+    :return: Состояние файлов (см. FileManifest.scan) или None, если предыдущей выгрузки нет.
+    """
+    previous_manifest = FileManifest.load(manifest_path)
+    if not len(previous_manifest):
+        logger.warning("Манифест предыдущей выгрузки не найден, выполняется полная обработка.")
+        return None
+
+    changes = diff_name_status(SOURCE_DIR, revision)
+    removed = changes.get_removed_sources() & set(previous_manifest.files)
+    to_process = {
+        path for path in changes.get_sources_to_process()
+        if os.path.isfile(os.path.join(SOURCE_DIR, path))
+        and any(extractor.accepts_file(os.path.abspath(os.path.join(SOURCE_DIR, path))) for _, extractor in extractors)
+    }
+    logger.info(
+        f"Изменения относительно {revision}: изменено {len(changes.modified)}, переименовано {len(changes.renamed)}, "
+        f"удалено {len(changes.deleted)}; к обработке {len(to_process)}."
+    )
+
+    # Предыдущие записи читаются до очистки каталога вывода
+    unchanged = set(previous_manifest.files) - to_process - removed
+    removed_ids = {path: [] for path in removed}
+    carried = carry_forward_records(previous_manifest, unchanged, removed_ids)
+    logger.info(f"Перенесено записей из предыдущей выгрузки: {carried}")
+    clear_output_directory(OUTPUT_DIR)
+
+    for title, extractor in extractors:
+        files = sorted(
+            path for path in to_process
+            if extractor.accepts_file(os.path.abspath(os.path.join(SOURCE_DIR, path)))
         )
-        bitrix_extractor.extract()
-        logger.info("Обработка Bitrix завершена.")
+        if files:
+            logger.info(f"Обработка {title} файлов: {len(files)} изменено...")
+            extractor.extract_files(files)
+            logger.info(f"Обработка {title} завершена.")
 
-    # Здесь можно добавить обработку других типов проектов:
-    # if "laravel" in PROJECT_TYPES:
-    #     logger.info("Обработка Laravel файлов...")
-    #     laravel_extractor = LaravelExtractor(SOURCE_DIR, OUTPUT_DIR, PROJECT_PREFIX, json_manager, CHUNK_SIZE, EXCLUDED_DIRS)
-    #     laravel_extractor.extract()
-    #     logger.info("Обработка Laravel завершена.")
+    get_json_manager().save_tombstones([
+        {
+            "source": path,
+            "status": "renamed" if path in changes.renamed else "deleted",
+            "renamed_to": changes.renamed.get(path),
+            "ids": removed_ids[path],
+            "scopes": previous_manifest.files[path].get("scopes", []),
+            "revision": revision,
+        }
+        for path in sorted(removed)
+    ])
+
+    state = {path: previous_manifest.files[path] for path in unchanged}
+    state.update(FileManifest().scan(SOURCE_DIR, to_process, workers=HASH_WORKERS)[0])
+    return state
+
+
+def save_outputs(scopes=None):
+    """
+    Сохраняет выгрузку: области и summary, дельту и глобальный QA.
+
+    :param scopes: Области для перезаписи (None — все; см. JSONManager.save_all).
+    """
+    memory_checkpoint("before_save_all")
+    get_json_manager().save_all(
+        group_by="metadata.source",
+        max_summary_file_size=MAX_SUMMARY_FILE_SIZE,
+        shard_balance=SUMMARY_SHARD_BALANCE,
+        shard_count=SUMMARY_SHARD_COUNT,
+        scopes=scopes
+    )
+    if DELTA_BASE_DIR and scopes is None:
+        logger.info(f"Сохранение дельты относительно {DELTA_BASE_DIR}...")
+        get_json_manager().save_deltas(DELTA_BASE_DIR)
+    QAManager().save_to_jsonl()
+    memory_checkpoint("after_save_all")
+
+
+def apply_changes(extractors, changed, state):
+    """
+    Обновляет выгрузку по изменённым файлам: записи файлов удаляются, существующие файлы
+    разбираются заново через process_file обработчиков, затронутые области и summary перезаписываются.
+    Из глобального QA убираются только пары прежних записей этих файлов.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :param changed: Относительные пути добавленных, изменённых и удалённых файлов.
+    :param state: Состояние файлов для манифеста (обновляется на месте).
+    :return: Множество перезаписанных областей.
+    """
+    json_manager = get_json_manager()
+    # Пары QA прежних записей изменённых файлов убираются после разбора: совпадающие с новыми остаются
+    removed_qa = [
+        pair
+        for scope in list(json_manager.data)
+        for entry in json_manager.get_data(scope)
+        if get_record_source(entry) in changed
+        for pair in iter_record_qa(entry)
+    ]
+    affected = set()
+    existing = []
+    for relative_path in sorted(changed):
+        affected |= json_manager.remove_source(relative_path)
+        file_path = os.path.join(SOURCE_DIR, relative_path)
+        if not os.path.isfile(file_path):
+            logger.info(f"Файл удалён: {relative_path}")
+            state.pop(relative_path, None)
+            continue
+        existing.append(relative_path)
+        for _, extractor in extractors:
+            if extractor.accepts_file(os.path.abspath(file_path)):
+                with profile_file(relative_path):
+                    extractor.process_file(file_path, extractor.detect_directory_type(os.path.dirname(file_path)))
+
+    state.update(FileManifest().scan(SOURCE_DIR, existing, workers=HASH_WORKERS)[0])
+    source_scopes = json_manager.get_source_scopes()
+    for relative_path in existing:
+        affected |= source_scopes.get(relative_path, set())
+
+    # Новые пары добавлены при разборе, из глобального списка убираются только пары прежних записей
+    QAManager().remove_qa(removed_qa)
+
+    if affected:
+        save_outputs(scopes=affected)
+    return affected
+
+
+def watch_project(extractors, manifest_path):
+    """
+    Режим наблюдения: после инкрементальной синхронизации следит за изменениями под SOURCE_DIR
+    и обновляет только затронутые записи, области и summary. Процессы парсеров (PERSISTENT_PARSERS)
+    и соединение с LLM остаются открытыми между изменениями. Останавливается по Ctrl+C.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :param manifest_path: Путь к манифесту файлов.
+    """
+    state = process_incremental(extractors, manifest_path)
+    save_outputs()
+    FileManifest.build(state, get_json_manager().get_source_scopes()).save(manifest_path)
+
+    watcher = ChangeWatcher(
+        SOURCE_DIR,
+        accepts_file=lambda path: any(extractor.accepts_file(path) for _, extractor in extractors),
+        is_excluded_dir=lambda path: all(extractor.is_excluded(path) for _, extractor in extractors),
+        interval=WATCH_INTERVAL,
+        debounce=WATCH_DEBOUNCE
+    )
+    logger.info(f"Наблюдение за {SOURCE_DIR} ({watcher.mode}). Для остановки нажмите Ctrl+C.")
+    try:
+        while True:
+            changed = watcher.wait_for_changes()
+            logger.info(f"Изменено файлов: {len(changed)}")
+            affected = apply_changes(extractors, changed, state)
+            FileManifest.build(state, get_json_manager().get_source_scopes()).save(manifest_path)
+            logger.info(f"Обновлены области: {', '.join(sorted(affected)) or 'нет'}")
+    except KeyboardInterrupt:
+        logger.info("Наблюдение остановлено.")
+    finally:
+        watcher.close()
+
+
+def estimate_project(extractors):
+    """
+    Пробный запуск (--dry-run): обход и разбор проекта без обращений к LLM. Подсчитывает запросы
+    describe_* и QA классов, которые выполнил бы обычный запуск с текущими настройками, их токены
+    и попадания в кэш запросов, и оценивает время по LLM_*_TOKENS_PER_SECOND. Выгрузка не изменяется,
+    отчёт сохраняется в {prefix}_dry_run.json.
+
+    :param extractors: Список пар (название для журнала, обработчик).
+    :return: Отчёт оценки (словарь).
+    """
+    estimate = LLMCostEstimate(MAX_TOKENS, LLM_PROMPT_TOKENS_PER_SECOND, LLM_COMPLETION_TOKENS_PER_SECOND,
+                               LLM_REQUEST_OVERHEAD)
+    set_cost_estimate(estimate)
+    try:
+        files = process_project_pipeline(extractors, dry_run=True)
+    finally:
+        set_cost_estimate(None)
+
+    report_path = get_estimate_report_path(OUTPUT_DIR, PROJECT_PREFIX)
+    # Файлы с ошибками (например, пустые) отбрасываются так же, как при обычном запуске
+    estimate.save_report(report_path, extra={"files": files, "errors": metrics.total("errors_total")})
+    report = estimate.get_report()
+    totals = report["totals"]
+    for kind, counters in report["requests_by_kind"].items():
+        logger.info(f"Запросы {kind}: {counters}")
+    logger.info(
+        f"Оценка: файлов {files}, запросов {totals['requests']} (в кэше {totals['cached']}, "
+        f"к выполнению {totals['uncached']}), токенов запроса к выполнению {totals['uncached_prompt_tokens']}, "
+        f"токенов ответа ~{totals['completion_tokens']}, время ~{report['estimated_seconds'] / 3600:.2f} ч "
+        f"(не более {report['estimated_seconds_upper_bound'] / 3600:.2f} ч). Отчёт: {report_path}"
+    )
+    return report
+
+
+def save_metrics_report():
+    """
+    Сохраняет отчёт метрик запуска {prefix}_metrics.json со сводкой: количество файлов и записей,
+    пропускная способность, доля попаданий в кэш запросов LLM, объём выгрузки.
+    """
+    elapsed = max(metrics.get_report()["elapsed_seconds"], 1e-9)
+    files = metrics.total("discovery_items_total")
+    records = metrics.total("records_added_total")
+    cache_hits = metrics.get_counter("query_cache_lookups_total", result="hit")
+    cache_lookups = metrics.total("query_cache_lookups_total")
+    summary = {
+        "files_discovered": files,
+        "records_added": records,
+        "bytes_written": metrics.total("bytes_written_total"),
+        "files_per_second": round(files / elapsed, 3),
+        "records_per_second": round(records / elapsed, 3),
+        "llm_requests": metrics.total("llm_requests_total"),
+        "llm_cache_hit_rate": round(cache_hits / cache_lookups, 4) if cache_lookups else None,
+        "errors": metrics.total("errors_total"),
+    }
+    report_path = get_metrics_report_path(OUTPUT_DIR, PROJECT_PREFIX)
+    metrics.save_report(report_path, extra={"summary": summary})
+    logger.info(f"Отчёт метрик: {report_path} {summary}")
+
+
+def parse_args():
+    """
+    Разбирает аргументы командной строки.
+    """
+    parser = argparse.ArgumentParser(description="Выгрузка исходного кода проекта в JSON/JSONL.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Обрабатывать только добавленные и изменённые файлы по манифесту предыдущего запуска.")
+    parser.add_argument("--watch", action="store_true",
+                        help="После синхронизации следить за изменениями файлов и обновлять выгрузку.")
+    parser.add_argument("--since", metavar="REV",
+                        help="Обрабатывать только файлы, изменённые относительно ревизии git (с учётом "
+                             "переименований и удалений); остальные записи переносятся из предыдущей выгрузки.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Продолжить прерванную полную обработку по журналу запуска: обработанные файлы "
+                             "не разбираются повторно, их записи восстанавливаются из журнала.")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Обработать только i-й из N детерминированных шардов файлов проекта (см. SHARD_BALANCE).")
+    parser.add_argument("--merge", nargs="+", metavar="SHARD_DIR",
+                        help="Объединить выгрузки всех шардов в OUTPUT_DIR так, как при обработке на одном хосте.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Обойти и разобрать проект без обращений к LLM и оценить количество запросов, "
+                             "токены, попадания в кэш и время обработки. Выгрузка не изменяется.")
+    parser.add_argument("--profile", nargs="?", type=float, const=1.0, metavar="RATE",
+                        help="Профилировать запуск (cProfile и выборка стеков): весь запуск или детерминированную "
+                             "долю файлов RATE (например, 0.1). Отчёт, свёрнутые стеки и статистика сохраняются "
+                             "в {prefix}_profile.txt, .collapsed и .prof.")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="Снимки памяти tracemalloc на границах стадий: RSS, крупнейшие места выделения памяти "
+                             "объём записей по областям и счётчики QAManager. Отчёт сохраняется в {prefix}_memory.json "
+                             "(режим заметно замедляет работу).")
+    args = parser.parse_args()
+    if args.profile is not None and not 0 < args.profile <= 1:
+        parser.error("--profile RATE must be in (0, 1].")
+    if args.dry_run and (args.incremental or args.since or args.watch or args.resume or args.merge):
+        parser.error("--dry-run cannot be combined with --incremental, --since, --watch, --resume or --merge.")
+    if (args.shard or args.merge) and (args.incremental or args.since or args.watch):
+        parser.error("--shard and --merge cannot be combined with --incremental, --since or --watch.")
+    if args.shard and args.merge:
+        parser.error("--shard and --merge cannot be combined.")
+    return args
 
 
 def main():
+    global memory_reporter
+    args = parse_args()
+    if CODE_STORAGE not in CODE_STORAGE_MODES:
+        raise ValueError(f"Unsupported CODE_STORAGE '{CODE_STORAGE}'. Available: {', '.join(CODE_STORAGE_MODES)}.")
     logger.info("Начало обработки проекта...")
+    if args.memory_report:
+        memory_reporter = MemoryReporter(top=MEMORY_REPORT_TOP, frames=MEMORY_TRACE_FRAMES)
+        memory_reporter.start()
+        memory_checkpoint("start")
+    profiler = None
+    if args.profile is not None:
+        profiler = RunProfiler(sample_rate=args.profile, interval=PROFILE_INTERVAL)
+        profiler.start()
+    textfile_exporter = None
+    if METRICS_TEXTFILE:
+        textfile_exporter = TextfileExporter(metrics, METRICS_TEXTFILE, METRICS_TEXTFILE_INTERVAL)
+        textfile_exporter.start()
     try:
-        # Очистка директории вывода
-        clear_output_directory(OUTPUT_DIR)
+        extractors = create_extractors()
+        json_manager = get_json_manager()
+        manifest_path = get_manifest_path(OUTPUT_DIR, PROJECT_PREFIX)
+
+        if args.dry_run:
+            if args.shard:
+                setup_shard(extractors, args.shard)
+            estimate_project(extractors)
+            logger.info("Пробный запуск завершён.")
+            return
+
+        if args.watch:
+            watch_project(extractors, manifest_path)
+            json_manager.close()
+            logger.info("Обработка завершена успешно.")
+            return
 
-        # Обработка проекта на основе типов
-        process_project()
+        if args.merge:
+            manifest = merge_shards(args.merge)
+            logger.info("Сохранение объединённых данных...")
+            save_outputs()
+            json_manager.close()
+            manifest.save(manifest_path)
+            logger.info("Обработка завершена успешно.")
+            return
+
+        state = None
+        journal = None
+        shard_order = setup_shard(extractors, args.shard) if args.shard else None
+        if args.since:
+            state = process_since(extractors, manifest_path, args.since)
+        elif args.incremental:
+            state = process_incremental(extractors, manifest_path)
+
+        if state is None:
+            if RUN_JOURNAL or args.resume:
+                # Очистка директории вывода и обработка с журналом для возобновления
+                journal = process_project_journaled(extractors, resume=args.resume)
+            else:
+                # Очистка директории вывода
+                clear_output_directory(OUTPUT_DIR)
+
+                # Обработка проекта на основе типов
+                process_project(extractors)
+
+            # Состояние обработанных файлов для следующего инкрементального запуска
+            state = FileManifest().scan(SOURCE_DIR, json_manager.get_source_scopes().keys(), workers=HASH_WORKERS)[0]
 
         # Сохранение всех данных
         logger.info("Сохранение всех данных...")
-        json_manager.save_all(group_by="metadata.source", max_summary_file_size=MAX_SUMMARY_FILE_SIZE)
-        qa_manager = QAManager()
-        qa_manager.save_to_jsonl()
+        save_outputs()
+        json_manager.close()
+        FileManifest.build(state, json_manager.get_source_scopes()).save(manifest_path)
+        if shard_order is not None:
+            shard_order.save(get_shard_info_path(OUTPUT_DIR, PROJECT_PREFIX))
+        if journal is not None:
+            journal.remove()  # Выгрузка сохранена, журнал больше не нужен
         logger.info("Все данные успешно сохранены.")
 
     except Exception as e:
         logger.error(f"Ошибка обработки: {e}")
+        metrics.record_error(e, "run")
         raise
+    finally:
+        # Метрики сохраняются и для прерванного запуска: видно, на чём он остановился
+        if METRICS_REPORT and not args.dry_run:
+            save_metrics_report()
+        if textfile_exporter is not None:
+            textfile_exporter.stop()
+        if profiler is not None:
+            profiler.stop()
+            profile_paths = get_profile_paths(OUTPUT_DIR, PROJECT_PREFIX)
+            profiler.save(profile_paths, sort=PROFILE_SORT, limit=PROFILE_LIMIT)
+            logger.info(f"Профиль запуска: {profile_paths['report']}, свёрнутые стеки: {profile_paths['collapsed']}")
+        if memory_reporter is not None:
+            memory_checkpoint("end")
+            memory_report_path = get_memory_report_path(OUTPUT_DIR, PROJECT_PREFIX)
+            memory_reporter.save(memory_report_path)
+            memory_reporter.stop()
+            logger.info(f"Отчёт о памяти: {memory_report_path} (пиковый RSS: {memory_reporter.get_report()['peak_rss']} байт)")
 
     logger.info("Обработка завершена успешно.")
 
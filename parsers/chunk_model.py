@@ -0,0 +1,132 @@
+from collections.abc import Mapping
+
+
+def _restore_chunk(chunk_class, values):
+    """
+    Восстанавливает чанк при распаковке pickle.
+    """
+    chunk = chunk_class.__new__(chunk_class)
+    for slot, value in zip(chunk_class.__slots__, values):
+        setattr(chunk, slot, value)
+    return chunk
+
+
+class Chunk(Mapping):
+    """
+    Компактный чанк записи (класс, метод, свойство, функция и т.д.) со слотами вместо словаря.
+
+    Чанк ведёт себя как словарь только для чтения с фиксированным набором ключей: поддерживаются
+    chunk["name"], chunk.get("qa"), перебор ключей и items(); значения существующих ключей можно
+    менять (chunk["description"] = ...). В JSON чанк выводится через to_json() с ключами в порядке
+    fields, поэтому вывод совпадает с прежними словарями.
+
+    Конкретные типы создаются функцией chunk_type.
+    """
+
+    __slots__ = ()
+
+    # Ключи чанка в порядке вывода
+    fields = ()
+    _slot_names = {}
+    _slot_items = ()
+
+    def __init__(self, **values):
+        for field, slot in self._slot_items:
+            setattr(self, slot, values.pop(field, None))
+        if values:
+            raise TypeError(f"Unknown fields for {type(self).__name__}: {', '.join(values)}")
+
+    def __getitem__(self, key):
+        slot = self._slot_names.get(key)
+        if slot is None:
+            raise KeyError(key)
+        return getattr(self, slot)
+
+    def __setitem__(self, key, value):
+        slot = self._slot_names.get(key)
+        if slot is None:
+            raise KeyError(f"{type(self).__name__} has no field '{key}'.")
+        setattr(self, slot, value)
+
+    def __contains__(self, key):
+        return key in self._slot_names
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def get(self, key, default=None):
+        slot = self._slot_names.get(key)
+        return default if slot is None else getattr(self, slot)
+
+    def to_json(self):
+        """
+        Возвращает чанк в виде словаря для сериализации (ключи в порядке fields).
+
+        :return: dict.
+        """
+        return {field: getattr(self, slot) for field, slot in self._slot_items}
+
+    def __reduce__(self):
+        return _restore_chunk, (type(self), tuple(getattr(self, slot) for slot in self.__slots__))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_json()!r})"
+
+
+def chunk_type(name, fields):
+    """
+    Создаёт класс чанка с указанными ключами.
+
+    Слоты называются "_" + ключ: ключи вроде "items" не должны перекрывать методы Mapping.
+
+    :param name: Имя класса.
+    :param fields: Ключи чанка в порядке вывода.
+    :return: Подкласс Chunk.
+    """
+    fields = tuple(fields)
+    slots = tuple(f"_{field}" for field in fields)
+    return type(name, (Chunk,), {
+        "__slots__": slots,
+        "__module__": __name__,
+        "fields": fields,
+        "_slot_names": dict(zip(fields, slots)),
+        "_slot_items": tuple(zip(fields, slots)),
+    })
+
+
+# Функции и методы Python, глобальные функции PHP и TS
+FunctionChunk = chunk_type("FunctionChunk", ("id", "type", "name", "description", "code", "start_line", "end_line"))
+
+# Методы PHP и TS
+MethodChunk = chunk_type(
+    "MethodChunk", ("id", "type", "name", "description", "code", "start_line", "end_line", "modifiers")
+)
+
+# Классы
+PythonClassChunk = chunk_type(
+    "PythonClassChunk", ("id", "type", "name", "description", "code", "start_line", "end_line", "methods", "attributes")
+)
+PhpClassChunk = chunk_type(
+    "PhpClassChunk", ("id", "type", "name", "description", "code", "qa", "methods", "properties")
+)
+TsClassChunk = chunk_type("TsClassChunk", ("id", "type", "name", "description", "code", "methods", "properties"))
+
+# Свойства и атрибуты классов (в PHP и TS ключ "type" содержит тип свойства)
+PhpPropertyChunk = chunk_type(
+    "PhpPropertyChunk", ("id", "type", "name", "description", "modifiers", "default_value")
+)
+TsPropertyChunk = chunk_type("TsPropertyChunk", ("id", "type", "name", "description", "default_value", "modifiers"))
+AttributeChunk = chunk_type("AttributeChunk", ("id", "type", "name", "description", "value", "line"))
+
+# Импорты и зависимости
+ImportChunk = chunk_type("ImportChunk", ("id", "type", "name", "description", "modules", "line"))
+ImportsChunk = chunk_type("ImportsChunk", ("id", "type", "description", "items"))
+DependenciesChunk = chunk_type("DependenciesChunk", ("id", "type", "description", "dependencies"))
+
+# Прочие элементы
+NamespaceChunk = chunk_type("NamespaceChunk", ("id", "type", "name", "description"))
+CodeChunk = chunk_type("CodeChunk", ("id", "type", "name", "description", "code"))  # Типы и экспорты TS
+ReactComponentChunk = chunk_type("ReactComponentChunk", ("id", "type", "name", "description", "code", "props"))
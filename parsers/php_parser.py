@@ -1,18 +1,28 @@
 import subprocess
-import json
 import os
 from utils.common import generate_id
 from datetime import datetime
+from utils.metrics import metrics
+from utils.parser_process import PERSISTENT_PARSERS, PersistentParser
+from utils.profiler import profile_bucket
+from utils.serializer import dumps, loads
 from utils.llm_assist import LLMAssist
 from utils.qa_manager import QAManager
+from parsers import qa_rules
+from parsers.chunk_model import (DependenciesChunk, FunctionChunk, MethodChunk, NamespaceChunk, PhpClassChunk,
+                                 PhpPropertyChunk)
 
 
-def get_class_qa(llm_assist, class_chunk):
+def get_class_qa(llm_assist, class_chunk, register=True):
     """
     Формирует раздел вопросов и ответов для дообучения LLM модели на основе данных о классе.
+    На структурные вопросы (модификаторы, значения по умолчанию, строки методов, список методов
+    с описаниями от LLM) при включённом STRUCTURAL_QA отвечают правила qa_rules без запроса к LLM.
+    Свойства LLM не описывает, поэтому вопрос о назначении свойств всегда задаётся LLM.
 
     :param llm_assist: Экземпляр LLMAssist.
     :param class_chunk: Словарь с информацией о классе.
+    :param register: Добавлять ли ответы в глобальный QAManager (иначе это делает вызывающий код).
     :return: Список словарей с вопросами и ответами.
     """
     # Генерация вопросов на основе данных о классе с контекстом
@@ -35,7 +45,8 @@ def get_class_qa(llm_assist, class_chunk):
         },
         {
             "question": f"Какие методы предоставляет класс {class_chunk['name']} и как они работают?",
-            "context": f"Список методов:\n{methods_list}" if methods else "У класса нет методов."
+            "context": f"Список методов:\n{methods_list}" if methods else "У класса нет методов.",
+            "structural": qa_rules.answer_class_members(class_chunk["name"], methods, "methods")
         }
     ]
 
@@ -60,7 +71,8 @@ def get_class_qa(llm_assist, class_chunk):
         context = f"В классе {class_chunk['name']} модификаторы не указаны."
     questions.append({
             "question": f"Какие модификаторы используются в свойствах и методах класса {class_chunk['name']}?",
-            "context": context
+            "context": context,
+            "structural": qa_rules.answer_class_modifiers(class_chunk["name"], all_modifiers)
         })
 
     # Добавляем вопросы для каждого свойства
@@ -82,7 +94,8 @@ def get_class_qa(llm_assist, class_chunk):
             if property_chunk.get("default_value") is not None:
                 questions.append({
                     "question": f"Какое значение по умолчанию у свойства {property_chunk['name']} в классе {class_chunk['name']}?",
-                    "context": context
+                    "context": context,
+                    "structural": qa_rules.answer_property_default(class_chunk["name"], property_chunk)
                 })
 
     # Добавляем вопросы для каждого метода
@@ -104,12 +117,14 @@ def get_class_qa(llm_assist, class_chunk):
             if method_chunk.get("modifiers"):
                 questions.append({
                     "question": f"Какие модификаторы используются в методе {method_chunk['name']} класса {class_chunk['name']}?",
-                    "context": context
+                    "context": context,
+                    "structural": qa_rules.answer_method_modifiers(class_chunk["name"], method_chunk)
                 })
             if method_chunk.get("start_line") is not None and method_chunk.get("end_line") is not None:
                 questions.append({
                     "question": f"В каких строках определён метод {method_chunk['name']} в классе {class_chunk['name']}?",
-                    "context": context
+                    "context": context,
+                    "structural": qa_rules.answer_method_lines(class_chunk["name"], method_chunk)
                 })
 
     # Подготовка и выполнение запросов к LLM
@@ -119,17 +134,22 @@ def get_class_qa(llm_assist, class_chunk):
         for question_data in questions:
             question = question_data["question"]
             context = question_data["context"]
+            structural = question_data.get("structural")
 
-            # Формируем сообщение для модели
-            user_message = (
-                f"Вы ассистент, обучающий на основе кода. Сформулируйте ответ на вопрос о классе {class_chunk['name']} "
-                f"на русском языке. Вопрос: {question}"
-            )
-            if context:
-                user_message += f"\n\nКонтекст:\n{context}"
+            if qa_rules.STRUCTURAL_QA and structural is not None:
+                # Ответ строится по данным разбора
+                response = qa_rules.answer_structural(llm_assist, question, structural)
+            else:
+                # Формируем сообщение для модели
+                user_message = (
+                    f"Вы ассистент, обучающий на основе кода. Сформулируйте ответ на вопрос о классе "
+                    f"{class_chunk['name']} на русском языке. Вопрос: {question}"
+                )
+                if context:
+                    user_message += f"\n\nКонтекст:\n{context}"
 
-            # Отправляем запрос к LLM
-            response = llm_assist.query(user_message=user_message, temperature=0.5)
+                # Отправляем запрос к LLM
+                response = llm_assist.query(user_message=user_message, temperature=0.5, kind="class_qa")
 
             # Добавляем результат
             qa_results.append({
@@ -137,13 +157,39 @@ def get_class_qa(llm_assist, class_chunk):
                 "answer": response.strip()  # Убираем лишние пробелы и переносы строк
             })
 
-            qa_manager.add_qa(question, response.strip())
+            if register:
+                qa_manager.add_qa(question, response.strip())
 
     except Exception as e:
         raise RuntimeError(f"Ошибка при генерации QA данных: {e}")
 
     return qa_results
 
+def _run_parser(php_parser_script, file_path, parser_dir):
+    """
+    Запускает PHP-парсер отдельным процессом для одного файла.
+
+    :param php_parser_script: Абсолютный путь к скрипту парсера.
+    :param file_path: Путь к файлу.
+    :param parser_dir: Рабочий каталог процесса.
+    :return: Результат разбора (словарь).
+    """
+    result = subprocess.run(
+        ["php", php_parser_script, file_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=parser_dir  # Устанавливаем рабочую директорию как каталог php_parser.php
+    )
+
+    # Проверяем на ошибки выполнения
+    if result.returncode != 0:
+        raise RuntimeError(f"Error in PHP parser script: {result.stderr.strip()}")
+
+    # Парсим результат работы PHP-скрипта
+    return loads(result.stdout)
+
+
 def parse_php_code(file_path, source_dir, php_parser_script="php_parser.php", project_type=None):
     """
     Парсит PHP-файл, вызывая PHP-скрипт, и возвращает извлеченные данные.
@@ -154,9 +200,37 @@ def parse_php_code(file_path, source_dir, php_parser_script="php_parser.php", pr
     :param php_parser_script: Путь к PHP-скрипту.
     :return: Список чанков, извлеченных из PHP-файла.
     """
-    # Инициализируем LLMAssist
-    llm_assist = LLMAssist(project_type)
+    file_code = _read_file_code(file_path)
+    records = parse_php_structure(file_path, source_dir, php_parser_script, file_code)
+    return enrich_php_records(records, file_code, project_type)
+
+
+def _read_file_code(file_path):
+    """
+    Читает содержимое PHP-файла.
 
+    :param file_path: Путь к файлу.
+    :return: Содержимое файла.
+    :raises RuntimeError: Если файл не удалось прочитать.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.read()
+    except Exception as e:
+        raise RuntimeError(f"Unable to read the file {file_path}: {e}")
+
+
+def parse_php_structure(file_path, source_dir, php_parser_script="php_parser.php", file_code=None):
+    """
+    Разбирает структуру PHP-файла без обращений к LLM: описания заполняются значениями по умолчанию,
+    разделы QA классов остаются пустыми.
+
+    :param file_path: Путь к файлу, который нужно разобрать.
+    :param source_dir: Корень проекта, относительно которого формируется путь.
+    :param php_parser_script: Путь к PHP-скрипту.
+    :param file_code: Содержимое файла (если None, файл читается).
+    :return: Список с записью файла.
+    """
     # Преобразуем путь к PHP-скрипту в абсолютный
     php_parser_script = os.path.abspath(php_parser_script)
 
@@ -169,21 +243,15 @@ def parse_php_code(file_path, source_dir, php_parser_script="php_parser.php", pr
 
     # Вызываем PHP-скрипт для анализа файла
     try:
-        result = subprocess.run(
-            ["php", php_parser_script, file_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=parser_dir  # Устанавливаем рабочую директорию как каталог php_parser.php
-        )
-
-        # Проверяем на ошибки выполнения
-        if result.returncode != 0:
-            raise RuntimeError(f"Error in PHP parser script: {result.stderr.strip()}")
-
-        # Парсим результат работы PHP-скрипта
-        parsed_data = json.loads(result.stdout)
+        with metrics.timer("parser_subprocess_seconds", parser="php",
+                           mode="persistent" if PERSISTENT_PARSERS else "process"), profile_bucket("subprocess:php"):
+            if PERSISTENT_PARSERS:
+                # Процесс парсера остаётся запущенным между файлами
+                parsed_data = PersistentParser.get(["php", php_parser_script, "--serve"], parser_dir).parse(file_path)
+            else:
+                parsed_data = _run_parser(php_parser_script, file_path, parser_dir)
     except Exception as e:
+        metrics.record_error(e, "parser")
         raise RuntimeError(f"Error while executing PHP parser: {e}")
 
     # Проверяем наличие ошибок в результате
@@ -198,110 +266,91 @@ def parse_php_code(file_path, source_dir, php_parser_script="php_parser.php", pr
 
     # Формируем данные о классах
     for class_data in parsed_data.get("classes", []):
-        if llm_assist.success:
-            description = llm_assist.describe_class(class_data["name"], class_data.get("code"), relative_path)
-        else:
-            description = f"Class definition: {class_data['name']}"
-
-        class_chunk = {
-            "id": generate_id(),
-            "type": "class",
-            "name": class_data["name"],  # Имя класса
-            "description": description,
-            "code": class_data.get("code"),  # Исходный код класса
-            "qa": [],
-            "methods": [],
-            "properties": []
-        }
+        class_chunk = PhpClassChunk(
+            id=generate_id(relative_path, "class", class_data["name"], class_data.get("code")),
+            type="class",
+            name=class_data["name"],  # Имя класса
+            description=f"Class definition: {class_data['name']}",
+            code=class_data.get("code"),  # Исходный код класса
+            qa=[],
+            methods=[],
+            properties=[]
+        )
 
         # Обрабатываем свойства класса, если они есть
         for property_data in class_data.get("properties", []):
-            property_chunk = {
-                "id": generate_id(),
-                "type": "property",
-                "name": property_data["name"],
-                "description": f"Property {property_data['name']} in class {class_data['name']}",
-                "type": property_data.get("type"),
-                "modifiers": property_data.get("modifiers", []),
-                "default_value": property_data.get("default_value"),
-            }
+            property_chunk = PhpPropertyChunk(
+                id=generate_id(relative_path, "property", f"{class_data['name']}.{property_data['name']}",
+                               dumps(property_data, sort_keys=True)),
+                name=property_data["name"],
+                description=f"Property {property_data['name']} in class {class_data['name']}",
+                type=property_data.get("type"),
+                modifiers=property_data.get("modifiers", []),
+                default_value=property_data.get("default_value"),
+            )
             class_chunk["properties"].append(property_chunk)
 
         # Обрабатываем методы класса, если они есть
         for method_data in class_data.get("methods", []):
-            if llm_assist.success:
-                description = llm_assist.describe_class_method(method_data["name"], method_data.get("code"), class_chunk["name"], class_chunk["description"])
-            else:
-                description = f"Method {method_data['name']} in class {class_data['name']}"
-
-            method_chunk = {
-                "id": generate_id(),
-                "type": "method",
-                "name": method_data["name"],
-                "description": description,
-                "code": method_data.get("code"),
-                "start_line": method_data.get("start_line"),
-                "end_line": method_data.get("end_line"),
-                "modifiers": method_data.get("modifiers", [])
-            }
+            method_chunk = MethodChunk(
+                id=generate_id(relative_path, "method", f"{class_data['name']}.{method_data['name']}",
+                               method_data.get("code")),
+                type="method",
+                name=method_data["name"],
+                description=f"Method {method_data['name']} in class {class_data['name']}",
+                code=method_data.get("code"),
+                start_line=method_data.get("start_line"),
+                end_line=method_data.get("end_line"),
+                modifiers=method_data.get("modifiers", [])
+            )
             class_chunk["methods"].append(method_chunk)
 
-        class_chunk["qa"] = get_class_qa(llm_assist, class_chunk)
-
         chunks.append(class_chunk)
 
     # Формируем данные о функциях
     for function_data in parsed_data.get("functions", []):
-        function_chunk = {
-            "id": generate_id(),
-            "type": "function",
-            "name": function_data["name"],
-            "description": f"Global function {function_data['name']}",
-            "code": function_data.get("code"),
-            "start_line": function_data.get("start_line"),
-            "end_line": function_data.get("end_line"),
-        }
+        function_chunk = FunctionChunk(
+            id=generate_id(relative_path, "function", function_data["name"], function_data.get("code")),
+            type="function",
+            name=function_data["name"],
+            description=f"Global function {function_data['name']}",
+            code=function_data.get("code"),
+            start_line=function_data.get("start_line"),
+            end_line=function_data.get("end_line"),
+        )
         chunks.append(function_chunk)
 
     # Формируем данные о зависимостях (use statements)
     dependencies = parsed_data.get("dependencies", [])
     if dependencies:
-        dependency_chunk = {
-            "id": generate_id(),
-            "type": "dependencies",
-            "description": "List of dependencies",
-            "dependencies": dependencies,
-        }
+        dependency_chunk = DependenciesChunk(
+            id=generate_id(relative_path, "dependencies", content=dumps(dependencies, sort_keys=True)),
+            type="dependencies",
+            description="List of dependencies",
+            dependencies=dependencies,
+        )
         chunks.append(dependency_chunk)
 
     # Формируем данные о пространстве имен
     if parsed_data.get("namespace"):
-        namespace_chunk = {
-            "id": generate_id(),
-            "type": "namespace",
-            "name": parsed_data["namespace"],
-            "description": f"Namespace: {parsed_data['namespace']}",
-        }
+        namespace_chunk = NamespaceChunk(
+            id=generate_id(relative_path, "namespace", parsed_data["namespace"]),
+            type="namespace",
+            name=parsed_data["namespace"],
+            description=f"Namespace: {parsed_data['namespace']}",
+        )
         chunks.append(namespace_chunk)
 
-    # Описание файла с помощью LLMAssist
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            file_code = file.read()
-    except Exception as e:
-        raise RuntimeError(f"Unable to read the file {file_path}: {e}")
-
-    if llm_assist.success:
-        description = llm_assist.describe_file(relative_path, file_code)
-    else:
-        description = f"PHP file: {file_name}"
+    # Содержимое файла для записи без чанков
+    if file_code is None:
+        file_code = _read_file_code(file_path)
 
     # Формируем итоговую структуру для файла
     file_metadata = {
-        "id": generate_id(),
+        "id": generate_id(relative_path, "file", relative_path, file_code),
         "type": "file",
         "name": file_name,
-        "description": description,
+        "description": f"PHP file: {file_name}",
         "code": None,  # По умолчанию None, добавим полный код, если chunks пуст
         "metadata": {
             "source": relative_path,
@@ -318,3 +367,40 @@ def parse_php_code(file_path, source_dir, php_parser_script="php_parser.php", pr
         file_metadata["code"] = file_code
 
     return [file_metadata]
+
+
+def enrich_php_records(records, file_code, project_type=None, register_qa=True):
+    """
+    Дополняет записи, полученные parse_php_structure, описаниями от LLM и разделами QA классов.
+
+    :param records: Список записей файла (изменяется на месте).
+    :param file_code: Содержимое файла для описания файла целиком.
+    :param project_type: Тип проекта (например, "laravel").
+    :param register_qa: Добавлять ли ответы QA в глобальный QAManager.
+    :return: Те же записи.
+    """
+    # Инициализируем LLMAssist
+    llm_assist = LLMAssist(project_type)
+
+    for record in records:
+        relative_path = record["metadata"]["source"]
+        for class_chunk in record["chunks"]:
+            if class_chunk["type"] != "class":
+                continue
+            # Без LLM классы остаются без описаний и QA
+            if llm_assist.success:
+                class_chunk["description"] = llm_assist.describe_class(
+                    class_chunk["name"], class_chunk["code"], relative_path
+                )
+                for method_chunk in class_chunk["methods"]:
+                    method_chunk["description"] = llm_assist.describe_class_method(
+                        method_chunk["name"], method_chunk["code"], class_chunk["name"], class_chunk["description"]
+                    )
+
+                class_chunk["qa"] = get_class_qa(llm_assist, class_chunk, register=register_qa)
+
+        # Описание файла с помощью LLMAssist
+        if llm_assist.success:
+            record["description"] = llm_assist.describe_file(relative_path, file_code)
+
+    return records
@@ -2,7 +2,10 @@ import ast
 import os
 from utils.common import generate_id
 from datetime import datetime
+from utils.serializer import dumps
 from utils.llm_assist import LLMAssist
+from utils.metrics import metrics
+from parsers.chunk_model import AttributeChunk, FunctionChunk, ImportChunk, ImportsChunk, PythonClassChunk
 
 
 def set_parents(tree):
@@ -25,15 +28,30 @@ def parse_python_code(file_path, source_dir, project_type=None):
     :param source_dir: Корень проекта, относительно которого формируется путь.
     :return: Список извлеченных данных в виде чанков.
     """
-    # Инициализируем помощника для анализа с использованием LLM
-    llm_assist = LLMAssist(project_type)
-
     # Открываем и читаем содержимое файла
     with open(file_path, 'r', encoding='utf-8') as file:
         content = file.read()
 
+    records = parse_python_structure(file_path, source_dir, content)
+    return enrich_python_records(records, content, project_type)
+
+
+def parse_python_structure(file_path, source_dir, content=None):
+    """
+    Разбирает структуру Python-файла без обращений к LLM: описания заполняются значениями по умолчанию.
+
+    :param file_path: Путь к файлу, который нужно разобрать.
+    :param source_dir: Корень проекта, относительно которого формируется путь.
+    :param content: Содержимое файла (если None, файл читается).
+    :return: Список с записью файла.
+    """
+    if content is None:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+
     # Парсим содержимое файла в абстрактное синтаксическое дерево (AST)
-    tree = ast.parse(content)
+    with metrics.timer("parse_seconds", parser="python"):
+        tree = ast.parse(content)
     set_parents(tree)  # Устанавливаем родительские узлы для всех элементов дерева
 
     # Метаданные файла
@@ -51,14 +69,16 @@ def parse_python_code(file_path, source_dir, project_type=None):
     for node in ast.walk(tree):
         # Обработка импортов (import и from ... import ...)
         if isinstance(node, (ast.Import, ast.ImportFrom)):
-            import_data = {
-                "id": generate_id(),  # Генерация уникального идентификатора
-                "type": "import",  # Тип узла
-                "name": None,  # Имя модуля (для import from)
-                "description": "Import statement",  # Описание узла
-                "modules": [],  # Импортируемые модули
-                "line": node.lineno,  # Номер строки, где находится импорт
-            }
+            import_data = ImportChunk(
+                # Одинаковые импорты встречаются в разных функциях, поэтому строка входит в идентификатор
+                id=generate_id(relative_path, "import", node.module if isinstance(node, ast.ImportFrom) else None,
+                               f"{node.lineno}:{ast.get_source_segment(content, node)}"),
+                type="import",  # Тип узла
+                name=None,  # Имя модуля (для import from)
+                description="Import statement",  # Описание узла
+                modules=[],  # Импортируемые модули
+                line=node.lineno,  # Номер строки, где находится импорт
+            )
             if isinstance(node, ast.Import):
                 import_data["modules"] = [alias.name for alias in node.names]  # Список модулей
             elif isinstance(node, ast.ImportFrom):
@@ -69,111 +89,83 @@ def parse_python_code(file_path, source_dir, project_type=None):
 
         # Обработка глобальных функций
         elif isinstance(node, ast.FunctionDef) and isinstance(node.parent, ast.Module):
-            # Описание функции
-            if llm_assist.success:
-                description = llm_assist.describe_global_function(node.name, ast.get_source_segment(content, node), file_name)
-            else:
-                description = f"Function definition: {node.name}"
-
-            function_data = {
-                "id": generate_id(),
-                "type": "function",  # Тип узла
-                "name": node.name,  # Имя функции
-                "description": description, # Описание функции
-                "code": ast.get_source_segment(content, node),  # Исходный код функции
-                "start_line": node.lineno,  # Начальная строка
-                "end_line": getattr(node, "end_lineno", None),  # Конечная строка (если поддерживается)
-            }
+            function_data = FunctionChunk(
+                id=generate_id(relative_path, "function", node.name, ast.get_source_segment(content, node)),
+                type="function",  # Тип узла
+                name=node.name,  # Имя функции
+                description=f"Function definition: {node.name}",  # Описание функции
+                code=ast.get_source_segment(content, node),  # Исходный код функции
+                start_line=node.lineno,  # Начальная строка
+                end_line=getattr(node, "end_lineno", None),  # Конечная строка (если поддерживается)
+            )
             functions.append(function_data)  # Добавляем в список функций
 
         # Обработка классов
         elif isinstance(node, ast.ClassDef):
-            # Описание класса
-            if llm_assist.success:
-                description = llm_assist.describe_class(node.name, ast.get_source_segment(content, node))
-            else:
-                description = f"Class definition: {node.name}"
-
-            class_data = {
-                "id": generate_id(),
-                "type": "class",  # Тип узла
-                "name": node.name,  # Имя класса
-                "description": description,  # Описание класса
-                "code": ast.get_source_segment(content, node),  # Исходный код класса
-                "start_line": node.lineno,  # Начальная строка
-                "end_line": getattr(node, "end_lineno", None),  # Конечная строка
-                "methods": [],  # Методы класса
-                "attributes": [],  # Атрибуты класса
-            }
+            class_data = PythonClassChunk(
+                id=generate_id(relative_path, "class", node.name, ast.get_source_segment(content, node)),
+                type="class",  # Тип узла
+                name=node.name,  # Имя класса
+                description=f"Class definition: {node.name}",  # Описание класса
+                code=ast.get_source_segment(content, node),  # Исходный код класса
+                start_line=node.lineno,  # Начальная строка
+                end_line=getattr(node, "end_lineno", None),  # Конечная строка
+                methods=[],  # Методы класса
+                attributes=[],  # Атрибуты класса
+            )
 
             # Обработка содержимого класса
             for class_node in node.body:
                 # Извлечение методов
                 if isinstance(class_node, ast.FunctionDef):
-                    # Описание метода
-                    if llm_assist.success:
-                        description = llm_assist.describe_class_method(class_node.name, ast.get_source_segment(content, class_node), node.name, class_data["description"])
-                    else:
-                        description = f"Method {class_node.name} in class {node.name}"
-
-                    method_data = {
-                        "id": generate_id(),
-                        "type": "method",  # Тип узла
-                        "name": class_node.name,  # Имя метода
-                        "description": description,  # Описание метода
-                        "code": ast.get_source_segment(content, class_node),  # Исходный код метода
-                        "start_line": class_node.lineno,  # Начальная строка метода
-                        "end_line": getattr(class_node, "end_lineno", None),  # Конечная строка метода
-                    }
+                    method_data = FunctionChunk(
+                        id=generate_id(relative_path, "method", f"{node.name}.{class_node.name}",
+                                       ast.get_source_segment(content, class_node)),
+                        type="method",  # Тип узла
+                        name=class_node.name,  # Имя метода
+                        description=f"Method {class_node.name} in class {node.name}",  # Описание метода
+                        code=ast.get_source_segment(content, class_node),  # Исходный код метода
+                        start_line=class_node.lineno,  # Начальная строка метода
+                        end_line=getattr(class_node, "end_lineno", None),  # Конечная строка метода
+                    )
                     class_data["methods"].append(method_data)  # Добавляем метод в список методов класса
 
                 # Извлечение атрибутов (глобальных переменных в теле класса)
                 elif isinstance(class_node, ast.Assign):
                     for target in class_node.targets:
                         if isinstance(target, ast.Name):  # Проверка, является ли целевой объект именем
-                            attribute_data = {
-                                "id": generate_id(),
-                                "type": "attribute",  # Тип узла
-                                "name": target.id,  # Имя атрибута
-                                "description": f"Attribute {target.id} in class {node.name}",  # Описание атрибута
-                                "value": ast.get_source_segment(content, class_node.value),  # Значение атрибута
-                                "line": class_node.lineno,  # Номер строки
-                            }
+                            attribute_data = AttributeChunk(
+                                id=generate_id(relative_path, "attribute", f"{node.name}.{target.id}",
+                                               ast.get_source_segment(content, class_node)),
+                                type="attribute",  # Тип узла
+                                name=target.id,  # Имя атрибута
+                                description=f"Attribute {target.id} in class {node.name}",  # Описание атрибута
+                                value=ast.get_source_segment(content, class_node.value),  # Значение атрибута
+                                line=class_node.lineno,  # Номер строки
+                            )
                             class_data["attributes"].append(attribute_data)  # Добавляем атрибут
 
             classes.append(class_data)  # Добавляем класс в список классов
 
     # Формируем чанки с импортами
     if imports:
-        chunks.append({
-            "id": generate_id(),
-            "type": "imports",
-            "description": "List of import statements",
-            "items": imports,
-        })
+        chunks.append(ImportsChunk(
+            id=generate_id(relative_path, "imports", content=dumps([item["id"] for item in imports])),
+            type="imports",
+            description="List of import statements",
+            items=imports,
+        ))
 
     # Добавляем функции и классы в чанки
     chunks.extend(functions)
     chunks.extend(classes)
 
-    # Попытка описать файл с помощью LLMAssist
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            file_code = file.read()
-    except Exception as e:
-        raise RuntimeError(f"Unable to read the file {file_path}: {e}")
-
-    if llm_assist.success:
-        description = llm_assist.describe_file(relative_path, file_code)  # Описание файла с помощью LLM
-    else:
-        description = f"Python file: {file_name}"  # Описание по умолчанию
-
     # Финальная структура для метаданных файла
     file_metadata = {
-        "id": generate_id(),
+        "id": generate_id(relative_path, "file", relative_path, content),
         "type": "file",
         "name": file_name,
-        "description": description,  # Описание файла
+        "description": f"Python file: {file_name}",  # Описание по умолчанию
         "code": None,  # Исходный код (по умолчанию не включается)
         "metadata": {  # Дополнительные метаданные файла
             "source": relative_path,
@@ -186,3 +178,36 @@ def parse_python_code(file_path, source_dir, project_type=None):
     }
 
     return [file_metadata]  # Возвращаем список с метаданными файла
+
+
+def enrich_python_records(records, content, project_type=None):
+    """
+    Дополняет записи, полученные parse_python_structure, описаниями от LLM (если LLM настроена).
+
+    :param records: Список записей файла (изменяется на месте).
+    :param content: Содержимое файла для описания файла целиком.
+    :param project_type: Тип проекта (например, "django").
+    :return: Те же записи.
+    """
+    # Инициализируем помощника для анализа с использованием LLM
+    llm_assist = LLMAssist(project_type)
+    if not llm_assist.success:
+        return records
+
+    for record in records:
+        file_name = record["metadata"]["file_name"]
+        for chunk in record["chunks"]:
+            if chunk["type"] == "function":
+                chunk["description"] = llm_assist.describe_global_function(chunk["name"], chunk["code"], file_name)
+            elif chunk["type"] == "class":
+                chunk["description"] = llm_assist.describe_class(chunk["name"], chunk["code"],
+                                                                 record["metadata"]["source"])
+                for method in chunk["methods"]:
+                    method["description"] = llm_assist.describe_class_method(
+                        method["name"], method["code"], chunk["name"], chunk["description"]
+                    )
+
+        # Описание файла с помощью LLM
+        record["description"] = llm_assist.describe_file(record["metadata"]["source"], content)
+
+    return records
@@ -0,0 +1,123 @@
+import os
+from dotenv import load_dotenv
+from utils.serializer import dumps
+
+load_dotenv()
+
+# Отвечать на структурные вопросы QA по данным разбора, без запроса к LLM
+STRUCTURAL_QA = os.getenv("STRUCTURAL_QA", "true").lower() == "true"
+# Перефразировать структурные ответы с помощью LLM (один запрос на ответ)
+STRUCTURAL_QA_PARAPHRASE = os.getenv("STRUCTURAL_QA_PARAPHRASE", "false").lower() == "true"
+
+# Названия элементов класса: (именительный падеж, родительный падеж, описание-заглушка парсера)
+MEMBER_TITLES = {
+    "methods": ("методы", "методов", "Method {name} in class {class_name}"),
+    "properties": ("свойства", "свойств", "Property {name} in class {class_name}"),
+}
+
+
+def format_value(value):
+    """
+    Форматирует значение из разбора для ответа.
+
+    :param value: Значение (строка кода или значение JSON).
+    :return: Строка.
+    """
+    return value if isinstance(value, str) else dumps(value)
+
+
+def answer_class_modifiers(class_name, modifiers):
+    """
+    Ответ на вопрос о модификаторах свойств и методов класса.
+
+    :param class_name: Имя класса.
+    :param modifiers: Отсортированный список модификаторов без повторов.
+    :return: Строка.
+    """
+    if not modifiers:
+        return f"В свойствах и методах класса {class_name} модификаторы не указаны."
+    return f"В свойствах и методах класса {class_name} используются модификаторы: {', '.join(modifiers)}."
+
+
+def answer_class_members(class_name, members, kind):
+    """
+    Ответ на вопрос о списке методов или свойств класса. Вопрос спрашивает и о назначении элементов,
+    поэтому ответ строится только при наличии описаний от LLM у всех элементов: описание-заглушка
+    парсера ("Method X in class Y") описанием не считается.
+
+    :param class_name: Имя класса.
+    :param members: Чанки методов или свойств.
+    :param kind: Вид элементов ("methods" или "properties").
+    :return: Строка или None, если ответ нельзя построить по данным разбора.
+    """
+    title, title_genitive, placeholder = MEMBER_TITLES[kind]
+    if not members:
+        return f"У класса {class_name} нет {title_genitive}."
+    for member in members:
+        description = (member.get("description") or "").strip()
+        if not description or description == placeholder.format(name=member["name"], class_name=class_name):
+            return None
+    lines = [f"Класс {class_name} содержит {title}:"]
+    lines.extend(f"- {member['name']}: {member['description'].strip()}" for member in members)
+    return "\n".join(lines)
+
+
+def answer_property_default(class_name, property_chunk):
+    """
+    Ответ на вопрос о значении свойства по умолчанию.
+
+    :param class_name: Имя класса.
+    :param property_chunk: Чанк свойства.
+    :return: Строка или None, если значение не задано.
+    """
+    if property_chunk.get("default_value") is None:
+        return None
+    return (f"Значение по умолчанию свойства {property_chunk['name']} в классе {class_name}: "
+            f"{format_value(property_chunk['default_value'])}.")
+
+
+def answer_method_modifiers(class_name, method_chunk):
+    """
+    Ответ на вопрос о модификаторах метода.
+
+    :param class_name: Имя класса.
+    :param method_chunk: Чанк метода.
+    :return: Строка или None, если модификаторов нет.
+    """
+    if not method_chunk.get("modifiers"):
+        return None
+    return (f"Метод {method_chunk['name']} в классе {class_name} объявлен с модификаторами: "
+            f"{', '.join(method_chunk['modifiers'])}.")
+
+
+def answer_method_lines(class_name, method_chunk):
+    """
+    Ответ на вопрос о строках, в которых определён метод.
+
+    :param class_name: Имя класса.
+    :param method_chunk: Чанк метода.
+    :return: Строка или None, если строки неизвестны.
+    """
+    start_line, end_line = method_chunk.get("start_line"), method_chunk.get("end_line")
+    if start_line is None or end_line is None:
+        return None
+    return f"Метод {method_chunk['name']} в классе {class_name} определён в строках {start_line}–{end_line}."
+
+
+def answer_structural(llm_assist, question, answer):
+    """
+    Возвращает ответ на структурный вопрос: построенный по правилам или, если включён
+    STRUCTURAL_QA_PARAPHRASE, перефразированный LLM с сохранением всех фактов.
+
+    :param llm_assist: Экземпляр LLMAssist.
+    :param question: Текст вопроса.
+    :param answer: Ответ, построенный по данным разбора.
+    :return: Строка.
+    """
+    if not STRUCTURAL_QA_PARAPHRASE:
+        return answer
+    user_message = (
+        "Перефразируйте ответ на вопрос о коде на русском языке, сохранив все имена, значения и номера строк. "
+        f"Вопрос: {question}\n\nОтвет:\n{answer}"
+    )
+    return llm_assist.query(user_message=user_message, temperature=0.5, kind="qa_paraphrase").strip()
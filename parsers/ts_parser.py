@@ -1,8 +1,38 @@
 import subprocess
-import json
 import os
-from utils.common import generate_id
+from utils.common import generate_id, get_id_mode
 from datetime import datetime
+from utils.metrics import metrics
+from utils.parser_process import PERSISTENT_PARSERS, PersistentParser
+from utils.profiler import profile_bucket
+from utils.serializer import dumps, loads
+from parsers.chunk_model import (CodeChunk, DependenciesChunk, FunctionChunk, MethodChunk, ReactComponentChunk,
+                                 TsClassChunk, TsPropertyChunk)
+
+
+def _run_parser(ts_parser_script, file_path, parser_dir):
+    """
+    Запускает TS-парсер отдельным процессом для одного файла.
+
+    :param ts_parser_script: Абсолютный путь к скрипту парсера.
+    :param file_path: Путь к файлу.
+    :param parser_dir: Рабочий каталог процесса.
+    :return: Результат разбора (словарь).
+    """
+    result = subprocess.run(
+        ["node", ts_parser_script, file_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=parser_dir  # Устанавливаем рабочую директорию как каталог ts_parser.js
+    )
+
+    # Проверяем на ошибки выполнения
+    if result.returncode != 0:
+        raise RuntimeError(f"Error in TS parser script: {result.stderr.strip()}")
+
+    # Парсим результат работы TS парсера
+    return loads(result.stdout)
 
 
 def parse_ts_code(file_path, source_dir, ts_parser_script="ts_parser.js"):
@@ -26,21 +56,15 @@ def parse_ts_code(file_path, source_dir, ts_parser_script="ts_parser.js"):
 
     # Вызываем TS парсер для анализа файла
     try:
-        result = subprocess.run(
-            ["node", ts_parser_script, file_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=parser_dir  # Устанавливаем рабочую директорию как каталог ts_parser.js
-        )
-
-        # Проверяем на ошибки выполнения
-        if result.returncode != 0:
-            raise RuntimeError(f"Error in TS parser script: {result.stderr.strip()}")
-
-        # Парсим результат работы TS парсера
-        parsed_data = json.loads(result.stdout)
+        with metrics.timer("parser_subprocess_seconds", parser="ts",
+                           mode="persistent" if PERSISTENT_PARSERS else "process"), profile_bucket("subprocess:ts"):
+            if PERSISTENT_PARSERS:
+                # Процесс парсера остаётся запущенным между файлами
+                parsed_data = PersistentParser.get(["node", ts_parser_script, "--serve"], parser_dir).parse(file_path)
+            else:
+                parsed_data = _run_parser(ts_parser_script, file_path, parser_dir)
     except Exception as e:
+        metrics.record_error(e, "parser")
         raise RuntimeError(f"Error while executing TS parser: {e}")
 
     # Проверяем наличие ошибок в результате
@@ -55,106 +79,113 @@ def parse_ts_code(file_path, source_dir, ts_parser_script="ts_parser.js"):
 
     # Формируем данные о классах
     for class_data in parsed_data.get("classes", []):
-        class_chunk = {
-            "id": generate_id(),
-            "type": "class",
-            "name": class_data["name"],
-            "description": f"Class definition: {class_data['name']}",
-            "code": class_data.get("code"),
-            "methods": [],
-            "properties": []
-        }
+        class_chunk = TsClassChunk(
+            id=generate_id(relative_path, "class", class_data["name"], class_data.get("code")),
+            type="class",
+            name=class_data["name"],
+            description=f"Class definition: {class_data['name']}",
+            code=class_data.get("code"),
+            methods=[],
+            properties=[]
+        )
 
         # Обрабатываем свойства класса
         for property_data in class_data.get("properties", []):
-            property_chunk = {
-                "id": generate_id(),
-                "type": "property",
-                "name": property_data["name"],
-                "description": f"Property {property_data['name']} in class {class_data['name']}",
-                "type": property_data.get("type"),
-                "default_value": property_data.get("default_value"),
-                "modifiers": property_data.get("static", False)
-            }
+            property_chunk = TsPropertyChunk(
+                id=generate_id(relative_path, "property", f"{class_data['name']}.{property_data['name']}",
+                               dumps(property_data, sort_keys=True)),
+                name=property_data["name"],
+                description=f"Property {property_data['name']} in class {class_data['name']}",
+                type=property_data.get("type"),
+                default_value=property_data.get("default_value"),
+                modifiers=property_data.get("static", False)
+            )
             class_chunk["properties"].append(property_chunk)
 
         # Обрабатываем методы класса
         for method_data in class_data.get("methods", []):
-            method_chunk = {
-                "id": generate_id(),
-                "type": "method",
-                "name": method_data["name"],
-                "description": f"Method {method_data['name']} in class {class_data['name']}",
-                "code": method_data.get("code"),
-                "start_line": method_data.get("start_line"),
-                "end_line": method_data.get("end_line"),
-                "modifiers": method_data.get("kind")
-            }
+            method_chunk = MethodChunk(
+                id=generate_id(relative_path, "method", f"{class_data['name']}.{method_data['name']}",
+                               method_data.get("code")),
+                type="method",
+                name=method_data["name"],
+                description=f"Method {method_data['name']} in class {class_data['name']}",
+                code=method_data.get("code"),
+                start_line=method_data.get("start_line"),
+                end_line=method_data.get("end_line"),
+                modifiers=method_data.get("kind")
+            )
             class_chunk["methods"].append(method_chunk)
 
         chunks.append(class_chunk)
 
     # Формируем данные о функциях
     for function_data in parsed_data.get("functions", []):
-        function_chunk = {
-            "id": generate_id(),
-            "type": "function",
-            "name": function_data["name"],
-            "description": f"Global function {function_data['name']}",
-            "code": function_data.get("code"),
-            "start_line": function_data.get("start_line"),
-            "end_line": function_data.get("end_line"),
-        }
+        function_chunk = FunctionChunk(
+            id=generate_id(relative_path, "function", function_data["name"], function_data.get("code")),
+            type="function",
+            name=function_data["name"],
+            description=f"Global function {function_data['name']}",
+            code=function_data.get("code"),
+            start_line=function_data.get("start_line"),
+            end_line=function_data.get("end_line"),
+        )
         chunks.append(function_chunk)
 
     # Формируем данные о React компонентах
     for component_data in parsed_data.get("react_components", []):
-        component_chunk = {
-            "id": generate_id(),
-            "type": "react_component",
-            "name": component_data["name"],
-            "description": f"React component: {component_data['name']}",
-            "code": component_data.get("code"),
-            "props": component_data.get("props", [])
-        }
+        component_chunk = ReactComponentChunk(
+            id=generate_id(relative_path, "react_component", component_data["name"], component_data.get("code")),
+            type="react_component",
+            name=component_data["name"],
+            description=f"React component: {component_data['name']}",
+            code=component_data.get("code"),
+            props=component_data.get("props", [])
+        )
         chunks.append(component_chunk)
 
     # Формируем данные о типах
     for type_data in parsed_data.get("types", []):
-        type_chunk = {
-            "id": generate_id(),
-            "type": "type",
-            "name": type_data["name"],
-            "description": f"Type {type_data['name']} ({type_data['kind']})",
-            "code": type_data.get("code"),
-        }
+        type_chunk = CodeChunk(
+            id=generate_id(relative_path, "type", type_data["name"], type_data.get("code")),
+            type="type",
+            name=type_data["name"],
+            description=f"Type {type_data['name']} ({type_data['kind']})",
+            code=type_data.get("code"),
+        )
         chunks.append(type_chunk)
 
     # Формируем данные о зависимостях
     imports = parsed_data.get("imports", [])
     if imports:
-        imports_chunk = {
-            "id": generate_id(),
-            "type": "dependencies",
-            "description": "List of imports",
-            "dependencies": imports,
-        }
+        imports_chunk = DependenciesChunk(
+            id=generate_id(relative_path, "dependencies", content=dumps(imports, sort_keys=True)),
+            type="dependencies",
+            description="List of imports",
+            dependencies=imports,
+        )
         chunks.append(imports_chunk)
 
     # Формируем данные об экспортах
     for export_data in parsed_data.get("exports", []):
-        export_chunk = {
-            "id": generate_id(),
-            "type": "export",
-            "name": export_data["name"],
-            "description": f"Export {export_data['name']}",
-            "code": export_data.get("code"),
-        }
+        export_chunk = CodeChunk(
+            id=generate_id(relative_path, "export", export_data["name"], export_data.get("code")),
+            type="export",
+            name=export_data["name"],
+            description=f"Export {export_data['name']}",
+            code=export_data.get("code"),
+        )
         chunks.append(export_chunk)
 
+    # Содержимое файла нужно только для детерминированного идентификатора
+    file_content = None
+    if get_id_mode() == "deterministic":
+        with open(file_path, 'rb') as file:
+            file_content = file.read()
+
     # Формируем итоговую структуру для файла
     file_metadata = {
-        "id": generate_id(),
+        "id": generate_id(relative_path, "file", relative_path, file_content),
         "type": "file",
         "name": file_name,
         "description": f"TS/TSX file: {file_name}",
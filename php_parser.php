@@ -103,10 +103,14 @@ class DependencyVisitor extends NodeVisitorAbstract {
     }
 }
 
-try {
-    // Получаем путь к анализируемому файлу из аргументов
-    $file = $argv[1];
+/**
+ * Разбирает PHP-файл и возвращает извлечённую структуру.
+ */
+function parseFile($file) {
     $code = file_get_contents($file);
+    if ($code === false) {
+        return ['error' => "Unable to read file: $file"];
+    }
 
     // Создаем парсер
     $parserFactory = new ParserFactory();
@@ -121,14 +125,54 @@ try {
     $traverser->addVisitor($visitor);
     $traverser->traverse($stmts);
 
-    // Вывод результатов в формате JSON
-    echo json_encode([
+    return [
         'namespace' => $visitor->namespace,
         'dependencies' => $visitor->dependencies,
         'classes' => $visitor->classes,
         'functions' => $visitor->functions
-    ], JSON_PRETTY_PRINT);
-} catch (PhpParser\Error $e) {
-    // Вывод ошибок парсинга
-    echo json_encode(['error' => $e->getMessage()]);
+    ];
+}
+
+/**
+ * Разбирает файл, превращая ошибки разбора в ['error' => ...].
+ */
+function parseFileSafe($file) {
+    try {
+        return parseFile($file);
+    } catch (PhpParser\Error $e) {
+        return ['error' => $e->getMessage()];
+    }
 }
+
+/**
+ * Кодирует результат в JSON (с ошибкой вместо результата, если его нельзя закодировать).
+ */
+function encodeResult($result, $flags = 0) {
+    $json = json_encode($result, $flags);
+    if ($json === false) {
+        $json = json_encode(['error' => json_last_error_msg()]);
+    }
+    return $json;
+}
+
+if (($argv[1] ?? null) === '--serve') {
+    // Постоянный режим: пути к файлам читаются из stdin построчно,
+    // на каждый путь выводится одна строка JSON
+    while (($line = fgets(STDIN)) !== false) {
+        $file = rtrim($line, "\r\n");
+        if ($file === '') {
+            continue;
+        }
+        try {
+            $result = parseFileSafe($file);
+        } catch (Throwable $e) {
+            $result = ['error' => $e->getMessage()];
+        }
+        echo encodeResult($result) . "\n";
+        fflush(STDOUT);
+    }
+    exit(0);
+}
+
+// Получаем путь к анализируемому файлу из аргументов и выводим результат в формате JSON
+echo encodeResult(parseFileSafe($argv[1]), JSON_PRETTY_PRINT);
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.suite import compare_results, summarize
+from parsers.python_parser import parse_python_structure
+
+
+class TestBenchmarkCorpus(unittest.TestCase):
+    def test_python_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = generate_corpus(tmp, "python", files=10, depth=3, classes_per_file=2, methods_per_class=3,
+                                     duplicate_ratio=0.2, seed=1)
+            again = generate_corpus(os.path.join(tmp, "again"), "python", files=10, depth=3, classes_per_file=2,
+                                    methods_per_class=3, duplicate_ratio=0.2, seed=1)
+            self.assertEqual((corpus["files"], corpus["duplicates"]), (10, 2))
+            self.assertEqual(corpus["paths"], again["paths"])
+
+            contents = []
+            for relative_path in corpus["paths"]:
+                self.assertEqual(len(relative_path.split(os.sep)), 4)  # Три уровня каталогов и файл
+                with open(os.path.join(tmp, relative_path), encoding="utf-8") as file:
+                    contents.append(file.read())
+            self.assertEqual(len(set(contents)), 8)
+
+            record = parse_python_structure(os.path.join(tmp, corpus["paths"][0]), tmp, contents[0])[0]
+            classes = [chunk for chunk in record["chunks"] if chunk["type"] == "class"]
+            self.assertEqual([len(chunk["methods"]) for chunk in classes], [3, 3])
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            generate_corpus("unused", "laravel")
+
+    def test_summary_and_compare(self):
+        summary = summarize([0.3, 0.1, 0.2])
+        self.assertEqual((summary["count"], summary["min"], summary["p50"], summary["max"]), (3, 0.1, 0.2, 0.3))
+        rows = compare_results({"types": {"python": {"parse": {"mean": 0.2}}}},
+                               {"types": {"python": {"parse": {"mean": 0.1}}}})
+        self.assertEqual(rows, [("types/python/parse/mean", 0.2, 0.1, 0.5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
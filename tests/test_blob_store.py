@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from formatters.blob_store import BlobStore, SpanResolver, is_span, iter_spans
+from parsers.chunk_model import FunctionChunk, PythonClassChunk
+
+SOURCE = "class Job:\n    def run(self):\n        return 1\n"
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source_root = os.path.join(self.tmp.name, "src")
+        self.blob_dir = os.path.join(self.tmp.name, "blobs")
+        os.makedirs(self.source_root)
+        with open(os.path.join(self.source_root, "job.py"), "w", encoding="utf-8") as file:
+            file.write(SOURCE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_record(self):
+        method = FunctionChunk(id="m", type="method", name="run", code="def run(self):\n        return 1",
+                               start_line=2, end_line=3)
+        class_chunk = PythonClassChunk(id="c", type="class", name="Job", code=SOURCE.rstrip("\n"),
+                                       start_line=1, end_line=3, methods=[method], attributes=[])
+        return {"id": "f", "type": "file", "code": "print('изменено')", "metadata": {"source": "job.py"},
+                "chunks": [class_chunk]}
+
+    def test_externalize_and_resolve(self):
+        store = BlobStore(self.blob_dir, self.source_root)
+        record = self.make_record()
+        expected = SpanResolver(self.blob_dir).resolve(record)
+        store.externalize(record)
+
+        class_chunk = record["chunks"][0]
+        self.assertTrue(is_span(class_chunk["code"]))
+        self.assertTrue(is_span(class_chunk["methods"][0]["code"]))
+        self.assertEqual(record["code"], "print('изменено')")  # Нет в тексте файла — остаётся строкой
+        self.assertEqual(store.written, 1)
+        self.assertEqual(store.inline_fallbacks, 1)
+        self.assertEqual(SpanResolver(self.blob_dir).resolve(record), expected)
+
+    def test_spans_only_record_skips_source(self):
+        store = BlobStore(self.blob_dir, self.source_root)
+        record = store.externalize(self.make_record())
+        record["code"] = None  # Запись из прошлой выгрузки: строк кода не осталось
+        os.remove(os.path.join(self.source_root, "job.py"))
+        with mock.patch("builtins.open", side_effect=AssertionError("source must not be read")):
+            self.assertIs(store.externalize(record), record)
+        self.assertTrue(is_span(record["chunks"][0]["code"]))
+
+    def test_prune_keeps_referenced_blobs(self):
+        store = BlobStore(self.blob_dir, self.source_root)
+        record = store.externalize(self.make_record())
+        stale = store.put(b"old version")
+
+        self.assertEqual(store.prune([record]), 1)
+        self.assertFalse(os.path.exists(store.get_path(stale)))
+        for span in iter_spans(record):
+            self.assertTrue(os.path.exists(store.get_path(span["blob"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
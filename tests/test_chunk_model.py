@@ -0,0 +1,47 @@
+import pickle
+import unittest
+
+from parsers.chunk_model import FunctionChunk, PythonClassChunk
+from utils.serializer import dumps
+
+
+class TestChunkModel(unittest.TestCase):
+    def make_class(self):
+        method = FunctionChunk(id="m", type="method", name="run", description="Method run", code="def run(): pass",
+                               start_line=2, end_line=2)
+        return PythonClassChunk(id="c", type="class", name="Job", description="Class definition: Job",
+                                code="class Job: ...", start_line=1, end_line=2, methods=[method], attributes=[])
+
+    def test_serializes_like_dict(self):
+        expected = {
+            "id": "c", "type": "class", "name": "Job", "description": "Class definition: Job",
+            "code": "class Job: ...", "start_line": 1, "end_line": 2,
+            "methods": [{"id": "m", "type": "method", "name": "run", "description": "Method run",
+                         "code": "def run(): pass", "start_line": 2, "end_line": 2}],
+            "attributes": [],
+        }
+        chunk = self.make_class()
+        self.assertEqual(dumps(chunk), dumps(expected))
+        self.assertEqual(dumps({"chunks": [chunk]}, indent=4), dumps({"chunks": [expected]}, indent=4))
+
+    def test_mapping_access(self):
+        chunk = self.make_class()
+        chunk["description"] = "Описание"
+        self.assertEqual(chunk["description"], "Описание")
+        self.assertEqual(chunk.get("qa", "нет"), "нет")
+        self.assertIn("methods", chunk)
+        self.assertEqual(list(chunk)[:3], ["id", "type", "name"])
+        with self.assertRaises(KeyError):
+            chunk["qa"] = []
+        with self.assertRaises(TypeError):
+            FunctionChunk(id="f", qa=[])
+
+    def test_pickle_round_trip(self):
+        chunk = self.make_class()
+        restored = pickle.loads(pickle.dumps(chunk))
+        self.assertEqual(restored.to_json(), chunk.to_json())
+        self.assertIsInstance(restored["methods"][0], FunctionChunk)
+
+
+if __name__ == "__main__":
+    unittest.main()
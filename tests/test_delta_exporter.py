@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from formatters.delta_exporter import write_delta
+from utils.common import generate_id
+
+
+class TestGenerateId(unittest.TestCase):
+    def test_deterministic_mode(self):
+        with mock.patch.dict(os.environ, {"ID_MODE": "deterministic", "PROJECT_PREFIX": "demo"}):
+            first = generate_id("app/models/User.php", "class", "User", "class User {}")
+            self.assertEqual(first, generate_id("app/models/User.php", "class", "User", "class User {}"))
+            self.assertNotEqual(first, generate_id("app/models/User.php", "class", "User", "class User { }"))
+            self.assertNotEqual(first, generate_id("app/models/Post.php", "class", "User", "class User {}"))
+
+    def test_uuid_mode(self):
+        with mock.patch.dict(os.environ, {"ID_MODE": "uuid"}):
+            self.assertNotEqual(generate_id("a.py", "file", "a.py", ""), generate_id("a.py", "file", "a.py", ""))
+
+
+class TestWriteDelta(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, source, code, timestamp="2024-01-01T00:00:00"):
+        return {
+            "id": f"id-{source}-{code}",
+            "type": "file",
+            "code": code,
+            "metadata": {"source": source, "timestamp": timestamp},
+            "chunks": [{"id": f"chunk-{source}-{code}", "name": "main"}],
+        }
+
+    def test_added_changed_removed(self):
+        previous_file = os.path.join(self.tmp.name, "previous.jsonl")
+        with open(previous_file, "w", encoding="utf-8") as file:
+            for record in [self.record("a.py", "1"), self.record("b.py", "1"), self.record("c.py", "1")]:
+                file.write(json.dumps(record) + "\n")
+
+        current = [
+            self.record("a.py", "1", timestamp="2024-02-01T00:00:00"),
+            self.record("b.py", "2"),
+            self.record("d.py", "1"),
+        ]
+        delta_file = os.path.join(self.tmp.name, "delta.jsonl")
+        stats = write_delta(previous_file, current, delta_file)
+
+        self.assertEqual(stats, {"added": 1, "changed": 1, "removed": 1, "unchanged": 1})
+        with open(delta_file, encoding="utf-8") as file:
+            delta = [json.loads(line) for line in file]
+        self.assertEqual([(item["op"], item["key"]) for item in delta],
+                         [("changed", "b.py"), ("added", "d.py"), ("removed", "c.py")])
+        self.assertEqual(delta[0]["previous_ids"], ["id-b.py-1", "chunk-b.py-1"])
+        self.assertIsNone(delta[2]["record"])
+
+
+if __name__ == "__main__":
+    unittest.main()
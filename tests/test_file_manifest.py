@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from utils.file_manifest import FileManifest
+
+
+class TestFileManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text, mtime=None):
+        path = os.path.join(self.root, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def test_scan_detects_added_changed_unchanged_removed(self):
+        for name in ("a.py", "b.py", "c.py", "d.py"):
+            self.write(name, name, mtime=1_000_000_000)
+        state = FileManifest().scan(self.root, ["a.py", "b.py", "c.py", "d.py"])[0]
+        FileManifest.build(state, {"a.py": {"s"}, "b.py": {"s"}, "c.py": {"s"}}).save(self.manifest_path)
+
+        previous = FileManifest.load(self.manifest_path)
+        self.assertEqual(sorted(previous.files), ["a.py", "b.py", "c.py"])  # d.py не дал записей
+        self.assertEqual(previous.get_scopes(), {"s"})
+
+        self.write("a.py", "a.py changed", mtime=1_000_000_000)
+        self.write("b.py", "b.py", mtime=2_000_000_000)  # Изменился только mtime
+        os.remove(os.path.join(self.root, "c.py"))
+        _, added, changed, unchanged, removed = previous.scan(self.root, ["a.py", "b.py", "d.py"], workers=2)
+
+        self.assertEqual(added, ["d.py"])
+        self.assertEqual(changed, ["a.py"])
+        self.assertEqual(unchanged, ["b.py"])
+        self.assertEqual(removed, ["c.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
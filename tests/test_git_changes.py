@@ -0,0 +1,29 @@
+import unittest
+
+from utils.git_changes import GitChanges
+
+
+class TestGitChanges(unittest.TestCase):
+    def test_parse_name_status(self):
+        output = "\0".join([
+            "M", "src/a.py",
+            "A", "src/new file.py",
+            "D", "src/old.py",
+            "R097", "src/b.py", "src/lib/b.py",
+            "C100", "src/c.py", "src/c_copy.py",
+        ]) + "\0"
+        changes = GitChanges.parse(output)
+
+        self.assertEqual(changes.modified, {"src/a.py", "src/new file.py", "src/c_copy.py"})
+        self.assertEqual(changes.deleted, {"src/old.py"})
+        self.assertEqual(changes.renamed, {"src/b.py": "src/lib/b.py"})
+        self.assertEqual(changes.get_removed_sources(), {"src/old.py", "src/b.py"})
+        self.assertEqual(changes.get_sources_to_process(),
+                         {"src/a.py", "src/new file.py", "src/c_copy.py", "src/lib/b.py"})
+
+    def test_parse_empty_output(self):
+        self.assertEqual(len(GitChanges.parse("")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
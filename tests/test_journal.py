@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from utils.journal import RunJournal
+
+
+class TestRunJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replay_keeps_only_completed_files(self):
+        journal = RunJournal(self.path)
+        journal.open()
+        journal.add_records("files", [{"id": "a", "metadata": {"source": "a.py"}}])
+        journal.mark_completed("a.py")
+        journal.add_records("files", [{"id": "b", "metadata": {"source": "b.py"}}])
+        journal.close()
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write('{"scope": "files", "rec')  # Оборванная строка
+
+        resumed = RunJournal(self.path)
+        records = resumed.replay()
+        self.assertEqual([(scope, entry["id"]) for scope, entry in records], [("files", "a")])
+        self.assertTrue(resumed.is_completed("a.py"))
+        self.assertFalse(resumed.is_completed("b.py"))
+
+        # Журнал обрезан до последнего завершённого файла и дописывается дальше
+        resumed.open(append=True)
+        resumed.add_records("files", [{"id": "b2", "metadata": {"source": "b.py"}}])
+        resumed.mark_completed("b.py")
+        resumed.close()
+        self.assertEqual([entry["id"] for _, entry in RunJournal(self.path).replay()], ["a", "b2"])
+
+        resumed.remove()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
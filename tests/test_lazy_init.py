@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = """
+import os
+import sys
+import main
+print(os.path.exists(main.OUTPUT_DIR))
+main.create_extractors()
+print(",".join(name for name in ("requests", "parsers.php_parser", "parsers.ts_parser",
+                                 "extractors.yii2_extractor", "extractors.bitrix_extractor")
+               if name in sys.modules))
+"""
+
+
+class TestLazyInit(unittest.TestCase):
+    def test_python_run_skips_unused_modules_and_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, PYTHONPATH=ROOT, SOURCE_DIR=tmp, PROJECT_TYPES="python", LLM_SERVER_URL="",
+                       OUTPUT_DIR=os.path.join(tmp, "out"), QUERY_CACHE_PATH=os.path.join(tmp, "cache.db"))
+            result = subprocess.run([sys.executable, "-c", CHECK], cwd=tmp, env=env,
+                                    capture_output=True, text=True, check=True)
+            output_created, loaded = result.stdout.split("\n")[:2]
+            self.assertEqual(output_created, "False")  # Импорт не создаёт директорию вывода
+            self.assertEqual(loaded, "")
+            self.assertFalse(os.path.exists(os.path.join(tmp, "cache.db")))
+            self.assertFalse(os.path.exists(os.path.join(tmp, "logs")))
+
+    def test_import_without_output_dir(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, PYTHONPATH=ROOT)
+            env.pop("OUTPUT_DIR", None)
+            subprocess.run([sys.executable, "-c", "import main"], cwd=tmp, env=env, capture_output=True, check=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
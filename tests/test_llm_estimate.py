@@ -0,0 +1,46 @@
+import os
+import unittest
+from unittest import mock
+
+from utils.llm_assist import LLMAssist
+from utils.llm_estimate import LLMCostEstimate, set_cost_estimate
+
+ENV = {"LLM_SERVER_URL": "http://llm.invalid/v1/chat/completions", "LLM_MODEL_NAME": "test",
+       "MAX_CONTEXT_TOKENS": "400", "USE_CACHE": "false"}
+
+
+class TestLLMCostEstimate(unittest.TestCase):
+    def setUp(self):
+        self.estimate = LLMCostEstimate(max_tokens=100, prompt_tokens_per_second=1000,
+                                        completion_tokens_per_second=10, request_overhead=0.5)
+        set_cost_estimate(self.estimate)
+        self.addCleanup(set_cost_estimate, None)
+
+    def test_counts_split_chunks_without_requests(self):
+        with mock.patch.dict(os.environ, ENV), mock.patch("utils.llm_assist.get_session") as get_session:
+            llm_assist = LLMAssist("python")
+            code = "x = 1\n" * 1000
+            description = llm_assist.process_code_chunks(code, "system", "user", kind="describe_file")
+            parts = len(llm_assist.split_into_chunks(code, "system", "user"))
+            llm_assist.describe_global_function("run", "def run():\n    pass", "big.py")
+
+        get_session.assert_not_called()
+        self.assertTrue(description.startswith("[dry-run "))
+        report = self.estimate.get_report()
+        self.assertGreaterEqual(parts, 3)
+        # Все части и консолидация результатов
+        self.assertEqual(report["requests_by_kind"]["describe_file"]["uncached"], parts + 1)
+        self.assertEqual(report["requests_by_kind"]["describe_global_function"]["requests"], 1)
+
+    def test_estimated_time(self):
+        self.estimate.add("class_qa", 1000, cached=False)
+        self.estimate.add("class_qa", 400, cached=True, completion_tokens=50)
+        report = self.estimate.get_report()
+        self.assertEqual(report["totals"]["cache_hit_rate"], 0.5)
+        self.assertEqual(report["totals"]["completion_tokens"], 50)
+        self.assertEqual(report["estimated_seconds"], 1.0 + 5.0 + 0.5)
+        self.assertEqual(report["estimated_seconds_upper_bound"], 1.0 + 10.0 + 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from utils.logger import ProgressLogger, parse_log_levels, truncate_payload
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_SCRIPT = """
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from utils import logger
+from utils.logger import configure_worker_logging, get_log_queue, setup_global_logger, stop_logging
+
+def work(index):
+    logging.getLogger("workers.formatters").warning(f"worker {index}")
+    return logger._listener is None  # Дочерний процесс не запускает собственный поток журнала
+
+if __name__ == "__main__":
+    setup_global_logger("workers", log_dir=sys.argv[1])
+    with ProcessPoolExecutor(max_workers=2, initializer=configure_worker_logging,
+                             initargs=(get_log_queue(),)) as executor:
+        print(all(executor.map(work, range(4))))
+    stop_logging()
+"""
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestLogger(unittest.TestCase):
+    def test_parse_log_levels(self):
+        self.assertEqual(parse_log_levels("llm=debug, extractors=WARNING,"),
+                         {"llm": logging.DEBUG, "extractors": logging.WARNING})
+        with self.assertRaises(ValueError):
+            parse_log_levels("llm=LOUD")
+
+    def test_truncate_payload(self):
+        self.assertEqual(truncate_payload("abc", limit=5), "abc")
+        self.assertEqual(truncate_payload("abcdefgh", limit=5), "abcde... [+3 символов]")
+
+    def test_worker_records_reach_parent_listener(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            script = os.path.join(tmp, "workers.py")
+            with open(script, "w", encoding="utf-8") as file:
+                file.write(WORKER_SCRIPT)
+            log_dir = os.path.join(tmp, "logs")
+            completed = subprocess.run([sys.executable, script, log_dir], env=dict(os.environ, PYTHONPATH=ROOT),
+                                       capture_output=True, text=True, check=True, timeout=60)
+            self.assertEqual(completed.stdout.strip(), "True")
+            log_files = os.listdir(log_dir)
+            self.assertEqual(len(log_files), 1)
+            with open(os.path.join(log_dir, log_files[0]), encoding="utf-8") as file:
+                lines = file.read().splitlines()
+        self.assertEqual(sorted(line.rsplit(" - ", 1)[1] for line in lines), [f"worker {i}" for i in range(4)])
+
+    def test_progress_is_sampled_at_info(self):
+        logger = logging.getLogger("test_progress_logger")
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        handler = _ListHandler()
+        logger.addHandler(handler)
+
+        progress = ProgressLogger(logger, "Test", interval=3)
+        for index in range(7):
+            progress.tick(f"file_{index}.py")
+
+        info = [record.getMessage() for record in handler.records if record.levelno == logging.INFO]
+        self.assertEqual(info, ["Test: обработано 3 (последний: file_2.py)",
+                                "Test: обработано 6 (последний: file_5.py)"])
+        self.assertEqual(sum(record.levelno == logging.DEBUG for record in handler.records), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from formatters.json_manager import JSONManager
+from parsers.chunk_model import FunctionChunk
+from utils.memory_report import MemoryReporter, measure_retained
+from utils.serializer import loads
+
+
+class TestMemoryReport(unittest.TestCase):
+    def test_measure_retained_splits_code(self):
+        code = "def run():\n    return 1\n" * 10
+        chunk = FunctionChunk(id="f", type="function", name="run", code=code, start_line=1, end_line=20)
+        records = [{"id": "r", "code": code, "name": "module.py", "chunks": [chunk]}]
+        retained = measure_retained(records)
+        self.assertEqual(retained["records"], 1)
+        self.assertEqual(retained["code"], sys.getsizeof(code))  # Общая строка учитывается один раз
+        self.assertGreater(retained["containers"], sys.getsizeof(records))
+        self.assertEqual(retained["total"], sum(retained[key] for key in ("code", "strings", "containers", "other")))
+
+    def test_checkpoints(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            json_manager = JSONManager(output_directory=tmp, project_prefix="test")
+            reporter = MemoryReporter(top=5)
+            reporter.start()
+            try:
+                reporter.checkpoint("start")
+                records = [{"id": str(index), "code": str(index) * 1000} for index in range(50)]
+                json_manager.add_data("python_files", records)
+                reporter.checkpoint("after", json_manager)
+            finally:
+                reporter.stop()
+            path = os.path.join(tmp, "test_memory.json")
+            reporter.save(path)
+            with open(path, encoding="utf-8") as file:
+                report = loads(file.read())
+
+        start, after = report["checkpoints"]
+        self.assertNotIn("top_growth", start)
+        self.assertLessEqual(len(after["top_sites"]), 5)
+        self.assertTrue(after["top_growth"])
+        self.assertEqual(after["scopes"]["python_files"]["records"], 50)
+        self.assertGreaterEqual(after["scopes"]["python_files"]["code"], 50 * 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
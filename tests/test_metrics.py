@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from utils.metrics import MetricsRegistry
+from utils.serializer import loads
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.inc("query_cache_lookups_total", result="hit")
+        self.registry.inc("query_cache_lookups_total", 2, result="miss")
+        for value in (0.002, 0.02, 3.0):
+            self.registry.observe("llm_request_seconds", value, model="qwen")
+
+    def test_report(self):
+        report = self.registry.get_report()
+        self.assertEqual(self.registry.total("query_cache_lookups_total"), 3)
+        self.assertEqual(self.registry.get_counter("query_cache_lookups_total", result="miss"), 2)
+        series = report["histograms"]["llm_request_seconds"][0]
+        self.assertEqual(series["labels"], {"model": "qwen"})
+        self.assertEqual((series["count"], series["max"], series["p50"]), (3, 3.0, 0.05))
+
+    def test_prometheus_textfile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.prom")
+            self.registry.write_prometheus(path)
+            with open(path, encoding="utf-8") as file:
+                lines = file.read().splitlines()
+            report_path = os.path.join(tmp, "metrics.json")
+            self.registry.save_report(report_path, extra={"summary": {"files": 1}})
+            with open(report_path, encoding="utf-8") as file:
+                self.assertEqual(loads(file.read())["summary"], {"files": 1})
+
+        self.assertIn("# TYPE project2jsonl_query_cache_lookups_total counter", lines)
+        self.assertIn('project2jsonl_query_cache_lookups_total{result="miss"} 2', lines)
+        self.assertIn('project2jsonl_llm_request_seconds_bucket{model="qwen",le="0.005"} 1', lines)
+        self.assertIn('project2jsonl_llm_request_seconds_bucket{model="qwen",le="+Inf"} 3', lines)
+        self.assertIn('project2jsonl_llm_request_seconds_count{model="qwen"} 3', lines)
+
+    def test_timed_iter_counts_items(self):
+        self.assertEqual(list(self.registry.timed_iter(range(3), "discovery", extractor="Python")), [0, 1, 2])
+        self.assertEqual(self.registry.get_counter("discovery_items_total", extractor="Python"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from formatters.json_manager import JSONManager
+from formatters.record_index import RecordIndex
+from formatters.shard_manifest import plan_balanced_shards
+from utils.serializer import loads
+from formatters.output_writers import (
+    iter_jsonl_lines,
+    iter_jsonl_lines_parallel,
+    open_jsonl_writer,
+    read_block_table,
+)
+
+
+class TestBlockGzipWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lines = [f'{{"id": {i}, "code": "{"x" * (i % 50)}"}}' for i in range(2000)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_blocks_are_record_aligned_and_readable(self):
+        path = os.path.join(self.tmp.name, "data.jsonl")
+        with open_jsonl_writer(path, compression="gzip", block_size=4096) as writer:
+            for line in self.lines:
+                writer.write(line + "\n")
+
+        self.assertEqual(writer.path, path + ".gz")
+        self.assertGreater(len(read_block_table(writer.path)), 1)
+
+        # Обычный gzip читает все блоки подряд
+        with gzip.open(writer.path, "rt", encoding="utf-8") as file:
+            self.assertEqual(file.read().splitlines(), self.lines)
+
+        self.assertEqual(list(iter_jsonl_lines(writer.path)), self.lines)
+        self.assertEqual(list(iter_jsonl_lines_parallel(writer.path, workers=3)), self.lines)
+
+    def test_summary_rotation_uses_compressed_size(self):
+        manager = JSONManager(output_directory=self.tmp.name, project_prefix="test",
+                              compression="gzip", compression_block_size=2048)
+        manager.add_data("python_files", [
+            {"id": str(i), "metadata": {"source": f"f{i}.py"}, "code": "print('hello')\n" * 20}
+            for i in range(300)
+        ])
+        manager.save_all(group_by="metadata.source", max_summary_file_size=8192)
+
+        shards = sorted(f for f in os.listdir(self.tmp.name) if f.startswith("test_python_summary_"))
+        self.assertTrue(all(f.endswith(".jsonl.gz") for f in shards))
+        total = sum(len(list(iter_jsonl_lines(os.path.join(self.tmp.name, f)))) for f in shards)
+        self.assertEqual(total, 300)
+        # Несжатые данные заняли бы десятки шардов, сжатые — единицы
+        self.assertLess(len(shards), 10)
+
+    def test_failed_write_keeps_previous_file(self):
+        path = os.path.join(self.tmp.name, "data.jsonl")
+        for compression in (None, "gzip"):
+            with self.subTest(compression=compression):
+                with open_jsonl_writer(path, compression=compression) as writer:
+                    writer.write('{"id": 1}\n')
+                with self.assertRaises(ValueError):
+                    with open_jsonl_writer(path, compression=compression) as failed:
+                        failed.write('{"id": 2}\n')
+                        raise ValueError("interrupted")
+                self.assertEqual(list(iter_jsonl_lines(writer.path)), ['{"id": 1}'])
+                self.assertFalse(os.path.exists(failed.path + ".tmp"))
+
+    def test_scoped_save_after_removing_source(self):
+        manager = JSONManager(output_directory=self.tmp.name, project_prefix="test")
+        manager.add_data("python_files", [{"id": str(i), "metadata": {"source": f"f{i}.py"}} for i in range(30)])
+        manager.add_data("react_ts", [{"id": "r", "metadata": {"source": "app.ts"}}])
+        manager.save_all(max_summary_file_size=200)
+        react_mtime = os.path.getmtime(os.path.join(self.tmp.name, "test_react_ts.jsonl"))
+
+        for i in range(1, 30):
+            self.assertEqual(manager.remove_source(f"f{i}.py"), {"python_files"})
+        manager.save_all(max_summary_file_size=200, scopes={"python_files"})
+
+        shards = sorted(f for f in os.listdir(self.tmp.name) if f.startswith("test_python_summary_"))
+        self.assertEqual(shards, ["test_python_summary_0.jsonl"])
+        self.assertEqual(os.path.getmtime(os.path.join(self.tmp.name, "test_react_ts.jsonl")), react_mtime)
+
+
+class TestShardManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_plan_balanced_shards(self):
+        self.assertEqual(plan_balanced_shards([1] * 10, 3), [(0, 3), (3, 7), (7, 10)])
+        self.assertEqual(plan_balanced_shards([10, 1, 1, 1, 1, 10], 2), [(0, 3), (3, 6)])
+        self.assertEqual(plan_balanced_shards([5], 4), [(0, 1)])
+
+    def test_manifest_for_balanced_summary(self):
+        manager = JSONManager(output_directory=self.tmp.name, project_prefix="test")
+        manager.add_data("python_files", [
+            {"id": str(i), "metadata": {"source": f"f{i}.py"}, "code": "x" * (i * 10)} for i in range(10)
+        ])
+        manager.save_all(group_by="metadata.source", shard_balance="records", shard_count=4)
+
+        with open(os.path.join(self.tmp.name, "test_python_summary.manifest.json"), encoding="utf-8") as file:
+            manifest = loads(file.read())
+
+        self.assertEqual(manifest["balance"], "records")
+        self.assertEqual(manifest["records"], 10)
+        self.assertEqual([shard["records"] for shard in manifest["shards"]], [3, 2, 3, 2])
+        self.assertEqual(manifest["shards"][0]["first_source"], "f0.py")
+        self.assertEqual(manifest["shards"][-1]["last_source"], "f9.py")
+        for shard in manifest["shards"]:
+            path = os.path.join(self.tmp.name, shard["file"])
+            self.assertEqual(os.path.getsize(path), shard["bytes"])
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, shard["json_file"])))
+
+
+class TestRecordIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.records = [
+            {
+                "id": f"file-{i}",
+                "metadata": {"source": f"pkg/mod{i}.py"},
+                "chunks": [{"id": f"class-{i}", "name": f"Class{i}", "methods": [{"id": f"m-{i}", "name": "run"}]}],
+                "code": "значение " * i,
+            }
+            for i in range(500)
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_plain_and_compressed(self):
+        for compression in (None, "gzip"):
+            with self.subTest(compression=compression):
+                output_dir = os.path.join(self.tmp.name, compression or "plain")
+                manager = JSONManager(output_directory=output_dir, project_prefix="test",
+                                      compression=compression, compression_block_size=4096)
+                manager.add_data("python_files", self.records)
+                manager.save_all(max_summary_file_size=20000)
+
+                for index_name in ("test_python_files.idx", "test_python_summary.idx"):
+                    with RecordIndex(os.path.join(output_dir, index_name)) as index:
+                        self.assertEqual(index.get("file-321"), self.records[321])
+                        self.assertEqual(index.get("pkg/mod7.py", kind="source"), self.records[7])
+                        self.assertEqual(index.get("m-42"), self.records[42])
+                        self.assertEqual(index.get("Class9.run", kind="name"), self.records[9])
+                        self.assertIsNone(index.get("missing"))
+
+    def test_binary_search_finds_every_key(self):
+        names = ["a", "a.b", "a\x01", "a b", "Ж", "z" * 300, ""]
+        records = [
+            {"id": f"r-{i}", "metadata": {"source": f"src/{i % 3}.py"}, "chunks": [{"name": names[i % len(names)]}]}
+            for i in range(60)
+        ]
+        output_dir = os.path.join(self.tmp.name, "keys")
+        manager = JSONManager(output_directory=output_dir, project_prefix="test")
+        manager.add_data("python_files", records)
+        manager.save_all()
+
+        with RecordIndex(os.path.join(output_dir, "test_python_files.idx")) as index:
+            for name in names[:-1]:
+                expected = [record for record in records if record["chunks"][0]["name"] == name]
+                self.assertEqual(index.get_all(name, kind="name"), expected, name)
+            self.assertEqual(len(index.lookup("src/1.py", kind="source")), 20)
+            self.assertEqual(index.get("r-0"), records[0])
+            self.assertEqual(index.get("r-59"), records[59])
+            for missing in ("", "a.", "r-", "r-6a", "zz"):
+                self.assertEqual(index.lookup(missing), [], missing)
+
+
+if __name__ == "__main__":
+    unittest.main()
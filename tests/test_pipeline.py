@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+
+from utils.pipeline import Pipeline, Stage
+
+
+class TestPipeline(unittest.TestCase):
+    def test_results_keep_source_order(self):
+        def slow_double(value):
+            time.sleep((value % 5) / 1000)
+            return value * 2
+
+        results = []
+        pipeline = Pipeline([
+            Stage("double", slow_double, workers=4, queue_size=2),
+            Stage("filter", lambda value: None if value % 3 == 0 else value, workers=2, queue_size=2),
+        ])
+        pipeline.run(range(100), results.append)
+
+        self.assertEqual(results, [value * 2 for value in range(100) if (value * 2) % 3])
+        metrics = pipeline.get_metrics()
+        self.assertEqual(metrics["double"]["processed"], 100)
+        self.assertEqual(metrics["filter"]["dropped"], 34)
+
+    def test_bounded_queue_limits_items_in_flight(self):
+        started = []
+        release = threading.Event()
+
+        def blocked(value):
+            release.wait()
+            return value
+
+        def source():
+            for value in range(50):
+                started.append(value)
+                yield value
+
+        pipeline = Pipeline([Stage("slow", blocked, workers=1, queue_size=2)], output_queue_size=1)
+        thread = threading.Thread(target=pipeline.run, args=(source(), lambda value: None))
+        thread.start()
+        time.sleep(0.2)
+        # В работе один элемент, два в очереди и один ожидает места в ней
+        self.assertLessEqual(len(started), 4)
+        release.set()
+        thread.join(5)
+        self.assertEqual(len(started), 50)
+
+    def test_window_bounds_reorder_buffer(self):
+        def enrich(value):
+            if value == 0:
+                time.sleep(0.5)
+            return value
+
+        results = []
+        pipeline = Pipeline([Stage("enrich", enrich, workers=4, queue_size=4)], output_queue_size=4, window=8)
+        pipeline.run(range(500), results.append)
+
+        self.assertEqual(results, list(range(500)))
+        self.assertLessEqual(pipeline.reorder_max, pipeline.window)
+
+    def test_stage_error_is_raised(self):
+        def fail(value):
+            if value == 10:
+                raise ValueError("broken")
+            return value
+
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("fail", fail, workers=2)]).run(range(1000), lambda value: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.profiler import RunProfiler, get_profile_paths, profile_bucket, profile_file
+
+
+def wait_for_llm():
+    with profile_bucket("llm_wait"):
+        time.sleep(0.1)
+
+
+class TestRunProfiler(unittest.TestCase):
+    def test_buckets_and_collapsed_stacks(self):
+        profiler = RunProfiler(interval=0.002)
+        profiler.start()
+        try:
+            worker = threading.Thread(target=wait_for_llm, name="pipeline-enrich-1")
+            worker.start()
+            worker.join()
+        finally:
+            profiler.stop()
+
+        self.assertEqual(profiler.bucket_calls["llm_wait"], 1)
+        self.assertGreaterEqual(profiler.bucket_seconds["llm_wait"], 0.1)
+        bucket_stacks = [stack for stack in profiler.stacks if stack.endswith("[llm_wait]")]
+        self.assertTrue(bucket_stacks)
+        self.assertTrue(bucket_stacks[0].startswith("pipeline-enrich-1;"))
+        self.assertIn("wait_for_llm", profiler.render_report(limit=20))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = get_profile_paths(tmp, "project")
+            profiler.save(paths)
+            with open(paths["collapsed"], encoding="utf-8") as file:
+                line = file.readline()
+            self.assertTrue(line.rsplit(" ", 1)[1].strip().isdigit())
+            self.assertTrue(os.path.exists(paths["stats"]))
+
+    def test_sampled_files(self):
+        profiler = RunProfiler(sample_rate=0.5)
+        paths = [f"app/module_{index}.py" for index in range(200)]
+        sampled = [path for path in paths if profiler.is_sampled(path)]
+        self.assertTrue(60 < len(sampled) < 140)
+        self.assertEqual(sampled, [path for path in paths if RunProfiler(sample_rate=0.5).is_sampled(path)])
+
+        profiler.start()
+        try:
+            for path in sampled[:3] + [path for path in paths if path not in sampled][:3]:
+                with profile_file(path):
+                    sum(range(1000))
+        finally:
+            profiler.stop()
+        self.assertEqual(len(profiler.files), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from utils.qa_manager import QAManager
+from utils.serializer import loads
+
+
+class TestQAManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        env = {"OUTPUT_DIR": self.tmp.name, "PROJECT_PREFIX": "test", "OUTPUT_COMPRESSION": "", "QA_FLUSH_EVERY": "2"}
+        with mock.patch.dict(os.environ, env):
+            QAManager._instance = None
+            self.qa_manager = QAManager()
+        self.path = os.path.join(self.tmp.name, "test_qa_global.jsonl")
+
+    def tearDown(self):
+        self.qa_manager.clear_qa()
+        QAManager._instance = None
+        self.tmp.cleanup()
+
+    def read_lines(self, path):
+        with open(path, encoding="utf-8") as file:
+            return [loads(line) for line in file]
+
+    def test_streams_and_suppresses_duplicates(self):
+        self.assertTrue(self.qa_manager.add_qa("Что делает run?", "Запускает."))
+        self.assertFalse(self.qa_manager.add_qa("Что делает run?", "Запускает.", context="другой контекст"))
+        self.assertTrue(self.qa_manager.add_qa("Что делает run?", "Останавливает."))
+        # Две пары уже сброшены во временный файл, целевой появляется при сохранении
+        self.assertEqual(len(self.read_lines(self.path + ".tmp")), 2)
+        self.assertFalse(os.path.exists(self.path))
+
+        self.qa_manager.save_to_jsonl()
+        self.assertEqual([entry["answer"] for entry in self.read_lines(self.path)], ["Запускает.", "Останавливает."])
+        self.assertEqual(self.qa_manager.get_stats()["duplicates"], 1)
+
+    def test_concurrent_workers(self):
+        def worker():
+            for index in range(200):
+                self.qa_manager.add_qa(f"Вопрос {index}", "Ответ")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.qa_manager.save_to_jsonl()
+
+        self.assertEqual(len(self.read_lines(self.path)), 200)
+        self.assertEqual(self.qa_manager.get_stats()["duplicates"], 600)
+
+    def test_second_save_keeps_earlier_pairs(self):
+        self.qa_manager.add_qa("Вопрос 1", "Ответ")
+        self.qa_manager.save_to_jsonl()
+        self.qa_manager.add_qa("Вопрос 1", "Ответ")
+        self.qa_manager.add_qa("Вопрос 2", "Ответ")
+        self.qa_manager.save_to_jsonl()
+        self.assertEqual([entry["question"] for entry in self.read_lines(self.path)], ["Вопрос 1", "Вопрос 2"])
+
+    def test_remove_keeps_pairs_still_referenced(self):
+        self.qa_manager.add_qa("Вопрос 1", "Ответ")
+        self.qa_manager.add_qa("Вопрос 2", "Ответ")
+        self.qa_manager.save_to_jsonl()
+        self.qa_manager.add_qa("Вопрос 2", "Ответ")  # Та же пара в другом классе
+        self.qa_manager.add_qa("Вопрос 3", "Ответ")
+
+        self.assertEqual(self.qa_manager.remove_qa([("Вопрос 2", "Ответ")]), 0)
+        self.assertEqual(self.qa_manager.remove_qa([("Вопрос 1", "Ответ"), ("Вопрос 2", "Ответ")]), 2)
+        self.qa_manager.save_to_jsonl()
+        self.assertEqual([entry["question"] for entry in self.read_lines(self.path)], ["Вопрос 3"])
+        self.assertEqual(self.qa_manager.get_stats()["written"], 1)
+
+        self.assertTrue(self.qa_manager.add_qa("Вопрос 1", "Ответ"))
+
+    def test_clear_discards_unsaved_file(self):
+        self.qa_manager.add_qa("Вопрос", "Ответ")
+        self.qa_manager.clear_qa()
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        self.qa_manager.save_to_jsonl()
+        self.assertEqual(self.read_lines(self.path), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+from parsers import qa_rules
+from parsers.chunk_model import MethodChunk, PhpClassChunk, PhpPropertyChunk
+from parsers.php_parser import get_class_qa
+
+
+class FakeLLMAssist:
+    def __init__(self):
+        self.kinds = []
+
+    def query(self, user_message, temperature=0.5, kind="query"):
+        self.kinds.append(kind)
+        return f"Ответ LLM ({kind})"
+
+
+def make_class_chunk():
+    methods = [
+        MethodChunk(id="m1", type="method", name="run", description="Запускает задачу.", code="",
+                    start_line=10, end_line=20, modifiers=["public"]),
+        MethodChunk(id="m2", type="method", name="stop", description="Останавливает задачу.", code="",
+                    start_line=22, end_line=25, modifiers=["protected", "static"]),
+    ]
+    properties = [PhpPropertyChunk(id="p1", type="int", name="timeout", description="Property timeout in class Task",
+                                   modifiers=["private"], default_value="30")]
+    return PhpClassChunk(id="c", type="class", name="Task", description="Задача.", code="", qa=None,
+                         methods=methods, properties=properties)
+
+
+class TestQARules(unittest.TestCase):
+    def test_structural_answers_skip_llm(self):
+        llm_assist = FakeLLMAssist()
+        with mock.patch.object(qa_rules, "STRUCTURAL_QA", True):
+            qa = get_class_qa(llm_assist, make_class_chunk(), register=False)
+        answers = {entry["question"]: entry["answer"] for entry in qa}
+
+        self.assertEqual(answers["В каких строках определён метод stop в классе Task?"],
+                         "Метод stop в классе Task определён в строках 22–25.")
+        self.assertEqual(answers["Какое значение по умолчанию у свойства timeout в классе Task?"],
+                         "Значение по умолчанию свойства timeout в классе Task: 30.")
+        self.assertIn("- run: Запускает задачу.", answers["Какие методы предоставляет класс Task и как они работают?"])
+        self.assertEqual(answers["Какие модификаторы используются в свойствах и методах класса Task?"],
+                         "В свойствах и методах класса Task используются модификаторы: private, protected, public, static.")
+        # К LLM уходят только вопросы о назначении: класс, свойства, свойство и два метода
+        self.assertEqual(llm_assist.kinds, ["class_qa"] * 5)
+        self.assertEqual(answers["Какие свойства есть у класса Task и для чего они используются?"],
+                         "Ответ LLM (class_qa)")
+        self.assertEqual(len(qa), 12)
+
+    def test_disabled_and_paraphrase(self):
+        llm_assist = FakeLLMAssist()
+        with mock.patch.object(qa_rules, "STRUCTURAL_QA", False):
+            get_class_qa(llm_assist, make_class_chunk(), register=False)
+        self.assertEqual(llm_assist.kinds, ["class_qa"] * 12)
+
+        llm_assist = FakeLLMAssist()
+        with mock.patch.object(qa_rules, "STRUCTURAL_QA", True), \
+                mock.patch.object(qa_rules, "STRUCTURAL_QA_PARAPHRASE", True):
+            get_class_qa(llm_assist, make_class_chunk(), register=False)
+        self.assertEqual(llm_assist.kinds.count("qa_paraphrase"), 7)
+
+    def test_members_without_descriptions(self):
+        chunk = make_class_chunk()
+        self.assertIsNone(qa_rules.answer_class_members("Task", chunk["properties"], "properties"))
+        chunk["properties"][0]["description"] = None
+        self.assertIsNone(qa_rules.answer_class_members("Task", chunk["properties"], "properties"))
+        self.assertEqual(qa_rules.answer_class_members("Task", [], "methods"), "У класса Task нет методов.")
+        # Описания-заглушки парсера не считаются описаниями
+        chunk["methods"][0]["description"] = "Method run in class Task"
+        self.assertIsNone(qa_rules.answer_class_members("Task", chunk["methods"], "methods"))
+
+
+if __name__ == "__main__":
+    unittest.main()
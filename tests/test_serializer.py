@@ -0,0 +1,45 @@
+import io
+import json
+import unittest
+
+from utils.serializer import StdlibBackend, create_backend
+
+
+class TestSerializer(unittest.TestCase):
+    def setUp(self):
+        self.sample = {
+            "id": "1",
+            "name": "Класс",
+            "code": "<?php\n echo \"привет\";",
+            "metadata": {"source": "a/b.php", "size": 12, "ratio": 0.5, "flags": [True, False, None]},
+        }
+
+    def test_dumps_matches_stdlib(self):
+        for backend in (StdlibBackend(), create_backend("auto")):
+            with self.subTest(backend=backend.name):
+                self.assertEqual(backend.dumps(self.sample), json.dumps(self.sample, ensure_ascii=False))
+                self.assertEqual(
+                    backend.dumps(self.sample, ensure_ascii=True, sort_keys=True),
+                    json.dumps(self.sample, sort_keys=True),
+                )
+
+    def test_dump_matches_stdlib(self):
+        for backend in (StdlibBackend(), create_backend("auto")):
+            with self.subTest(backend=backend.name):
+                buffer = io.StringIO()
+                backend.dump([self.sample], buffer, indent=4)
+                self.assertEqual(buffer.getvalue(), json.dumps([self.sample], ensure_ascii=False, indent=4))
+
+    def test_loads_roundtrip(self):
+        backend = create_backend("auto")
+        line = json.dumps(self.sample, ensure_ascii=False)
+        self.assertEqual(backend.loads(line), self.sample)
+        self.assertEqual(backend.loads(line.encode("utf-8")), self.sample)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            create_backend("missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
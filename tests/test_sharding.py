@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from formatters.json_manager import JSONManager
+from utils.sharding import (ShardOrder, get_shard_info_path, hash_shard, iter_merged_records, parse_shard_spec,
+                            plan_size_balanced_shards)
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_shard_spec(self):
+        self.assertEqual(parse_shard_spec("2/4"), (1, 4))
+        for spec in ("0/4", "5/4", "x/2", "1"):
+            with self.assertRaises(ValueError):
+                parse_shard_spec(spec)
+
+    def test_assignment_is_stable_and_balanced(self):
+        self.assertEqual(hash_shard("src/a.py", 8), hash_shard("src/a.py", 8))
+        assignment = plan_size_balanced_shards({"a": 100, "b": 60, "c": 50, "d": 10}, 2)
+        loads = [sum(size for path, size in {"a": 100, "b": 60, "c": 50, "d": 10}.items() if assignment[path] == index)
+                 for index in range(2)]
+        self.assertEqual(sorted(loads), [110, 110])
+
+    def test_merge_restores_single_host_order(self):
+        files = ["a.py", "b.py", "c.py", "d.py"]
+        positions = {path: [number] for number, path in enumerate(files)}
+        owners = {"a.py": 1, "b.py": 0, "c.py": 1, "d.py": 0}
+
+        shard_dirs = []
+        for index in range(2):
+            shard_dir = os.path.join(self.tmp.name, f"shard{index}")
+            manager = JSONManager(output_directory=shard_dir, project_prefix="p", write_index=False)
+            order = ShardOrder(index, 2, "hash", {path: positions[path] for path in files if owners[path] == index})
+            manager.add_sink(order)
+            for path in files:
+                if owners[path] == index:
+                    scope = "tests" if path == "d.py" else "files"
+                    manager.add_data(scope, [{"id": path, "metadata": {"source": path}}])
+            manager.save_all()
+            order.save(get_shard_info_path(shard_dir, "p"))
+            shard_dirs.append(shard_dir)
+
+        merged = [(scope, entry["id"]) for scope, entry in iter_merged_records(shard_dirs, "p")]
+        self.assertEqual(merged, [("files", "a.py"), ("files", "b.py"), ("files", "c.py"), ("tests", "d.py")])
+
+        with self.assertRaises(ValueError):
+            list(iter_merged_records(shard_dirs[:1], "p"))
+
+
+if __name__ == "__main__":
+    unittest.main()
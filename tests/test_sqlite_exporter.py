@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from formatters.sqlite_exporter import SQLiteExporter
+
+
+def make_record(answer="Запускает задачу."):
+    return {
+        "id": "file-1",
+        "name": "Task.php",
+        "code": "<?php class Task {}",
+        "description": "Файл задачи.",
+        "metadata": {"source": "src/Task.php", "file_type": "php"},
+        "chunks": [{
+            "id": "class-1", "type": "class", "name": "Task", "description": "Фоновая задача.", "code": "class Task {}",
+            "methods": [{"id": "method-1", "type": "method", "name": "run", "description": "Выполняет очередь.",
+                         "code": "function run() {}", "start_line": 2, "end_line": 4, "modifiers": ["public"]}],
+            "qa": [{"question": "Что делает run?", "answer": answer}],
+        }, {
+            "id": "function-1", "type": "function", "name": "helper", "description": "Вспомогательная функция.",
+            "code": "function helper() {}", "start_line": 6, "end_line": 7,
+        }],
+    }
+
+
+class TestSQLiteExporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "project.sqlite")
+        self.exporter = SQLiteExporter(self.db_path)
+
+    def tearDown(self):
+        self.exporter.close()
+        self.tmp.cleanup()
+
+    def count(self, table):
+        self.exporter.flush()
+        return self.exporter.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_database_is_created_on_first_records(self):
+        with open(self.db_path, "w") as file:
+            file.write("previous run")
+        other = SQLiteExporter(self.db_path)
+        other.close()
+        with open(self.db_path) as file:
+            self.assertEqual(file.read(), "previous run")
+
+        os.remove(self.db_path)
+        self.exporter.add_records("php_files", [make_record()])
+        self.assertTrue(os.path.exists(self.db_path))
+
+    def test_schema_and_search(self):
+        self.exporter.add_records("php_files", [make_record()])
+        for table, expected in (("files", 1), ("classes", 1), ("methods", 1), ("functions", 1), ("qa", 1)):
+            self.assertEqual(self.count(table), expected, table)
+
+        if self.exporter.fts_enabled:
+            self.assertEqual(self.exporter.search("очередь"), [("method", "method-1", "Task.run")])
+            self.assertEqual(self.exporter.search("Task")[0][0], "class")
+
+    def test_re_add_replaces_rows(self):
+        self.exporter.add_records("php_files", [make_record()])
+        self.exporter.flush()
+        self.exporter.add_records("php_files", [make_record(answer="Запускает задачу заново.")])
+
+        self.assertEqual(self.count("qa"), 1)
+        self.assertEqual(self.exporter.conn.execute("SELECT answer FROM qa").fetchone()[0], "Запускает задачу заново.")
+        self.assertEqual(self.count("methods"), 1)
+        if self.exporter.fts_enabled:
+            self.assertEqual(self.count("search"), 4)
+
+    def test_re_add_within_batch_keeps_last(self):
+        self.exporter.add_records("php_files", [make_record()])
+        self.exporter.add_records("php_files", [make_record(answer="Запускает задачу заново.")])
+
+        self.assertEqual(self.count("files"), 1)
+        self.assertEqual(self.exporter.conn.execute("SELECT answer FROM qa").fetchone()[0], "Запускает задачу заново.")
+        self.assertEqual(self.count("methods"), 1)
+        if self.exporter.fts_enabled:
+            self.assertEqual(self.count("search"), 4)
+            self.assertEqual(self.exporter.search("\"Файл задачи\""), [("file", "file-1", "src/Task.php")])
+
+    def test_remove_source(self):
+        self.exporter.add_records("php_files", [make_record()])
+        self.exporter.remove_source("src/Task.php")
+
+        for table in ("files", "classes", "methods", "functions", "qa"):
+            self.assertEqual(self.count(table), 0, table)
+        if self.exporter.fts_enabled:
+            self.assertEqual(self.count("search"), 0)
+            self.assertEqual(self.exporter.search("очередь"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
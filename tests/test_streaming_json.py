@@ -0,0 +1,152 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from formatters import json_formatter
+from formatters.json_formatter import jsonl_to_human_readable_json
+from formatters.streaming_json import iter_merged_groups, spill_sorted_runs, write_grouped_json
+
+
+def reference_grouped_json(records, group_by):
+    """Прежняя реализация JSONManager._save_json: группировка в словарь и json.dump."""
+    grouped_data = {}
+    for chunk in records:
+        group_key = "unknown_group"
+        if group_by:
+            try:
+                group_key = chunk
+                for part in group_by.split('.'):
+                    group_key = group_key.get(part)
+                    if group_key is None:
+                        raise KeyError(f"Key '{group_by}' not found in chunk.")
+            except (KeyError, AttributeError):
+                group_key = "unknown_group"
+        if group_key not in grouped_data:
+            grouped_data[group_key] = {"group_key": group_key, "items": []}
+        grouped_data[group_key]["items"].append(chunk)
+    if not grouped_data:
+        grouped_data = {"unknown_group": []}
+    output_data = grouped_data if group_by else grouped_data["unknown_group"]
+    return json.dumps(output_data, ensure_ascii=False, indent=4)
+
+
+class TestWriteGroupedJson(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp.name, "out.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_records(self, sources):
+        return [
+            {
+                "id": str(i),
+                "metadata": {"source": source},
+                "chunks": [{"name": "Класс", "methods": [], "code": "a\n\tb"}],
+            }
+            for i, source in enumerate(sources)
+        ]
+
+    def assert_same_output(self, records, group_by, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_grouped_json(records, self.output_file, group_by=group_by, **kwargs)
+        with open(self.output_file, encoding="utf-8") as file:
+            self.assertEqual(file.read(), reference_grouped_json(records, group_by))
+
+    def test_clustered_records(self):
+        self.assert_same_output(self.make_records(["a.py", "a.py", "b.py", "c.py"]), "metadata.source")
+
+    def test_unclustered_records_in_memory_and_spilled(self):
+        sources = [f"f{i % 7}.py" for i in range(100)]
+        records = self.make_records(sources)
+        records.insert(5, {"id": "no-source", "chunks": []})
+        records.insert(9, {"id": "bad", "metadata": "string"})
+        self.assert_same_output(records, "metadata.source")
+        self.assert_same_output(records, "metadata.source", max_records_in_memory=10, spill_dir=self.tmp.name)
+
+    def test_dominant_group_is_split_into_bounded_runs(self):
+        ranked = [(0 if index % 10 else 1, str(index)) for index in range(200)]  # Группа 0 — 180 записей
+        run_paths = spill_sorted_runs(iter(ranked), self.tmp.name, partitions=2, max_run_lines=25)
+        for path in run_paths:
+            with open(path, encoding="utf-8") as file:
+                self.assertLessEqual(len(file.readlines()), 25)
+        groups = [(key, list(items)) for key, items in iter_merged_groups(run_paths, ["a", "b"], decode=str.strip)]
+        self.assertEqual(groups, [("a", [line for rank, line in ranked if rank == 0]),
+                                  ("b", [line for rank, line in ranked if rank == 1])])
+
+    def test_without_grouping_and_empty(self):
+        self.assert_same_output(self.make_records(["a.py", "b.py"]), None)
+        self.assert_same_output([], None)
+        self.assert_same_output([], "metadata.source")
+        self.assert_same_output([{"id": "1", "items": []}], "metadata.source")
+
+
+class TestJsonlToHumanReadableJson(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp.name, "out.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_shards(self, records, shard_count):
+        paths = []
+        for shard in range(shard_count):
+            path = os.path.join(self.tmp.name, f"project_summary_{shard + 1}.jsonl")
+            with open(path, "w", encoding="utf-8") as file:
+                for record in records[shard::shard_count]:
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            paths.append(path)
+        return paths
+
+    def convert(self, inputs, group_by, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            jsonl_to_human_readable_json(inputs, self.output_file, group_by=group_by, **kwargs)
+        with open(self.output_file, encoding="utf-8") as file:
+            return file.read()
+
+    def test_partitioned_shards_match_single_pass_grouping(self):
+        records = [{"id": str(i), "metadata": {"source": f"f{i % 5}.py"}, "code": "a\n\tb"} for i in range(40)]
+        records.insert(3, {"id": "no-source"})
+        paths = self.write_shards(records, 3)
+        ordered = [record for path in paths for record in map(json.loads, open(path, encoding="utf-8"))]
+
+        expected = reference_grouped_json(ordered, "metadata.source")
+        self.assertEqual(self.convert(paths, "metadata.source", partition_bytes=256), expected)
+        pattern = os.path.join(self.tmp.name, "project_summary_*.jsonl")
+        self.assertEqual(self.convert(pattern, "metadata.source", workers=2, partition_bytes=256), expected)
+        self.assertEqual(self.convert(paths, None, workers=2), json.dumps(ordered, ensure_ascii=False, indent=4))
+
+    def test_dominant_group_is_sorted_in_bounded_runs(self):
+        records = [{"id": str(i), "metadata": {"source": "big.py" if i % 10 else f"f{i}.py"}, "code": "x" * 40}
+                   for i in range(200)]
+        paths = self.write_shards(records, 2)
+        ordered = [record for path in paths for record in map(json.loads, open(path, encoding="utf-8"))]
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+
+        run_counts = []
+        merge = json_formatter.iter_merged_groups
+
+        def counting_merge(run_paths, group_keys):
+            run_counts.append(len(run_paths))
+            return merge(run_paths, group_keys)
+
+        with mock.patch.object(json_formatter, "iter_merged_groups", counting_merge):
+            output = self.convert(paths, "metadata.source", partition_bytes=total_bytes // 4)
+        self.assertEqual(output, reference_grouped_json(ordered, "metadata.source"))
+        # 4 раздела, но почти все записи в одном: он делится на прогоны по partition_bytes
+        self.assertGreater(run_counts[0], 5)
+
+    def test_empty_input(self):
+        paths = self.write_shards([], 1)
+        self.assertEqual(self.convert(paths, None), "[]")
+        self.assertEqual(self.convert(paths, "metadata.source"), json.dumps({"ungrouped": []}, indent=4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.watcher import ChangeWatcher
+
+
+class TestChangeWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("kept.py", "a = 1\n")
+        self.write("notes.txt", "не отслеживается\n")
+        self.watcher = ChangeWatcher(self.root, accepts_file=lambda path: path.endswith(".py"),
+                                     interval=0.02, debounce=0.1, use_notifications=False)
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+
+    def test_polling_detects_add_modify_and_delete(self):
+        self.assertEqual(self.watcher.mode, "polling")
+        self.write("pkg/new.py", "b = 2\n")
+        self.write("notes.txt", "изменён\n")
+        self.assertEqual(self.watcher.wait_for_changes(), {os.path.join("pkg", "new.py")})
+
+        self.write("kept.py", "a = 10\n")
+        self.assertEqual(self.watcher.wait_for_changes(), {"kept.py"})
+
+        os.remove(os.path.join(self.root, "kept.py"))
+        self.assertEqual(self.watcher.wait_for_changes(), {"kept.py"})
+
+    def test_debounce_merges_burst_into_one_batch(self):
+        batches = []
+        thread = threading.Thread(target=lambda: batches.append(self.watcher.wait_for_changes()))
+        thread.start()
+        # Изменения идут чаще debounce: серия должна вернуться одним набором
+        for index in range(5):
+            self.write(f"burst_{index}.py", "x = 1\n")
+            time.sleep(0.03)
+        thread.join(timeout=5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(batches, [{f"burst_{index}.py" for index in range(5)}])
+
+    def test_stop_event_ends_wait(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        self.assertEqual(self.watcher.wait_for_changes(stop_event), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
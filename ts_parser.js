@@ -118,21 +118,48 @@ class TsParser {
     }
 }
 
-// Получаем путь к анализируемому файлу
-const filePath = process.argv[2];
-
-if (!filePath || !fs.existsSync(filePath)) {
-    console.error('Error: File path is invalid or does not exist.');
-    process.exit(1);
+/**
+ * Разбирает файл и возвращает результат или объект с ошибкой.
+ */
+function parseFileSafe(filePath) {
+    if (!filePath || !fs.existsSync(filePath)) {
+        return { error: 'File path is invalid or does not exist.' };
+    }
+    try {
+        return new TsParser().parse(filePath);
+    } catch (error) {
+        return { error: error.message };
+    }
 }
 
-try {
-    const parser = new TsParser();
-    const result = parser.parse(filePath);
+if (process.argv[2] === '--serve') {
+    // Постоянный режим: пути к файлам читаются из stdin построчно,
+    // на каждый путь выводится одна строка JSON
+    const readline = require('readline');
+    const input = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+    input.on('line', (line) => {
+        const filePath = line.trim();
+        if (filePath) {
+            process.stdout.write(JSON.stringify(parseFileSafe(filePath)) + '\n');
+        }
+    });
+} else {
+    // Получаем путь к анализируемому файлу
+    const filePath = process.argv[2];
+
+    if (!filePath || !fs.existsSync(filePath)) {
+        console.error('Error: File path is invalid or does not exist.');
+        process.exit(1);
+    }
 
-    // Выводим только результат парсинга
-    console.log(JSON.stringify(result, null, 4));
-} catch (error) {
-    console.error(JSON.stringify({ error: error.message }));
-    process.exit(1);
+    try {
+        const parser = new TsParser();
+        const result = parser.parse(filePath);
+
+        // Выводим только результат парсинга
+        console.log(JSON.stringify(result, null, 4));
+    } catch (error) {
+        console.error(JSON.stringify({ error: error.message }));
+        process.exit(1);
+    }
 }
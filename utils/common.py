@@ -1,6 +1,76 @@
+import hashlib
+import math
+import os
 import uuid
 
+# Приблизительное количество символов на один токен (та же оценка используется при разбиении кода на чанки)
+CHARS_PER_TOKEN = 2
 
-def generate_id():
-    """Генерирует уникальный идентификатор."""
-    return str(uuid.uuid4())
+# Режимы генерации идентификаторов: случайные (uuid4) или производные от содержимого (uuid5)
+ID_MODES = ("uuid", "deterministic")
+
+# Пространство имён для детерминированных идентификаторов
+ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "project2jsonl")
+
+
+def get_id_mode():
+    """
+    Возвращает режим генерации идентификаторов из переменной окружения ID_MODE.
+
+    :return: "uuid" или "deterministic".
+    """
+    mode = os.getenv("ID_MODE", "uuid").strip().lower() or "uuid"
+    if mode not in ID_MODES:
+        raise ValueError(f"Unknown ID_MODE '{mode}'. Available: {', '.join(ID_MODES)}.")
+    return mode
+
+
+def content_hash(content):
+    """
+    Считает sha256 содержимого.
+
+    :param content: Строка, байты или None.
+    :return: Шестнадцатеричная строка.
+    """
+    if content is None:
+        content = b""
+    elif isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def generate_id(source=None, kind=None, name=None, content=None):
+    """
+    Генерирует идентификатор.
+
+    В режиме ID_MODE=deterministic идентификатор выводится из префикса проекта, относительного пути,
+    вида элемента, квалифицированного имени и хэша содержимого, поэтому одинаковый код получает
+    одинаковые идентификаторы в разных запусках. Без source (или в режиме uuid) возвращается uuid4.
+
+    :param source: Относительный путь к исходному файлу.
+    :param kind: Вид элемента ("file", "class", "method" и т.д.).
+    :param name: Квалифицированное имя элемента (например, "Класс.метод").
+    :param content: Содержимое элемента (код или другое однозначное представление).
+    :return: Строковый идентификатор.
+    """
+    if source is None or get_id_mode() != "deterministic":
+        return str(uuid.uuid4())
+
+    key = "|".join([
+        os.getenv("PROJECT_PREFIX", "project"),
+        source.replace(os.sep, "/"),
+        kind or "",
+        name or "",
+        content_hash(content),
+    ])
+    return str(uuid.uuid5(ID_NAMESPACE, key))
+
+
+def estimate_tokens(text):
+    """
+    Оценивает количество токенов в тексте.
+
+    :param text: Текст.
+    :return: Приблизительное количество токенов.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
@@ -0,0 +1,151 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from formatters.output_writers import atomic_open
+from utils.serializer import dump, loads
+
+# Версия формата манифеста
+MANIFEST_VERSION = 1
+
+# Размер блока чтения при хэшировании
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path):
+    """
+    Считает sha256 содержимого файла, читая его блоками.
+
+    :param file_path: Путь к файлу.
+    :return: Шестнадцатеричная строка.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_manifest_path(output_dir, prefix):
+    """
+    Возвращает путь к манифесту файлов проекта.
+
+    :param output_dir: Каталог вывода.
+    :param prefix: Префикс проекта.
+    :return: Путь {output_dir}/{prefix}_file_manifest.json.
+    """
+    return os.path.join(output_dir, f"{prefix}_file_manifest.json")
+
+
+class FileManifest:
+    """
+    Манифест обработанных файлов: для каждого относительного пути хранятся размер, mtime,
+    sha256 содержимого и области данных (scopes), в которые попали записи файла.
+
+    Используется инкрементальным режимом: повторно обрабатываются только добавленные
+    и изменённые файлы, записи остальных переносятся из предыдущей выгрузки.
+    """
+
+    def __init__(self, files=None):
+        """
+        :param files: Словарь {относительный путь: {"size", "mtime", "sha256", "scopes"}}.
+        """
+        self.files = files or {}
+
+    @classmethod
+    def load(cls, manifest_path):
+        """
+        Загружает манифест. Если файла нет или его формат устарел, возвращается пустой манифест.
+
+        :param manifest_path: Путь к файлу манифеста.
+        :return: FileManifest.
+        """
+        if not os.path.exists(manifest_path):
+            return cls()
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            data = loads(file.read())
+        if data.get("version") != MANIFEST_VERSION:
+            print(f"Warning: unsupported file manifest version in {manifest_path}. Full run is required.")
+            return cls()
+        return cls(data.get("files"))
+
+    def save(self, manifest_path):
+        """
+        Сохраняет манифест в JSON.
+
+        :param manifest_path: Путь к файлу манифеста.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+        with atomic_open(manifest_path) as file:
+            dump({"version": MANIFEST_VERSION, "files": dict(sorted(self.files.items()))}, file, indent=4)
+
+    def __len__(self):
+        return len(self.files)
+
+    def get_scopes(self):
+        """
+        Возвращает все области данных, упомянутые в манифесте.
+
+        :return: Множество названий областей.
+        """
+        return {scope for entry in self.files.values() for scope in entry.get("scopes", [])}
+
+    def scan(self, project_root, relative_paths, workers=8):
+        """
+        Снимает состояние файлов и сравнивает его с манифестом.
+
+        Файлы с тем же размером и mtime считаются неизменными без чтения. Остальные хэшируются
+        параллельно; если хэш совпал (файл только «тронут»), файл также считается неизменным.
+
+        :param project_root: Корень проекта.
+        :param relative_paths: Относительные пути текущих файлов проекта.
+        :param workers: Количество потоков для хэширования.
+        :return: Кортеж (состояние, added, changed, unchanged, removed), где состояние — словарь
+                 {путь: {"size", "mtime", "sha256"}}, а остальные — отсортированные списки путей.
+        """
+        state = {}
+        to_hash = []
+        for relative_path in set(relative_paths):
+            stat = os.stat(os.path.join(project_root, relative_path))
+            entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+            previous = self.files.get(relative_path)
+            if previous and previous.get("size") == entry["size"] and previous.get("mtime") == entry["mtime"]:
+                entry["sha256"] = previous.get("sha256")
+            else:
+                to_hash.append(relative_path)
+            state[relative_path] = entry
+
+        # Хэширование упирается в чтение с диска, поэтому потоков достаточно
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            hashes = executor.map(lambda path: hash_file(os.path.join(project_root, path)), to_hash)
+            for relative_path, file_hash in zip(to_hash, hashes):
+                state[relative_path]["sha256"] = file_hash
+
+        added, changed, unchanged = [], [], []
+        for relative_path, entry in state.items():
+            previous = self.files.get(relative_path)
+            if previous is None:
+                added.append(relative_path)
+            elif previous.get("sha256") != entry["sha256"]:
+                changed.append(relative_path)
+            else:
+                unchanged.append(relative_path)
+        removed = [relative_path for relative_path in self.files if relative_path not in state]
+
+        return state, sorted(added), sorted(changed), sorted(unchanged), sorted(removed)
+
+    @classmethod
+    def build(cls, state, source_scopes):
+        """
+        Строит новый манифест. Файлы, по которым не получено ни одной записи (например, из-за
+        ошибки парсера), в манифест не попадают и будут обработаны при следующем запуске.
+
+        :param state: Состояние файлов, возвращённое scan.
+        :param source_scopes: Словарь {metadata.source: множество областей данных}.
+        :return: FileManifest.
+        """
+        files = {}
+        for relative_path, entry in state.items():
+            scopes = source_scopes.get(relative_path)
+            if scopes:
+                files[relative_path] = dict(entry, scopes=sorted(scopes))
+        return cls(files)
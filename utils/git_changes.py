@@ -0,0 +1,88 @@
+import subprocess
+
+
+class GitChanges:
+    """
+    Файлы, изменённые в диапазоне ревизий (по выводу git diff --name-status).
+
+    Пути указаны относительно корня проекта.
+    """
+
+    def __init__(self, modified=None, deleted=None, renamed=None):
+        """
+        :param modified: Множество добавленных и изменённых файлов.
+        :param deleted: Множество удалённых файлов.
+        :param renamed: Словарь {старый путь: новый путь} для переименованных файлов.
+        """
+        self.modified = set(modified or ())
+        self.deleted = set(deleted or ())
+        self.renamed = dict(renamed or {})
+
+    def __len__(self):
+        return len(self.modified) + len(self.deleted) + len(self.renamed)
+
+    @classmethod
+    def parse(cls, output):
+        """
+        Разбирает вывод git diff --name-status -z.
+
+        :param output: Вывод команды (строка, поля разделены символом NUL).
+        :return: GitChanges.
+        """
+        changes = cls()
+        fields = output.split("\0")
+        position = 0
+        while position < len(fields) and fields[position]:
+            status = fields[position]
+            kind = status[0]
+            if kind in ("R", "C"):
+                old_path, new_path = fields[position + 1], fields[position + 2]
+                position += 3
+                if kind == "R":
+                    changes.renamed[old_path] = new_path
+                else:
+                    changes.modified.add(new_path)  # Копия — новый файл, исходный не меняется
+                continue
+
+            path = fields[position + 1]
+            position += 2
+            if kind == "D":
+                changes.deleted.add(path)
+            else:  # A, M, T
+                changes.modified.add(path)
+        return changes
+
+    def get_removed_sources(self):
+        """
+        Возвращает пути, записи которых нужно убрать из выгрузки: удалённые и старые пути переименованных файлов.
+
+        :return: Множество путей.
+        """
+        return self.deleted | set(self.renamed)
+
+    def get_sources_to_process(self):
+        """
+        Возвращает пути, которые нужно разобрать заново: добавленные, изменённые и новые пути переименованных файлов.
+
+        :return: Множество путей.
+        """
+        return self.modified | set(self.renamed.values())
+
+
+def diff_name_status(repo_dir, revision):
+    """
+    Получает изменения рабочего дерева относительно ревизии из локального репозитория.
+
+    :param repo_dir: Каталог внутри репозитория (пути в результате — относительно него).
+    :param revision: Ревизия или диапазон в формате git (например, "v1.2" или "main~5").
+    :return: GitChanges.
+    :raises RuntimeError: Если git завершился с ошибкой.
+    """
+    command = ["git", "-C", repo_dir, "diff", "--name-status", "-M", "--relative", "-z", revision, "--"]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, encoding="utf-8", check=True)
+    except FileNotFoundError:
+        raise RuntimeError("git executable not found.")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"git diff failed for revision '{revision}': {e.stderr.strip()}")
+    return GitChanges.parse(result.stdout)
@@ -0,0 +1,139 @@
+import os
+import time
+from utils.serializer import dumps, loads
+
+
+def get_journal_path(output_dir, prefix):
+    """
+    Возвращает путь к журналу запуска.
+
+    :param output_dir: Каталог вывода.
+    :param prefix: Префикс проекта.
+    :return: Путь {output_dir}/{prefix}_journal.jsonl.
+    """
+    return os.path.join(output_dir, f"{prefix}_journal.jsonl")
+
+
+class RunJournal:
+    """
+    Журнал запуска: дописываемый JSONL с записями обработанных файлов. После записей файла
+    добавляется отметка о его завершении. Журнал сбрасывается на диск (fsync) не чаще,
+    чем раз в sync_interval секунд, поэтому при аварийном завершении теряются только последние файлы.
+
+    Подключается к JSONManager как приёмник записей. При возобновлении (replay) записи завершённых
+    файлов восстанавливаются из журнала, а сами файлы пропускаются обработчиками.
+
+    Строки журнала:
+        {"scope": "...", "record": {...}} — запись области;
+        {"completed": "относительный путь"} — файл обработан полностью.
+    """
+
+    def __init__(self, path, sync_interval=5.0):
+        """
+        :param path: Путь к файлу журнала.
+        :param sync_interval: Интервал в секундах между принудительными сбросами на диск.
+        """
+        self.path = path
+        self.sync_interval = sync_interval
+        self.resumed_files = set()  # Файлы, завершённые в прерванном запуске
+        self._file = None
+        self._last_sync = time.monotonic()
+
+    def replay(self):
+        """
+        Читает журнал прерванного запуска. Записи файлов без отметки о завершении и оборванная
+        последняя строка отбрасываются, а журнал обрезается до последней отметки.
+
+        :return: Список пар (область, запись) завершённых файлов.
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        records, pending = [], []
+        valid_size = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # Строка записана не полностью
+                try:
+                    item = loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+                if "completed" in item:
+                    self.resumed_files.add(item["completed"])
+                    records.extend(pending)
+                    pending = []
+                    valid_size = file.tell()
+                else:
+                    pending.append((item["scope"], item["record"]))
+
+        with open(self.path, 'r+b') as file:
+            file.truncate(valid_size)
+        return records
+
+    def open(self, append=False):
+        """
+        Открывает журнал на запись.
+
+        :param append: Дописывать в существующий журнал (после replay) вместо создания нового.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+        self._last_sync = time.monotonic()
+
+    def is_completed(self, relative_path):
+        """
+        Проверяет, был ли файл обработан в прерванном запуске.
+
+        :param relative_path: Путь к файлу относительно корня проекта.
+        :return: bool.
+        """
+        return relative_path in self.resumed_files
+
+    def add_records(self, scope, entries):
+        """
+        Дописывает записи области (интерфейс приёмника JSONManager).
+
+        :param scope: Название области данных.
+        :param entries: Список записей.
+        """
+        for entry in entries:
+            self._file.write(dumps({"scope": scope, "record": entry}) + "\n")
+
+    def mark_completed(self, relative_path):
+        """
+        Отмечает файл как обработанный и при необходимости сбрасывает журнал на диск.
+
+        :param relative_path: Путь к файлу относительно корня проекта.
+        """
+        self._file.write(dumps({"completed": relative_path}) + "\n")
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Сбрасывает журнал на диск.
+        """
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """
+        Сбрасывает и закрывает журнал.
+        """
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def remove(self):
+        """
+        Закрывает и удаляет журнал (после успешного сохранения выгрузки).
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
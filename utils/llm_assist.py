@@ -1,10 +1,36 @@
-import json
-import requests
+import hashlib
+import logging
 import os
 from dotenv import load_dotenv
+from utils.common import CHARS_PER_TOKEN
+from utils.llm_estimate import get_cost_estimate
+from utils.logger import get_logger, truncate_payload
+from utils.metrics import metrics
+from utils.profiler import profile_bucket
 from utils.query_cache import get_cached_response, save_response
+from utils.serializer import dumps, loads
 from difflib import SequenceMatcher
 
+logger = get_logger("llm")
+
+# Общая HTTP-сессия: соединение с сервером LLM переиспользуется между запросами (keep-alive)
+_session = None
+
+
+def get_session():
+    """
+    Возвращает общую HTTP-сессию для запросов к LLM, создавая её при первом обращении.
+    Модуль requests импортируется здесь же: запуск без LLM не загружает HTTP-стек.
+
+    :return: requests.Session.
+    """
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+
 class LLMAssist:
     """
     Класс для взаимодействия с LM Studio через эндпоинт /v1/chat/completions.
@@ -62,15 +88,15 @@ class LLMAssist:
             raise ValueError("Размер контекста слишком мал для размещения кода с промптами.")
 
         # Преобразуем приблизительное ограничение токенов в количество символов
-        # (предполагая, что 1 токен ≈ 0.5 символа)
-        max_chunk_size = max_tokens_for_code * 2
+        # (предполагая, что 1 токен ≈ CHARS_PER_TOKEN символов)
+        max_chunk_size = max_tokens_for_code * CHARS_PER_TOKEN
 
         # Разбиваем код на чанки
         chunks = [file_code[i:i + max_chunk_size] for i in range(0, len(file_code), max_chunk_size)]
 
         return chunks
 
-    def query(self, user_message, system_message=None, temperature=0.7, max_tokens=None):
+    def query(self, user_message, system_message=None, temperature=0.7, max_tokens=None, kind="query"):
         """
         Отправляет запрос на LM Studio сервер через /v1/chat/completions.
 
@@ -78,6 +104,7 @@ class LLMAssist:
         :param system_message: Сообщение системы (контекст, необязательно).
         :param temperature: Уровень случайности генерации ответа.
         :param max_tokens: Максимальное количество токенов в ответе.
+        :param kind: Вид запроса для оценки пробного запуска (например, "describe_class").
         :return: Ответ модели в виде строки.
         """
         if not self.success:
@@ -103,32 +130,45 @@ class LLMAssist:
         }
 
         # Преобразование payload в строку для использования в кэшировании
-        cache_key = json.dumps(payload, sort_keys=True)
+        cache_key = dumps(payload, ensure_ascii=True, sort_keys=True)
 
         # Проверка необходимости использования кэша
         use_cache = os.getenv("USE_CACHE", "true").lower() == "true"
+        estimate = get_cost_estimate()
         if use_cache:
             cached_response = get_cached_response(cache_key)
             if cached_response:
-                print("Ответ получен из кэша.")
+                logger.debug("Ответ получен из кэша.")
+                if estimate is not None:
+                    estimate.add(kind, self.estimate_prompt_tokens(messages), cached=True,
+                                 completion_tokens=len(cached_response) // CHARS_PER_TOKEN)
                 return cached_response
 
+        if estimate is not None:
+            estimate.add(kind, self.estimate_prompt_tokens(messages), cached=False)
+            # Заглушки разных запросов не совпадают, чтобы проверка схожести ответов частей не обрывала разбор
+            return f"[dry-run {hashlib.md5(cache_key.encode('utf-8')).hexdigest()[:12]}]"
+
         try:
-            # Логируем запрос
-            print(f"Отправка запроса: {payload}")
+            # Запрос содержит исходный код целиком, поэтому пишется только на уровне DEBUG и с обрезкой
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Отправка запроса: {truncate_payload(dumps(payload))}")
 
             # Отправляем запрос на /v1/chat/completions
-            response = requests.post(self.server_url, json=payload)
+            with metrics.timer("llm_request_seconds", model=self.model_name), profile_bucket("llm_wait"):
+                response = get_session().post(self.server_url, json=payload)
+            metrics.inc("llm_requests_total", status=response.status_code)
 
-            # Логируем ответ
-            print(f"Ответ сервера: {response.text}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Ответ сервера: {truncate_payload(response.text)}")
 
             # Проверка кода ответа
             if response.status_code != 200:
                 raise RuntimeError(f"Ошибка запроса к LLM: {response.status_code} - {response.text}")
 
             # Парсинг JSON-ответа
-            response_data = response.json()
+            response_data = loads(response.content)
+            self._count_tokens(response_data, messages)
 
             # Извлечение текста из choices[0]["message"]["content"]
             if "choices" in response_data and len(response_data["choices"]) > 0:
@@ -143,15 +183,47 @@ class LLMAssist:
                 raise ValueError(f"Некорректный ответ модели: {response_data}")
 
         except Exception as e:
+            metrics.record_error(e, "llm")
             raise RuntimeError(f"Ошибка при взаимодействии с LLM: {e}")
 
-    def process_code_chunks(self, code, system_prompt, user_prompt):
+    @staticmethod
+    def estimate_prompt_tokens(messages):
+        """
+        Оценивает количество токенов запроса по длине сообщений (CHARS_PER_TOKEN символов на токен).
+
+        :param messages: Сообщения запроса.
+        :return: Количество токенов.
+        """
+        return sum(len(message["content"]) for message in messages) // CHARS_PER_TOKEN
+
+    def _count_tokens(self, response_data, messages):
+        """
+        Учитывает токены запроса и ответа в метриках: по полю usage ответа сервера,
+        а если его нет — по оценке CHARS_PER_TOKEN.
+
+        :param response_data: Разобранный ответ сервера.
+        :param messages: Сообщения запроса.
+        """
+        usage = response_data.get("usage") if isinstance(response_data, dict) else None
+        if usage:
+            prompt_tokens = usage.get("prompt_tokens") or 0
+            completion_tokens = usage.get("completion_tokens") or 0
+        else:
+            prompt_tokens = self.estimate_prompt_tokens(messages)
+            choices = response_data.get("choices") if isinstance(response_data, dict) else None
+            content = (choices[0].get("message") or {}).get("content") if choices else None
+            completion_tokens = len(content or "") // CHARS_PER_TOKEN
+        metrics.inc("llm_tokens_total", prompt_tokens, kind="prompt")
+        metrics.inc("llm_tokens_total", completion_tokens, kind="completion")
+
+    def process_code_chunks(self, code, system_prompt, user_prompt, kind="query"):
         """
         Общая функция для обработки исходного кода, разделенного на чанки.
 
         :param code: Исходный код.
         :param system_prompt: Системный промпт.
         :param user_prompt: Пользовательский промпт.
+        :param kind: Вид запросов для оценки пробного запуска (например, "describe_file").
         :return: Итоговое описание или консолидация результатов.
         """
         # Разбиваем код на чанки
@@ -160,7 +232,7 @@ class LLMAssist:
         # Если только один чанк, возвращаем результат без консолидации
         if len(chunks) == 1:
             user_message = f"{user_prompt}\nСодержимое:\n\n{chunks[0]}"
-            return self.query(user_message=user_message, system_message=system_prompt, temperature=0.4)
+            return self.query(user_message=user_message, system_message=system_prompt, temperature=0.4, kind=kind)
 
         results = []
         accumulated_context = ""  # Для хранения контекста ответов ассистента
@@ -172,7 +244,8 @@ class LLMAssist:
                 user_message += f"\n\nКонтекст предыдущих частей:\n{accumulated_context}"
 
             try:
-                result = self.query(user_message=user_message, system_message=system_prompt, temperature=0.4)
+                result = self.query(user_message=user_message, system_message=system_prompt, temperature=0.4,
+                                    kind=kind)
                 results.append(result)
 
                 # Проверяем схожесть последних двух ответов
@@ -202,7 +275,8 @@ class LLMAssist:
             consolidated_result = self.query(
                 user_message=consolidated_user_message,
                 system_message=consolidated_prompt,
-                temperature=0.4
+                temperature=0.4,
+                kind=kind
             )
             return consolidated_result
         except Exception as e:
@@ -221,7 +295,7 @@ class LLMAssist:
             f"Определяйте назначение файлов, классов и методов кратко и по существу."
         )
         user_prompt = f"Опишите назначение PHP-файла {file_name} в проекте {self.project_type}."
-        return self.process_code_chunks(file_code, system_prompt, user_prompt)
+        return self.process_code_chunks(file_code, system_prompt, user_prompt, kind="describe_file")
 
     def describe_class(self, class_name, class_code, file_path):
         """
@@ -240,7 +314,7 @@ class LLMAssist:
             f"Опишите назначение PHP-класса {class_name}, определённого в файле {file_path}, "
             f"в проекте {self.project_type}."
         )
-        return self.process_code_chunks(class_code, system_prompt, user_prompt)
+        return self.process_code_chunks(class_code, system_prompt, user_prompt, kind="describe_class")
 
     def describe_class_method(self, method_name, method_code, class_name, class_description):
         """
@@ -260,7 +334,7 @@ class LLMAssist:
             f"Опишите назначение метода {method_name} в классе {class_name} проекта {self.project_type}. "
             f"Описание класса: {class_description}."
         )
-        return self.process_code_chunks(method_code, system_prompt, user_prompt)
+        return self.process_code_chunks(method_code, system_prompt, user_prompt, kind="describe_class_method")
 
     def describe_global_function(self, function_name, function_code, file_name):
         """
@@ -278,4 +352,4 @@ class LLMAssist:
         user_prompt = (
             f"Опишите назначение глобальной функции {function_name}, определённой в файле {file_name} проекта {self.project_type}."
         )
-        return self.process_code_chunks(function_code, system_prompt, user_prompt)
+        return self.process_code_chunks(function_code, system_prompt, user_prompt, kind="describe_global_function")
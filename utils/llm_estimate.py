@@ -0,0 +1,149 @@
+import os
+import threading
+from formatters.output_writers import atomic_open
+from utils.serializer import dump
+
+# Оценка пробного запуска: если задана, LLMAssist не отправляет запросы
+_cost_estimate = None
+
+
+def set_cost_estimate(estimate):
+    """
+    Включает пробный режим (--dry-run): запросы к LLM учитываются в оценке, а не отправляются.
+    Ответы из кэша запросов возвращаются как обычно, вместо остальных возвращается заглушка.
+
+    :param estimate: LLMCostEstimate или None (обычный режим).
+    """
+    global _cost_estimate
+    _cost_estimate = estimate
+
+
+def get_cost_estimate():
+    """
+    Возвращает оценку пробного запуска.
+
+    :return: LLMCostEstimate или None.
+    """
+    return _cost_estimate
+
+
+def get_estimate_report_path(output_dir, prefix):
+    """
+    Возвращает путь к отчёту пробного запуска (--dry-run).
+
+    :param output_dir: Каталог вывода.
+    :param prefix: Префикс проекта.
+    :return: Путь {output_dir}/{prefix}_dry_run.json.
+    """
+    return os.path.join(output_dir, f"{prefix}_dry_run.json")
+
+
+class LLMCostEstimate:
+    """
+    Оценка объёма работы LLM без обращений к серверу (режим --dry-run).
+
+    LLMAssist в этом режиме формирует те же запросы, что и при обычном запуске (с тем же разбиением
+    кода split_into_chunks), и передаёт их сюда вместо отправки: ответы из кэша запросов учитываются
+    как попадания, остальные — как запросы, которые придётся выполнить. Время оценивается по заданной
+    пропускной способности сервера.
+    """
+
+    def __init__(self, max_tokens, prompt_tokens_per_second, completion_tokens_per_second, request_overhead=0.0):
+        """
+        :param max_tokens: Ограничение длины ответа (MAX_TOKENS) — верхняя оценка токенов ответа.
+        :param prompt_tokens_per_second: Скорость обработки токенов запроса сервером.
+        :param completion_tokens_per_second: Скорость генерации токенов ответа.
+        :param request_overhead: Накладные расходы на один запрос, сек.
+        """
+        if prompt_tokens_per_second <= 0 or completion_tokens_per_second <= 0:
+            raise ValueError("LLM throughput must be positive.")
+        self.max_tokens = max_tokens
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.completion_tokens_per_second = completion_tokens_per_second
+        self.request_overhead = request_overhead
+        self.kinds = {}  # {вид запроса: счётчики}
+        self.cached_completion_tokens = 0  # Токены ответов из кэша — для оценки средней длины ответа
+        self._lock = threading.Lock()
+
+    def add(self, kind, prompt_tokens, cached, completion_tokens=0):
+        """
+        Учитывает запрос.
+
+        :param kind: Вид запроса (например, "describe_class", "class_qa").
+        :param prompt_tokens: Оценка токенов запроса.
+        :param cached: Есть ли ответ в кэше запросов.
+        :param completion_tokens: Токены ответа из кэша (для попаданий).
+        """
+        with self._lock:
+            counters = self.kinds.setdefault(kind, {
+                "requests": 0, "cached": 0, "uncached": 0, "prompt_tokens": 0, "uncached_prompt_tokens": 0
+            })
+            counters["requests"] += 1
+            counters["prompt_tokens"] += prompt_tokens
+            if cached:
+                counters["cached"] += 1
+                self.cached_completion_tokens += completion_tokens
+            else:
+                counters["uncached"] += 1
+                counters["uncached_prompt_tokens"] += prompt_tokens
+
+    def estimate_seconds(self, prompt_tokens, completion_tokens, requests):
+        """
+        Оценивает время выполнения запросов.
+
+        :param prompt_tokens: Токены запросов.
+        :param completion_tokens: Токены ответов.
+        :param requests: Количество запросов.
+        :return: Секунды.
+        """
+        return (prompt_tokens / self.prompt_tokens_per_second
+                + completion_tokens / self.completion_tokens_per_second
+                + requests * self.request_overhead)
+
+    def get_report(self):
+        """
+        Возвращает отчёт оценки.
+
+        :return: Словарь: счётчики по видам запросов, итоги и оценка времени. Длина ответа на запрос
+                 оценивается средней длиной ответов из кэша, а при их отсутствии — MAX_TOKENS;
+                 верхняя оценка времени всегда считается по MAX_TOKENS.
+        """
+        with self._lock:
+            kinds = {kind: dict(counters) for kind, counters in sorted(self.kinds.items())}
+            cached_completion_tokens = self.cached_completion_tokens
+
+        totals = {key: sum(counters[key] for counters in kinds.values())
+                  for key in ("requests", "cached", "uncached", "prompt_tokens", "uncached_prompt_tokens")}
+        if totals["cached"]:
+            completion_per_request = min(cached_completion_tokens / totals["cached"], self.max_tokens)
+        else:
+            completion_per_request = self.max_tokens
+        completion_tokens = round(totals["uncached"] * completion_per_request)
+
+        return {
+            "requests_by_kind": kinds,
+            "totals": dict(totals,
+                           cache_hit_rate=round(totals["cached"] / totals["requests"], 4) if totals["requests"] else None,
+                           completion_tokens=completion_tokens),
+            "throughput": {
+                "prompt_tokens_per_second": self.prompt_tokens_per_second,
+                "completion_tokens_per_second": self.completion_tokens_per_second,
+                "request_overhead_seconds": self.request_overhead,
+            },
+            "estimated_seconds": round(self.estimate_seconds(
+                totals["uncached_prompt_tokens"], completion_tokens, totals["uncached"]), 1),
+            "estimated_seconds_upper_bound": round(self.estimate_seconds(
+                totals["uncached_prompt_tokens"], totals["uncached"] * self.max_tokens, totals["uncached"]), 1),
+        }
+
+    def save_report(self, path, extra=None):
+        """
+        Сохраняет отчёт в JSON.
+
+        :param path: Путь к файлу отчёта.
+        :param extra: Дополнительные разделы отчёта (например, количество файлов).
+        """
+        report = self.get_report()
+        report.update(extra or {})
+        with atomic_open(path) as file:
+            dump(report, file, indent=4)
@@ -1,47 +1,275 @@
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import threading
 from datetime import datetime
+from dotenv import load_dotenv
 
-def setup_global_logger(name, log_dir="logs", level=logging.INFO):
+load_dotenv()
+
+# Уровень по умолчанию и уровни подсистем, например LOG_LEVELS=llm=DEBUG,extractors=WARNING
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper() or "INFO"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_PAYLOAD_LIMIT = int(os.getenv("LOG_PAYLOAD_LIMIT", "2000"))  # Символов запроса/ответа LLM в DEBUG
+LOG_PROGRESS_INTERVAL = int(os.getenv("LOG_PROGRESS_INTERVAL", "100"))  # Файлов между сводками на INFO
+
+# Имя глобального логгера; логгеры подсистем — его потомки ("project_logger.llm")
+GLOBAL_LOGGER_NAME = "project_logger"
+
+# Очередь записей журнала: обработчики (файл, консоль) работают в отдельном потоке QueueListener,
+# поэтому вызов logger.info не ждёт ввода-вывода. Очередь multiprocessing: дочерние процессы
+# (fork или configure_worker_logging) передают записи в тот же поток родителя.
+_log_queue = None
+_listener = None
+_queue_handlers = []
+_lock = threading.Lock()
+
+
+class _RoutingHandler(logging.Handler):
+    """
+    Передаёт запись обработчикам логгера, к которому она относится (сам логгер или его подсистемы):
+    все логгеры пишут в одну очередь, а файлы у каждого свои.
     """
-    Настраивает глобальный логгер с сохранением в файл и выводом в консоль.
 
-    :param name: Имя логгера.
-    :param log_dir: Каталог для хранения лог-файлов.
-    :param level: Уровень логирования (по умолчанию logging.INFO).
-    :return: Глобальный логгер.
+    def __init__(self):
+        super().__init__()
+        self.routes = {}  # {имя логгера: обработчики}
+
+    def handle(self, record):
+        name = record.name
+        while name:
+            handlers = self.routes.get(name)
+            if handlers is not None:
+                for handler in handlers:
+                    handler.handle(record)
+                break
+            name = name.rpartition(".")[0]
+        return True
+
+    def close(self):
+        for handlers in self.routes.values():
+            for handler in handlers:
+                handler.close()
+        super().close()
+
+
+_router = _RoutingHandler()
+
+
+class _DelayedFileHandler(logging.FileHandler):
+    """
+    Файловый обработчик, создающий каталог и файл журнала только при первой записи:
+    импорт модулей и запуски без сообщений не создают logs/.
+    """
+
+    def __init__(self, filename, encoding=None):
+        super().__init__(filename, encoding=encoding, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, получающий очередь (и запускающий поток обработчиков) при первой записи.
+    """
+
+    def __init__(self):
+        super().__init__(None)
+
+    def enqueue(self, record):
+        if self.queue is None:
+            self.queue = get_log_queue()
+        super().enqueue(record)
+
+
+def _get_level_value(level):
+    value = logging.getLevelName(level.strip().upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level '{level.strip()}'.")
+    return value
+
+
+def parse_log_levels(spec):
+    """
+    Разбирает уровни подсистем.
+
+    :param spec: Строка "подсистема=уровень,..." (например, "llm=DEBUG,extractors=WARNING").
+    :return: Словарь {подсистема: уровень logging}.
+    :raises ValueError: Если уровень неизвестен.
+    """
+    levels = {}
+    for item in spec.split(","):
+        if item.strip():
+            subsystem, _, level = item.partition("=")
+            levels[subsystem.strip()] = _get_level_value(level)
+    return levels
+
+
+def get_log_level(subsystem=None):
+    """
+    Возвращает уровень журнала подсистемы (из LOG_LEVELS) или общий уровень LOG_LEVEL.
+
+    :param subsystem: Название подсистемы (например, "llm") или None.
+    :return: Уровень logging.
+    """
+    return parse_log_levels(LOG_LEVELS).get(subsystem, _get_level_value(LOG_LEVEL))
+
+
+def get_log_queue():
+    """
+    Возвращает общую очередь записей журнала, запуская поток обработчиков при первом обращении.
+    Передаётся в configure_worker_logging дочерних процессов.
+
+    :return: multiprocessing.Queue.
     """
-    # Убедимся, что каталог для логов существует
-    os.makedirs(log_dir, exist_ok=True)
+    global _log_queue, _listener
+    with _lock:
+        if _log_queue is None:
+            _log_queue = multiprocessing.Queue(-1)
+            _listener = logging.handlers.QueueListener(_log_queue, _router)
+            _listener.start()
+            # Регистрируется после создания очереди, чтобы выполниться раньше завершения multiprocessing
+            atexit.register(stop_logging)
+        return _log_queue
 
-    # Имя файла лога с временной меткой
-    log_file = os.path.join(log_dir, f"{name}_{datetime.now().strftime('%Y%m%d')}.log")
 
+def setup_global_logger(name, log_dir="logs", level=None, subsystem=None):
+    """
+    Настраивает логгер с сохранением в файл и выводом в консоль. Запись в файл и консоль
+    выполняется асинхронно в потоке QueueListener; очередь, поток и файл журнала создаются
+    при первом сообщении.
+
+    :param name: Имя логгера.
+    :param log_dir: Каталог для хранения лог-файлов.
+    :param level: Уровень логирования (по умолчанию — get_log_level(subsystem)).
+    :param subsystem: Название подсистемы для уровня из LOG_LEVELS (например, "main").
+    :return: Логгер.
+    """
     # Создаем логгер
     logger = logging.getLogger(name)
-    logger.setLevel(level)
+    logger.setLevel(level if level is not None else get_log_level(subsystem))
 
     # Проверяем, добавлены ли уже обработчики
     if not logger.handlers:
+        # Имя файла лога с временной меткой
+        log_file = os.path.join(log_dir, f"{name}_{datetime.now().strftime('%Y%m%d')}.log")
+
         # Форматирование сообщений лога
         formatter = logging.Formatter(
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
 
-        # Обработчик для записи в файл
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
-        file_handler.setLevel(level)
+        # Обработчик для записи в файл (каталог и файл создаются при первой записи)
+        file_handler = _DelayedFileHandler(log_file, encoding="utf-8")
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
 
         # Обработчик для вывода в консоль
         console_handler = logging.StreamHandler()
-        console_handler.setLevel(level)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+
+        # Уровень задают логгер и логгеры подсистем, обработчики пропускают всё, что до них дошло
+        _router.routes[name] = [file_handler, console_handler]
+        queue_handler = _LazyQueueHandler()
+        _queue_handlers.append(queue_handler)
+        logger.addHandler(queue_handler)
 
     return logger
 
 
+def get_logger(subsystem):
+    """
+    Возвращает логгер подсистемы — потомок глобального логгера с уровнем из LOG_LEVELS
+    (если уровень не задан, действует уровень глобального логгера).
+
+    :param subsystem: Название подсистемы ("extractors", "llm", ...).
+    :return: Логгер.
+    """
+    logger = logging.getLogger(f"{GLOBAL_LOGGER_NAME}.{subsystem}")
+    levels = parse_log_levels(LOG_LEVELS)
+    if subsystem in levels:
+        logger.setLevel(levels[subsystem])
+    return logger
+
+
+def truncate_payload(text, limit=None):
+    """
+    Обрезает текст для журнала (запросы и ответы LLM содержат исходный код целиком).
+
+    :param text: Текст.
+    :param limit: Максимальное количество символов (по умолчанию LOG_PAYLOAD_LIMIT).
+    :return: Строка.
+    """
+    limit = LOG_PAYLOAD_LIMIT if limit is None else limit
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [+{len(text) - limit} символов]"
+
+
+class ProgressLogger:
+    """
+    Сводка по файлам на уровне INFO: одно сообщение на interval событий. Сообщения
+    о каждом файле пишутся на уровне DEBUG.
+    """
+
+    def __init__(self, logger, label, interval=None):
+        """
+        :param logger: Логгер.
+        :param label: Подпись сводки (например, "PythonExtractor").
+        :param interval: Количество событий между сводками (по умолчанию LOG_PROGRESS_INTERVAL, 0 — без сводок).
+        """
+        self.logger = logger
+        self.label = label
+        self.interval = LOG_PROGRESS_INTERVAL if interval is None else interval
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def tick(self, detail):
+        """
+        Учитывает событие.
+
+        :param detail: Описание события (например, путь к файлу).
+        """
+        with self._lock:
+            self.count += 1
+            count = self.count
+        self.logger.debug(f"{self.label}: {detail}")
+        if self.interval and count % self.interval == 0:
+            self.logger.info(f"{self.label}: обработано {count} (последний: {detail})")
+
+
+def configure_worker_logging(log_queue):
+    """
+    Настраивает журнал в дочернем процессе (initializer пула процессов): записи логгеров
+    передаются в очередь родителя, а файлы и консоль пишет только родитель.
+
+    :param log_queue: Очередь из get_log_queue() родительского процесса.
+    """
+    global _log_queue, _listener
+    with _lock:
+        if _listener is not None and _log_queue is not log_queue:
+            _listener.stop()  # Поток, запущенный при импорте модуля в дочернем процессе
+        _listener = None
+        _log_queue = log_queue
+        for queue_handler in _queue_handlers:
+            queue_handler.queue = log_queue
+
+
+def stop_logging():
+    """
+    Дописывает записи из очереди и останавливает поток журнала (вызывается при выходе).
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            _router.close()
+
+
 # Глобальный логгер
-global_logger = setup_global_logger("project_logger")
+global_logger = setup_global_logger(GLOBAL_LOGGER_NAME)
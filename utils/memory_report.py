@@ -0,0 +1,186 @@
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Mapping
+from datetime import datetime
+from formatters.output_writers import atomic_open
+from utils.serializer import dump
+
+try:
+    import resource
+except ImportError:  # resource есть только в Unix: без него пиковый RSS не сообщается
+    resource = None
+
+
+def get_memory_report_path(output_dir, prefix):
+    """
+    Возвращает путь к отчёту о памяти (--memory-report).
+
+    :param output_dir: Каталог вывода.
+    :param prefix: Префикс проекта.
+    :return: Путь {output_dir}/{prefix}_memory.json.
+    """
+    return os.path.join(output_dir, f"{prefix}_memory.json")
+
+
+def get_rss():
+    """
+    Возвращает текущий и пиковый размер резидентной памяти процесса.
+
+    :return: Кортеж (текущий RSS, пиковый RSS) в байтах; None, если значение недоступно.
+    """
+    current = None
+    try:
+        with open("/proc/self/statm", 'r') as file:
+            current = int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    peak = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == "darwin" else peak * 1024  # В Linux — килобайты, в macOS — байты
+    return current, peak
+
+
+def measure_retained(entries):
+    """
+    Оценивает память, занятую записями и всем, на что они ссылаются (sys.getsizeof по графу объектов,
+    каждый объект учитывается один раз). Ключи словарей не учитываются: это в основном общие строки.
+
+    :param entries: Записи (список словарей или чанков).
+    :return: Словарь {"records", "total", "code", "strings", "containers", "other"}: code — строки полей code,
+             strings — остальные строки, containers — словари, чанки и списки.
+    """
+    totals = {"records": len(entries), "total": 0, "code": 0, "strings": 0, "containers": 0, "other": 0}
+    seen = set()
+    stack = [(entries, False)]
+    while stack:
+        value, is_code = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        size = sys.getsizeof(value)
+        if isinstance(value, str):
+            totals["code" if is_code else "strings"] += size
+        elif isinstance(value, Mapping):
+            totals["containers"] += size
+            stack.extend((item, key == "code") for key, item in value.items())
+        elif isinstance(value, (list, tuple, set)):
+            totals["containers"] += size
+            stack.extend((item, False) for item in value)
+        else:
+            totals["other"] += size
+    totals["total"] = totals["code"] + totals["strings"] + totals["containers"] + totals["other"]
+    return totals
+
+
+class MemoryReporter:
+    """
+    Отчёт о памяти запуска (--memory-report): снимки tracemalloc на границах стадий (после обхода файлов,
+    после каждого обработчика, до и после сохранения выгрузки) с RSS, крупнейшими местами выделения памяти,
+    приростом относительно предыдущего снимка, объёмом записей по областям JSONManager и счётчиками QAManager.
+
+    tracemalloc заметно замедляет работу, поэтому режим предназначен для диагностики.
+    """
+
+    def __init__(self, top=20, frames=1):
+        """
+        :param top: Количество мест выделения памяти в каждом снимке.
+        :param frames: Глубина стека, сохраняемая tracemalloc для каждого выделения.
+        """
+        self.top = top
+        self.frames = frames
+        self.checkpoints = []
+        self._previous = None
+        self._started = None
+
+    def start(self):
+        """
+        Запускает отслеживание выделений памяти.
+        """
+        tracemalloc.start(self.frames)
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """
+        Останавливает отслеживание.
+        """
+        self._previous = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @staticmethod
+    def _format_statistic(statistic):
+        frame = statistic.traceback[0]
+        return {"site": f"{frame.filename}:{frame.lineno}", "size": statistic.size, "count": statistic.count}
+
+    def checkpoint(self, stage, json_manager=None, qa_manager=None):
+        """
+        Делает снимок памяти на границе стадии.
+
+        :param stage: Название стадии (например, "discovery", "before_save_all").
+        :param json_manager: JSONManager для подсчёта объёма записей по областям.
+        :param qa_manager: QAManager для счётчиков вопросов и ответов и памяти хэшей повторов.
+        :return: Данные снимка (словарь).
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        rss, rss_peak = get_rss()
+        checkpoint = {
+            "stage": stage,
+            "at": datetime.now().isoformat(),
+            "elapsed_seconds": round(time.perf_counter() - self._started, 3),
+            "rss": rss,
+            "rss_peak": rss_peak,
+            "traced": traced,
+            "traced_peak_since_previous": traced_peak,
+            "top_sites": [self._format_statistic(statistic) for statistic in snapshot.statistics("lineno")[:self.top]],
+        }
+        if self._previous is not None:
+            checkpoint["top_growth"] = [
+                {"site": f"{diff.traceback[0].filename}:{diff.traceback[0].lineno}",
+                 "size_diff": diff.size_diff, "count_diff": diff.count_diff, "size": diff.size}
+                for diff in snapshot.compare_to(self._previous, "lineno")[:self.top]
+            ]
+        if json_manager is not None:
+            checkpoint["scopes"] = {
+                scope: measure_retained(entries) for scope, entries in sorted(json_manager.data.items())
+            }
+        if qa_manager is not None:
+            checkpoint["qa"] = qa_manager.get_stats()
+
+        self._previous = snapshot
+        tracemalloc.reset_peak()
+        self.checkpoints.append(checkpoint)
+        return checkpoint
+
+    def get_report(self):
+        """
+        Возвращает отчёт.
+
+        :return: Словарь {"peak_rss", "traced_peak", "checkpoints"}.
+        """
+        _, rss_peak = get_rss()
+        peaks = [checkpoint["traced_peak_since_previous"] for checkpoint in self.checkpoints]
+        return {
+            "peak_rss": rss_peak,
+            "traced_peak": max(peaks) if peaks else None,
+            "checkpoints": self.checkpoints,
+        }
+
+    def save(self, path):
+        """
+        Сохраняет отчёт в JSON.
+
+        :param path: Путь к файлу отчёта.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with atomic_open(path) as file:
+            dump(self.get_report(), file, indent=4)
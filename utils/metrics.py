@@ -0,0 +1,356 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from formatters.output_writers import atomic_open
+from utils.serializer import dump
+
+# Префикс имён метрик в формате Prometheus
+PROMETHEUS_PREFIX = "project2jsonl_"
+
+# Границы корзин гистограмм длительностей (секунды)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def get_metrics_report_path(output_dir, prefix):
+    """
+    Возвращает путь к отчёту метрик запуска.
+
+    :param output_dir: Каталог вывода.
+    :param prefix: Префикс проекта.
+    :return: Путь {output_dir}/{prefix}_metrics.json.
+    """
+    return os.path.join(output_dir, f"{prefix}_metrics.json")
+
+
+def _escape_label(value):
+    """
+    Экранирует значение метки для текстового формата Prometheus.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """
+    Гистограмма наблюдений с фиксированными корзинами (как histogram в Prometheus).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: Возрастающие верхние границы корзин (+Inf добавляется автоматически).
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """
+        Добавляет наблюдение.
+
+        :param value: Значение.
+        """
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative_counts(self):
+        """
+        Возвращает накопленные счётчики корзин (количество наблюдений не больше границы).
+
+        :return: Список пар (граница, количество); последняя граница — math.inf.
+        """
+        result, total = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append((math.inf, self.count))
+        return result
+
+    def quantile(self, q):
+        """
+        Оценивает квантиль по корзинам (верхняя граница корзины, в которую он попадает).
+
+        :param q: Квантиль от 0 до 1.
+        :return: Оценка или None, если наблюдений нет.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative_counts():
+            if total >= rank:
+                return self.max if bound == math.inf else min(bound, self.max)
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик запуска: счётчики и гистограммы с метками. Потокобезопасен: метрики пишутся
+    из стадий конвейера, обработчиков, парсеров, LLMAssist, кэша запросов и JSONManager.
+
+    В конце запуска реестр сохраняется машиночитаемым отчётом (save_report), а для долгих запусков
+    может периодически выгружаться в textfile Prometheus (TextfileExporter).
+
+    Пример:
+        metrics.inc("llm_cache_lookups_total", result="hit")
+        with metrics.timer("llm_request_seconds"):
+            ...
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """
+        Увеличивает счётчик.
+
+        :param name: Имя метрики (например, "records_written_total").
+        :param value: Приращение.
+        :param labels: Метки (например, scope="python_files").
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        """
+        Добавляет наблюдение в гистограмму.
+
+        :param name: Имя метрики (например, "llm_request_seconds").
+        :param value: Значение.
+        :param buckets: Границы корзин (используются при первом наблюдении метрики с этими метками).
+        :param labels: Метки.
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Измеряет длительность блока и добавляет её в гистограмму (в том числе при исключении).
+
+        :param name: Имя метрики.
+        :param labels: Метки.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed_iter(self, iterable, name, **labels):
+        """
+        Перебирает элементы, суммируя время получения каждого элемента в счётчике {name}_seconds_total
+        и количество элементов в {name}_items_total. Время обработки элементов вызывающим кодом не учитывается.
+
+        :param iterable: Итерируемый источник (например, обход файлов проекта).
+        :param name: Базовое имя метрик (например, "discovery").
+        :param labels: Метки.
+        :yield: Элементы источника.
+        """
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.inc(f"{name}_seconds_total", time.perf_counter() - started, **labels)
+                return
+            self.inc(f"{name}_seconds_total", time.perf_counter() - started, **labels)
+            self.inc(f"{name}_items_total", **labels)
+            yield item
+
+    def record_error(self, error, stage):
+        """
+        Учитывает ошибку по типу исключения.
+
+        :param error: Исключение.
+        :param stage: Место возникновения (например, "process_file", "llm").
+        """
+        self.inc("errors_total", type=type(error).__name__, stage=stage)
+
+    def get_counter(self, name, **labels):
+        """
+        Возвращает значение счётчика (0, если его нет).
+
+        :param name: Имя метрики.
+        :param labels: Метки.
+        :return: Значение.
+        """
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def total(self, name):
+        """
+        Возвращает сумму счётчика по всем меткам.
+
+        :param name: Имя метрики.
+        :return: Сумма (0, если счётчика нет).
+        """
+        with self._lock:
+            return sum(value for (counter_name, _), value in self._counters.items() if counter_name == name)
+
+    def get_report(self):
+        """
+        Возвращает отчёт по всем метрикам.
+
+        :return: Словарь {"started_at", "elapsed_seconds", "counters", "histograms"}; счётчики и гистограммы
+                 сгруппированы по имени, каждая серия содержит метки и значения.
+        """
+        with self._lock:
+            counters, histograms = {}, {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({
+                    "labels": dict(labels), "value": round(value, 6) if isinstance(value, float) else value
+                })
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                histograms.setdefault(name, []).append({
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": round(histogram.sum, 6),
+                    "min": histogram.min,
+                    "max": histogram.max,
+                    "mean": round(histogram.sum / histogram.count, 6) if histogram.count else None,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                })
+        return {
+            "started_at": datetime.fromtimestamp(self.started).isoformat(),
+            "elapsed_seconds": round(time.time() - self.started, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def save_report(self, path, extra=None):
+        """
+        Сохраняет отчёт в JSON.
+
+        :param path: Путь к файлу отчёта.
+        :param extra: Дополнительные разделы отчёта (например, метрики конвейера).
+        """
+        report = self.get_report()
+        report.update(extra or {})
+        with atomic_open(path) as file:
+            dump(report, file, indent=4)
+
+    def render_prometheus(self):
+        """
+        Форматирует метрики в текстовом формате экспозиции Prometheus.
+
+        :return: Строка.
+        """
+        def format_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + "}"
+
+        def format_bound(bound):
+            return "+Inf" if bound == math.inf else repr(float(bound))
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = [(key, histogram.cumulative_counts(), histogram.sum, histogram.count)
+                          for key, histogram in sorted(self._histograms.items())]
+
+        declared = set()
+        for (name, labels), value in counters:
+            metric = PROMETHEUS_PREFIX + name
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{format_labels(labels)} {value}")
+        for (name, labels), buckets, total, count in histograms:
+            metric = PROMETHEUS_PREFIX + name
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            for bound, cumulative in buckets:
+                lines.append(f"{metric}_bucket{format_labels(labels, [('le', format_bound(bound))])} {cumulative}")
+            lines.append(f"{metric}_sum{format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Атомарно записывает метрики в textfile для node_exporter (коллектор textfile).
+
+        :param path: Путь к файлу (обычно с расширением .prom).
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with atomic_open(path) as file:
+            file.write(self.render_prometheus())
+
+    def reset(self):
+        """
+        Очищает все метрики (например, между циклами режима наблюдения или в тестах).
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+        self.started = time.time()
+
+
+class TextfileExporter:
+    """
+    Периодическая выгрузка реестра в textfile Prometheus в фоновом потоке.
+    """
+
+    def __init__(self, registry, path, interval=30.0):
+        """
+        :param registry: MetricsRegistry.
+        :param path: Путь к файлу .prom.
+        :param interval: Интервал обновления в секундах.
+        """
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Запускает фоновую выгрузку.
+        """
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.registry.write_prometheus(self.path)
+
+    def stop(self):
+        """
+        Останавливает выгрузку и записывает итоговые значения.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.registry.write_prometheus(self.path)
+
+
+# Глобальный реестр метрик запуска
+metrics = MetricsRegistry()
@@ -0,0 +1,117 @@
+import atexit
+import os
+import subprocess
+import threading
+from dotenv import load_dotenv
+from utils.serializer import loads
+
+load_dotenv()
+
+# Держать ли процессы PHP/TS-парсеров запущенными между файлами (режим --serve)
+PERSISTENT_PARSERS = os.getenv("PERSISTENT_PARSERS", "false").lower() == "true"
+
+
+class PersistentParser:
+    """
+    Процесс внешнего парсера в постоянном режиме (--serve): путь к файлу передаётся строкой в stdin,
+    результат читается одной строкой JSON из stdout. Интерпретатор и библиотеки парсера загружаются
+    один раз, а не на каждый файл.
+
+    Экземпляры создаются через get() — по одному на команду — и закрываются при выходе из программы.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, command, cwd):
+        """
+        :param command: Команда запуска парсера (включая аргумент --serve).
+        :param cwd: Рабочий каталог процесса.
+        """
+        self.command = command
+        self.cwd = cwd
+        self._process = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, command, cwd):
+        """
+        Возвращает общий экземпляр для команды, создавая его при первом обращении.
+
+        :param command: Команда запуска парсера.
+        :param cwd: Рабочий каталог процесса.
+        :return: PersistentParser.
+        """
+        key = (tuple(command), cwd)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls._instances[key] = cls(command, cwd)
+            return instance
+
+    def _start(self):
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=None,  # Диагностика парсера выводится в stderr основного процесса
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            cwd=self.cwd
+        )
+
+    def parse(self, file_path):
+        """
+        Разбирает файл в постоянном процессе, перезапуская процесс, если он завершился.
+
+        :param file_path: Путь к файлу.
+        :return: Результат разбора (словарь).
+        :raises RuntimeError: Если процесс не вернул результат.
+        """
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            try:
+                self._process.stdin.write(os.path.abspath(file_path) + "\n")
+                self._process.stdin.flush()
+                line = self._process.stdout.readline()
+            except (BrokenPipeError, OSError) as e:
+                self._stop()
+                raise RuntimeError(f"Parser process {self.command[0]} failed: {e}")
+            if not line:
+                # Процесс упал на этом файле; следующий вызов запустит новый
+                self._stop()
+                raise RuntimeError(f"Parser process {self.command[0]} exited while parsing {file_path}.")
+        return loads(line)
+
+    def _stop(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    def close(self):
+        """Завершает процесс парсера."""
+        with self._lock:
+            self._stop()
+
+    @classmethod
+    def close_all(cls):
+        """Завершает все постоянные процессы парсеров."""
+        with cls._instances_lock:
+            instances = list(cls._instances.values())
+            cls._instances.clear()
+        for instance in instances:
+            instance.close()
+
+
+atexit.register(PersistentParser.close_all)
@@ -0,0 +1,232 @@
+import queue
+import threading
+import time
+from utils.metrics import metrics
+
+# Маркер окончания потока элементов
+_STOP = object()
+
+# Границы корзин гистограммы глубины очередей
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Stage:
+    """
+    Стадия конвейера: функция, применяемая к каждому элементу в workers потоках.
+    Перед стадией стоит ограниченная очередь: если стадия не успевает, предыдущие
+    стадии блокируются на записи в очередь (backpressure), а не накапливают элементы в памяти.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=16):
+        """
+        :param name: Название стадии (для метрик).
+        :param func: Функция (элемент) -> элемент. Если возвращает None, элемент отбрасывается.
+        :param workers: Количество потоков стадии.
+        :param queue_size: Размер входной очереди стадии.
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.processed = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.depth_max = 0
+        self._active = self.workers
+        self._lock = threading.Lock()
+
+    def sample_depth(self):
+        """
+        Снимает текущую глубину входной очереди.
+        """
+        depth = self.queue.qsize()
+        metrics.observe("pipeline_queue_depth", depth, buckets=QUEUE_DEPTH_BUCKETS, stage=self.name)
+        with self._lock:
+            self.depth_total += depth
+            self.depth_samples += 1
+            self.depth_max = max(self.depth_max, depth)
+
+    def get_metrics(self):
+        """
+        Возвращает метрики стадии.
+
+        :return: Словарь {"workers", "processed", "dropped", "busy_seconds", "queue_depth", "queue_max", "queue_avg"}.
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "queue_depth": self.queue.qsize(),
+                "queue_max": self.depth_max,
+                "queue_avg": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            }
+
+
+class Pipeline:
+    """
+    Конвейер из стадий, связанных ограниченными очередями. Элементы источника проходят стадии
+    по порядку; каждая стадия работает в своих потоках, поэтому ввод-вывод, разбор и ожидание LLM
+    перекрываются. Результаты передаются потребителю в вызывающем потоке в порядке источника.
+
+    Число элементов в работе ограничено окном: источник берёт слот перед каждым элементом, а слот
+    освобождается, когда элемент передан потребителю. Поэтому медленный элемент не позволяет
+    остальным потокам накопить за ним в буфере упорядочивания неограниченное число результатов.
+
+    Пример:
+        pipeline = Pipeline([Stage("read", read_file, workers=2), Stage("parse", parse, workers=4)])
+        pipeline.run(files, consumer=write)
+    """
+
+    def __init__(self, stages, output_queue_size=16, window=None):
+        """
+        :param stages: Список Stage.
+        :param output_queue_size: Размер очереди перед потребителем.
+        :param window: Наибольшее число элементов в работе (от источника до потребителя). По умолчанию —
+                       суммарная ёмкость очередей и потоков стадий.
+        """
+        self.stages = stages
+        self.output = queue.Queue(maxsize=max(1, output_queue_size))
+        if window is None:
+            window = sum(stage.queue.maxsize + stage.workers for stage in stages) + self.output.maxsize
+        self.window = max(1, window)
+        self._slots = threading.Semaphore(self.window)
+        self.reorder_max = 0  # Наибольшее число результатов, ожидавших более ранних элементов
+        self._abort = threading.Event()
+        self._error = None
+
+    def _put(self, target, item):
+        """
+        Кладёт элемент в очередь, прерываясь при остановке конвейера.
+        """
+        while not self._abort.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _acquire_slot(self):
+        """
+        Занимает слот окна, прерываясь при остановке конвейера.
+
+        :return: True, если слот занят.
+        """
+        while not self._abort.is_set():
+            if self._slots.acquire(timeout=0.1):
+                return True
+        return False
+
+    def _feed(self, source):
+        first = self.stages[0] if self.stages else None
+        target = first.queue if first else self.output
+        try:
+            for sequence, item in enumerate(source):
+                if not self._acquire_slot():
+                    break
+                self._put(target, (sequence, item))
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(first.workers if first else 1):
+                self._put(target, _STOP)
+
+    def _work(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        target = next_stage.queue if next_stage else self.output
+        while True:
+            stage.sample_depth()
+            entry = stage.queue.get()
+            if entry is _STOP:
+                break
+            sequence, item = entry
+            if item is not None and not self._abort.is_set():
+                started = time.perf_counter()
+                try:
+                    item = stage.func(item)
+                except Exception as e:
+                    self._fail(e)
+                    item = None
+                elapsed = time.perf_counter() - started
+                metrics.observe("pipeline_stage_seconds", elapsed, stage=stage.name)
+                with stage._lock:
+                    stage.busy_seconds += elapsed
+                    stage.processed += 1
+                    if item is None:
+                        stage.dropped += 1
+            # Отброшенные элементы передаются дальше пустыми, чтобы не нарушать порядок на выходе
+            self._put(target, (sequence, item))
+
+        # Последний завершившийся поток стадии передаёт маркер окончания следующей стадии
+        with stage._lock:
+            stage._active -= 1
+            last = stage._active == 0
+        if last:
+            for _ in range(next_stage.workers if next_stage else 1):
+                self._put(target, _STOP)
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._abort.set()
+
+    def run(self, source, consumer):
+        """
+        Пропускает элементы источника через стадии и передаёт результаты потребителю по порядку.
+
+        :param source: Итерируемый источник элементов (читается в отдельном потоке).
+        :param consumer: Функция (элемент), вызываемая в текущем потоке для каждого результата.
+        :raises Exception: Первая ошибка стадии или источника (после остановки конвейера).
+        """
+        threads = [threading.Thread(target=self._feed, args=(source,), name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=self._work, args=(index,), name=f"pipeline-{stage.name}-{number}", daemon=True)
+                for number in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        expected = 0
+        try:
+            while True:
+                try:
+                    entry = self.output.get(timeout=0.1)
+                except queue.Empty:
+                    if self._abort.is_set():
+                        break  # После ошибки маркеры окончания не передаются, потоки не дожидаемся
+                    continue
+                if entry is _STOP:
+                    break
+                sequence, item = entry
+                pending[sequence] = item
+                self.reorder_max = max(self.reorder_max, len(pending))
+                while expected in pending:
+                    item = pending.pop(expected)
+                    expected += 1
+                    self._slots.release()
+                    if item is not None and not self._abort.is_set():
+                        consumer(item)
+        except BaseException:
+            self._abort.set()
+            raise
+
+        if self._error is not None:
+            raise self._error
+        for thread in threads:
+            thread.join()
+
+    def get_metrics(self):
+        """
+        Возвращает метрики стадий и глубину очереди перед потребителем.
+
+        :return: Словарь {название стадии: метрики, "output": {...}}.
+        """
+        metrics = {stage.name: stage.get_metrics() for stage in self.stages}
+        metrics["output"] = {"queue_depth": self.output.qsize(), "reorder_max": self.reorder_max}
+        return metrics
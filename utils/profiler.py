@@ -0,0 +1,286 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from formatters.output_writers import atomic_open
+
+# Активный профилировщик запуска (--profile); None — профилирование выключено
+_active = None
+
+
+def get_profile_paths(output_dir, prefix):
+    """
+    Возвращает пути к результатам профилирования.
+
+    :param output_dir: Каталог вывода.
+    :param prefix: Префикс проекта.
+    :return: Словарь {"report": .txt, "collapsed": .collapsed, "stats": .prof}.
+    """
+    base = os.path.join(output_dir, f"{prefix}_profile")
+    return {"report": f"{base}.txt", "collapsed": f"{base}.collapsed", "stats": f"{base}.prof"}
+
+
+@contextmanager
+def profile_bucket(name):
+    """
+    Отмечает блок как ожидание с собственным именем (например, "subprocess:php", "llm_wait"): в отчёте
+    профилирования его время учитывается отдельно, а в свёрнутых стеках блок виден отдельным кадром,
+    а не безымянным ожиданием ввода-вывода. Без профилирования ничего не делает.
+
+    :param name: Название корзины.
+    """
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.bucket(name):
+        yield
+
+
+@contextmanager
+def profile_file(relative_path):
+    """
+    Профилирует обработку файла, если профилируется выборка файлов и файл в неё попадает.
+
+    :param relative_path: Относительный путь к файлу.
+    """
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.file(relative_path):
+        yield
+
+
+class RunProfiler:
+    """
+    Профилирование запуска (--profile): cProfile во всех потоках (в том числе в потоках стадий конвейера)
+    и выборка стеков потоков с заданным интервалом для свёрнутых стеков (формат flamegraph.pl,
+    speedscope, inferno).
+
+    При sample_rate < 1 профилируется только детерминированная выборка файлов: cProfile включается
+    на время обработки выбранного файла, а в свёрнутые стеки попадают только потоки, обрабатывающие
+    выбранные файлы.
+
+    Время в блоках profile_bucket (процессы PHP/TS-парсеров, ожидание ответа LLM) суммируется
+    по корзинам и выводится в начале отчёта.
+    """
+
+    def __init__(self, sample_rate=1.0, interval=0.005):
+        """
+        :param sample_rate: Доля профилируемых файлов (0 < sample_rate <= 1).
+        :param interval: Интервал выборки стеков, сек.
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError("Profile sample rate must be in (0, 1].")
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.started = None
+        self.elapsed = 0.0
+        self.stacks = Counter()  # {"поток;кадр;...;кадр": количество выборок}
+        self.samples = 0
+        self.files = set()  # Профилированные файлы (при выборке); файл проходит несколько стадий конвейера
+        self.bucket_seconds = Counter()
+        self.bucket_calls = Counter()
+        self._profiles = []  # Профили cProfile по потокам
+        self._local = threading.local()
+        self._buckets = {}  # {идентификатор потока: стек названий корзин}
+        self._sampled_threads = set()  # Потоки, обрабатывающие выбранные файлы (при выборке)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    @property
+    def whole_run(self):
+        return self.sample_rate >= 1
+
+    def _get_profile(self):
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        return profile
+
+    def _enable_thread(self, *args):
+        # Вызывается в каждом новом потоке (threading.setprofile): cProfile заменяет собой эту функцию
+        try:
+            self._get_profile().enable()
+        except ValueError:
+            sys.setprofile(None)  # В Python 3.12+ единственный профилировщик уже видит все потоки
+
+    def start(self):
+        """
+        Включает профилирование.
+        """
+        global _active
+        self.started = time.perf_counter()
+        # Поток выборки стеков запускается до установки профилировщика потоков, чтобы не попасть в отчёт
+        self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._sampler.start()
+        if self.whole_run:
+            threading.setprofile(self._enable_thread)
+            self._get_profile().enable()
+        _active = self
+
+    def stop(self):
+        """
+        Выключает профилирование.
+        """
+        global _active
+        _active = None
+        if self.whole_run:
+            threading.setprofile(None)
+            self._get_profile().disable()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self.elapsed = time.perf_counter() - self.started
+
+    def is_sampled(self, relative_path):
+        """
+        Проверяет, входит ли файл в профилируемую выборку (по стабильному хэшу пути).
+
+        :param relative_path: Относительный путь к файлу.
+        :return: bool.
+        """
+        return zlib.crc32(relative_path.replace(os.sep, "/").encode("utf-8")) % 10000 < self.sample_rate * 10000
+
+    @contextmanager
+    def file(self, relative_path):
+        """
+        Профилирует обработку файла из выборки (при профилировании всего запуска ничего не делает).
+
+        :param relative_path: Относительный путь к файлу.
+        """
+        if self.whole_run or not self.is_sampled(relative_path):
+            yield
+            return
+        thread_id = threading.get_ident()
+        profile = self._get_profile()
+        try:
+            profile.enable()
+        except ValueError:
+            profile = None  # Python 3.12+: файл уже профилируется в другом потоке
+        with self._lock:
+            self._sampled_threads.add(thread_id)
+            self.files.add(relative_path)
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            with self._lock:
+                self._sampled_threads.discard(thread_id)
+
+    @contextmanager
+    def bucket(self, name):
+        """
+        Учитывает время блока в корзине name.
+
+        :param name: Название корзины.
+        """
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._buckets.setdefault(thread_id, []).append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._buckets[thread_id].pop()
+                self.bucket_seconds[name] += elapsed
+                self.bucket_calls[name] += 1
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            with self._lock:
+                buckets = {thread_id: stack[-1] for thread_id, stack in self._buckets.items() if stack}
+                sampled = None if self.whole_run else set(self._sampled_threads)
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (sampled is not None and thread_id not in sampled):
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                frames.reverse()
+                if thread_id in buckets:
+                    frames.append(f"[{buckets[thread_id]}]")
+                self.stacks[";".join(frames)] += 1
+                self.samples += 1
+
+    def get_stats(self):
+        """
+        Возвращает объединённую статистику cProfile всех потоков.
+
+        :return: pstats.Stats или None, если статистики нет.
+        """
+        profiles = []
+        for profile in self._profiles:
+            profile.create_stats()
+            if profile.stats:
+                profiles.append(profile)
+        if not profiles:
+            return None
+        return pstats.Stats(*profiles)
+
+    def render_report(self, sort="cumulative", limit=80):
+        """
+        Форматирует текстовый отчёт: время по корзинам ожидания и функции, отсортированные по sort.
+
+        :param sort: Ключ сортировки pstats ("cumulative", "tottime", "ncalls", ...).
+        :param limit: Количество строк функций.
+        :return: Строка.
+        """
+        scope = "весь запуск" if self.whole_run else f"выборка файлов {self.sample_rate:.0%}, файлов {len(self.files)}"
+        lines = [
+            f"Профилирование: {scope}, длительность {self.elapsed:.3f} с, выборок стеков {self.samples}.",
+            "",
+            "Корзины ожидания (суммарное время по всем потокам):",
+        ]
+        if self.bucket_seconds:
+            for name, seconds in self.bucket_seconds.most_common():
+                lines.append(f"  {name:<20} {seconds:10.3f} с  вызовов {self.bucket_calls[name]}")
+        else:
+            lines.append("  нет")
+        lines.append("")
+
+        stats = self.get_stats()
+        if stats is None:
+            lines.append("Статистика cProfile отсутствует.")
+            return "\n".join(lines) + "\n"
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(limit)
+        return "\n".join(lines) + "\n" + stream.getvalue()
+
+    def save(self, paths, sort="cumulative", limit=80):
+        """
+        Сохраняет текстовый отчёт, свёрнутые стеки и статистику cProfile (для snakeviz, pstats).
+
+        :param paths: Пути из get_profile_paths.
+        :param sort: Ключ сортировки отчёта.
+        :param limit: Количество строк функций в отчёте.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(paths["report"])), exist_ok=True)
+        with atomic_open(paths["report"]) as file:
+            file.write(self.render_report(sort, limit))
+        with atomic_open(paths["collapsed"]) as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        stats = self.get_stats()
+        if stats is not None:
+            stats.dump_stats(paths["stats"])
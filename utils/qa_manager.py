@@ -1,19 +1,39 @@
-import json
+import hashlib
 import os
+import sys
+import threading
 from dotenv import load_dotenv
+from formatters.output_writers import get_output_path, iter_jsonl_lines, open_jsonl_writer
+from utils.serializer import dumps, loads
 
 class QAManager:
     """
-    Синглетный класс для управления глобальным массивом вопросов и ответов.
+    Синглетный класс для управления глобальным набором вопросов и ответов.
+
+    Пары не накапливаются в памяти (они уже хранятся в классах записей): каждая новая пара сразу
+    дописывается в {prefix}_qa_global.jsonl, а повторы точной пары (вопрос, ответ) отбрасываются
+    по SHA-1. Для каждой пары считается, сколько раз она добавлена, поэтому пары файлов, разобранных
+    заново, можно убрать (remove_qa), не собирая набор из всех записей. Файл пишется во временный ({prefix}_qa_global.jsonl.tmp) со сбросом на диск каждые
+    QA_FLUSH_EVERY пар и атомарно заменяет целевой в save_to_jsonl, поэтому читатели не видят
+    недописанную версию, а при аварийном завершении сброшенные пары остаются во временном файле.
+    Методы безопасно вызывать из нескольких потоков.
     """
 
     _instance = None
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(QAManager, cls).__new__(cls)
-            cls._instance._qa_global = []  # Инициализация глобального массива QA
-            cls._instance._load_env()  # Загрузка параметров из .env
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(QAManager, cls).__new__(cls)
+                instance._lock = threading.Lock()
+                instance._writer = None  # Открывается при первой паре
+                instance._seen = {}  # SHA-1 пар (вопрос, ответ), записанных в текущий файл -> число добавлений
+                instance._written = 0
+                instance._duplicates = 0
+                instance._unflushed = 0
+                instance._load_env()  # Загрузка параметров из .env
+                cls._instance = instance
         return cls._instance
 
     @classmethod
@@ -24,48 +44,157 @@ class QAManager:
         load_dotenv()
         cls.OUTPUT_DIR = os.getenv("OUTPUT_DIR", "./output")
         cls.PROJECT_PREFIX = os.getenv("PROJECT_PREFIX", "project")
+        cls.OUTPUT_COMPRESSION = os.getenv("OUTPUT_COMPRESSION", "").strip().lower() or None
+        cls.COMPRESSION_BLOCK_SIZE = int(os.getenv("COMPRESSION_BLOCK_SIZE", "1048576"))
+        cls.COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+        cls.QA_FLUSH_EVERY = int(os.getenv("QA_FLUSH_EVERY", "100"))
+
+    @staticmethod
+    def get_qa_hash(question, answer):
+        """
+        Возвращает хэш пары для подавления повторов.
+
+        :param question: Текст вопроса.
+        :param answer: Текст ответа.
+        :return: SHA-1 (bytes).
+        """
+        return hashlib.sha1(dumps([question, answer]).encode("utf-8")).digest()
+
+    def _open_writer(self):
+        os.makedirs(self.OUTPUT_DIR, exist_ok=True)
+        output_file = os.path.join(self.OUTPUT_DIR, f"{self.PROJECT_PREFIX}_qa_global.jsonl")
+        saved_file = get_output_path(output_file, self.OUTPUT_COMPRESSION)
+        try:
+            writer = open_jsonl_writer(output_file, compression=self.OUTPUT_COMPRESSION,
+                                       block_size=self.COMPRESSION_BLOCK_SIZE, level=self.COMPRESSION_LEVEL)
+            if self._written and os.path.exists(saved_file):
+                # Файл уже сохранялся после clear_qa(): новая версия продолжает его, а не заменяет
+                for line in iter_jsonl_lines(saved_file):
+                    writer.write(line + "\n")
+            return writer
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при открытии глобального QA файла: {e}")
 
     def add_qa(self, question, answer, context=None):
         """
-        Добавляет пару вопрос-ответ (и опциональный контекст) в глобальный массив.
+        Дописывает пару вопрос-ответ (и опциональный контекст) в глобальный QA файл.
+        Пара, уже записанная в текущий файл, пропускается (контекст при сравнении не учитывается).
 
         :param question: Текст вопроса.
         :param answer: Текст ответа.
         :param context: Дополнительный контекст для вопроса.
+        :return: True, если пара записана; False, если это повтор.
         """
+        qa_hash = self.get_qa_hash(question, answer)
         qa_entry = {"question": question, "answer": answer}
         if context:
             qa_entry["context"] = context
-        self._qa_global.append(qa_entry)
+        line = dumps(qa_entry) + "\n"
 
-    def get_qa(self):
+        with self._lock:
+            if qa_hash in self._seen:
+                self._seen[qa_hash] += 1
+                self._duplicates += 1
+                return False
+            if self._writer is None:
+                self._writer = self._open_writer()
+            self._writer.write(line)
+            self._seen[qa_hash] = 1
+            self._written += 1
+            self._unflushed += 1
+            if self.QA_FLUSH_EVERY and self._unflushed >= self.QA_FLUSH_EVERY:
+                self._writer.flush()
+                self._unflushed = 0
+        return True
+
+    def remove_qa(self, pairs):
+        """
+        Убирает пары удалённых или разобранных заново записей. Пара остаётся в файле, пока её
+        добавления не убраны все (она может встречаться в нескольких классах); иначе файл
+        переписывается без неё — без разбора записей и повторного хэширования остальных пар.
+
+        :param pairs: Пары (вопрос, ответ) в том количестве, в котором они добавлялись.
+        :return: Количество пар, убранных из файла.
+        """
+        with self._lock:
+            dropped = set()
+            for question, answer in pairs:
+                qa_hash = self.get_qa_hash(question, answer)
+                count = self._seen.get(qa_hash)
+                if count is None:
+                    continue
+                if count > 1:
+                    self._seen[qa_hash] = count - 1
+                    self._duplicates -= 1
+                else:
+                    del self._seen[qa_hash]
+                    dropped.add(qa_hash)
+            if not dropped:
+                return 0
+
+            # Текущая версия (с недописанными парами) сохраняется и переписывается без убранных пар
+            output_file = os.path.join(self.OUTPUT_DIR, f"{self.PROJECT_PREFIX}_qa_global.jsonl")
+            saved_file = get_output_path(output_file, self.OUTPUT_COMPRESSION)
+            try:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+                writer = open_jsonl_writer(output_file, compression=self.OUTPUT_COMPRESSION,
+                                           block_size=self.COMPRESSION_BLOCK_SIZE, level=self.COMPRESSION_LEVEL)
+                if os.path.exists(saved_file):
+                    for line in iter_jsonl_lines(saved_file):
+                        qa_entry = loads(line)
+                        if self.get_qa_hash(qa_entry.get("question"), qa_entry.get("answer")) not in dropped:
+                            writer.write(line + "\n")
+            except Exception as e:
+                raise RuntimeError(f"Ошибка при обновлении глобального QA файла: {e}")
+            self._writer = writer
+            self._written -= len(dropped)
+            self._unflushed = 0
+            return len(dropped)
+
+    def get_stats(self):
         """
-        Возвращает глобальный массив QA.
+        Возвращает счётчики текущего файла.
 
-        :return: Список вопросов и ответов.
+        :return: Словарь {"written", "duplicates", "hashes_bytes"}: записанные пары, отброшенные повторы
+                 и память, занятая хэшами для подавления повторов.
         """
-        return self._qa_global
+        with self._lock:
+            hashes_bytes = sys.getsizeof(self._seen) + sum(sys.getsizeof(qa_hash) for qa_hash in self._seen)
+            return {"written": self._written, "duplicates": self._duplicates, "hashes_bytes": hashes_bytes}
 
     def save_to_jsonl(self):
         """
-        Сохраняет глобальный массив QA в JSONL-файл. Параметры берутся из .env:
+        Завершает глобальный QA файл: дописывает оставшиеся данные и заменяет им целевой
+        (без пар создаётся пустой файл). Параметры берутся из .env:
         - OUTPUT_DIR: Каталог для сохранения файла.
         - PROJECT_PREFIX: Префикс для имени файла.
-        """
-        os.makedirs(self.OUTPUT_DIR, exist_ok=True)
-        file_name = f"{self.PROJECT_PREFIX}_qa_global.jsonl"
-        output_file = os.path.join(self.OUTPUT_DIR, file_name)
+        - OUTPUT_COMPRESSION: Режим сжатия (например, "gzip").
 
-        try:
-            with open(output_file, "w", encoding="utf-8") as f:
-                for item in self._qa_global:
-                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
-            print(f"Глобальный QA файл сохранён в: {output_file}")
-        except Exception as e:
-            raise RuntimeError(f"Ошибка при сохранении глобального QA файла: {e}")
+        Пары, добавленные после сохранения, дописываются к сохранённым: следующее сохранение заменяет
+        файл версией со всеми парами с последнего clear_qa(), повторы отслеживаются до clear_qa().
+        """
+        with self._lock:
+            writer = self._writer or self._open_writer()
+            self._writer = None
+            self._unflushed = 0
+            try:
+                writer.close()
+            except Exception as e:
+                raise RuntimeError(f"Ошибка при сохранении глобального QA файла: {e}")
+            written, duplicates = self._written, self._duplicates
+        print(f"Глобальный QA файл сохранён в: {writer.path} (пар: {written}, повторов пропущено: {duplicates})")
 
     def clear_qa(self):
         """
-        Очищает глобальный массив QA.
+        Очищает глобальный набор QA: недописанный файл отбрасывается, счётчики и хэши повторов сбрасываются.
         """
-        self._qa_global = []
+        with self._lock:
+            if self._writer is not None:
+                self._writer.abort()
+                self._writer = None
+            self._seen = {}
+            self._written = 0
+            self._duplicates = 0
+            self._unflushed = 0
@@ -1,19 +1,37 @@
-import json
 import sqlite3
 import hashlib
 import os
+import threading
+from utils.metrics import metrics
+from utils.serializer import dumps, loads
 
-# Путь к файлу базы данных в корне проекта
+# Путь к файлу базы данных (по умолчанию в корне проекта)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, '../cache.db')
+DB_PATH = os.getenv("QUERY_CACHE_PATH") or os.path.join(BASE_DIR, '../cache.db')
 
-# Подключение к базе данных SQLite
-conn = sqlite3.connect(DB_PATH)
-c = conn.cursor()
+# Подключение к базе данных SQLite открывается при первом обращении к кэшу, поэтому запуск без LLM
+# не создаёт cache.db. Кэш используется из нескольких потоков (стадия обогащения конвейера),
+# поэтому соединение общее, а обращения к нему сериализуются блокировкой.
+conn = None
+c = None
+_lock = threading.Lock()
 
-# Создание таблицы, если её нет
-c.execute('''CREATE TABLE IF NOT EXISTS cache
-             (key TEXT PRIMARY KEY, value TEXT)''')
+
+def _get_cursor():
+    """
+    Возвращает курсор кэша, открывая базу данных и создавая таблицу при первом обращении.
+    Вызывается под _lock.
+
+    :return: sqlite3.Cursor.
+    """
+    global conn, c
+    if c is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        c = conn.cursor()
+        # Создание таблицы, если её нет
+        c.execute('''CREATE TABLE IF NOT EXISTS cache
+                     (key TEXT PRIMARY KEY, value TEXT)''')
+    return c
 
 def get_cached_response(query):
     """
@@ -22,9 +40,12 @@ def get_cached_response(query):
     :return: Распарсенный JSON-ответ или None, если записи нет.
     """
     key = hashlib.md5(query.encode('utf-8')).hexdigest()  # Генерация ключа
-    c.execute('SELECT value FROM cache WHERE key = ?', (key,))
-    row = c.fetchone()
-    return json.loads(row[0]) if row else None
+    with _lock:
+        cursor = _get_cursor()
+        cursor.execute('SELECT value FROM cache WHERE key = ?', (key,))
+        row = cursor.fetchone()
+    metrics.inc("query_cache_lookups_total", result="hit" if row else "miss")
+    return loads(row[0]) if row else None
 
 def save_response(query, response):
     """
@@ -33,5 +54,8 @@ def save_response(query, response):
     :param response: Ответ для сохранения (объект Python).
     """
     key = hashlib.md5(query.encode('utf-8')).hexdigest()  # Генерация ключа
-    c.execute('INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)', (key, json.dumps(response)))
-    conn.commit()
+    with _lock:
+        _get_cursor().execute('INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)',
+                              (key, dumps(response, ensure_ascii=True)))
+        conn.commit()
+    metrics.inc("query_cache_writes_total")
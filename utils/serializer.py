@@ -0,0 +1,172 @@
+import json
+import os
+from dotenv import load_dotenv
+
+
+def _to_json(obj):
+    """
+    Преобразует объекты моделей (например, чанки parsers.chunk_model) для сериализации.
+
+    :param obj: Объект с методом to_json().
+    :return: Сериализуемое представление.
+    :raises TypeError: Если объект не поддерживает сериализацию.
+    """
+    to_json = getattr(obj, "to_json", None)
+    if to_json is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_json()
+
+
+class StdlibBackend:
+    """
+    Сериализатор на базе стандартного модуля json.
+
+    Кодировщики создаются один раз для каждой комбинации параметров и переиспользуются:
+    json.dumps с нестандартными аргументами (например, ensure_ascii=False) создаёт
+    новый JSONEncoder на каждый вызов.
+    """
+
+    name = "json"
+
+    def __init__(self):
+        self._encoders = {}
+
+    def _get_encoder(self, indent, ensure_ascii, sort_keys):
+        """
+        Возвращает закэшированный кодировщик для указанных параметров.
+
+        :param indent: Отступ для человекопонятного вывода (None для компактной строки).
+        :param ensure_ascii: Экранировать ли не-ASCII символы.
+        :param sort_keys: Сортировать ли ключи словарей.
+        :return: Экземпляр json.JSONEncoder.
+        """
+        key = (indent, ensure_ascii, sort_keys)
+        encoder = self._encoders.get(key)
+        if encoder is None:
+            encoder = json.JSONEncoder(ensure_ascii=ensure_ascii, indent=indent, sort_keys=sort_keys, default=_to_json)
+            self._encoders[key] = encoder
+        return encoder
+
+    def dumps(self, obj, indent=None, ensure_ascii=False, sort_keys=False):
+        """
+        Сериализует объект в строку JSON.
+
+        :param obj: Объект для сериализации.
+        :param indent: Отступ (None для компактной строки JSONL).
+        :param ensure_ascii: Экранировать ли не-ASCII символы.
+        :param sort_keys: Сортировать ли ключи словарей.
+        :return: Строка JSON.
+        """
+        return self._get_encoder(indent, ensure_ascii, sort_keys).encode(obj)
+
+    def dump(self, obj, fp, indent=None, ensure_ascii=False, sort_keys=False):
+        """
+        Сериализует объект в открытый текстовый файл по частям, не собирая всю строку в памяти.
+
+        :param obj: Объект для сериализации.
+        :param fp: Файловый объект, открытый на запись в текстовом режиме.
+        :param indent: Отступ для человекопонятного вывода.
+        :param ensure_ascii: Экранировать ли не-ASCII символы.
+        :param sort_keys: Сортировать ли ключи словарей.
+        """
+        for chunk in self._get_encoder(indent, ensure_ascii, sort_keys).iterencode(obj):
+            fp.write(chunk)
+
+    def loads(self, data):
+        """
+        Десериализует строку или байты JSON.
+
+        :param data: Строка (str) или байты (bytes) JSON.
+        :return: Объект Python.
+        """
+        return json.loads(data)
+
+
+class OrjsonBackend(StdlibBackend):
+    """
+    Сериализатор с ускоренным разбором через orjson.
+
+    orjson не умеет выводить разделители ", " и ": " стандартного модуля, поэтому запись
+    остаётся на переиспользуемых кодировщиках StdlibBackend — вывод совпадает байт в байт.
+    Разбор выполняется orjson; входные данные, которые orjson не принимает
+    (NaN, Infinity, целые вне 64 бит), разбираются стандартным модулем.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        super().__init__()
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data):
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            return json.loads(data)
+
+
+_BACKENDS = {
+    "json": StdlibBackend,
+    "orjson": OrjsonBackend,
+}
+
+_backend = None
+
+
+def create_backend(name="auto"):
+    """
+    Создаёт сериализатор по имени.
+
+    :param name: "json", "orjson" или "auto" (orjson, если он установлен, иначе json).
+    :return: Экземпляр сериализатора.
+    """
+    if name == "auto":
+        try:
+            return OrjsonBackend()
+        except ImportError:
+            return StdlibBackend()
+
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}'. Available: auto, {', '.join(_BACKENDS)}.")
+    return _BACKENDS[name]()
+
+
+def get_backend():
+    """
+    Возвращает текущий сериализатор. При первом вызове выбирает его по переменной JSON_BACKEND.
+
+    :return: Экземпляр сериализатора.
+    """
+    global _backend
+    if _backend is None:
+        load_dotenv()
+        _backend = create_backend(os.getenv("JSON_BACKEND", "auto").strip().lower() or "auto")
+    return _backend
+
+
+def set_backend(name):
+    """
+    Переключает сериализатор для всех путей чтения и записи.
+
+    :param name: Имя сериализатора ("auto", "json", "orjson").
+    :return: Новый сериализатор.
+    """
+    global _backend
+    _backend = create_backend(name)
+    return _backend
+
+
+def dumps(obj, indent=None, ensure_ascii=False, sort_keys=False):
+    """Сериализует объект в строку JSON текущим сериализатором."""
+    return get_backend().dumps(obj, indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+
+
+def dump(obj, fp, indent=None, ensure_ascii=False, sort_keys=False):
+    """Сериализует объект в текстовый файл текущим сериализатором."""
+    get_backend().dump(obj, fp, indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+
+
+def loads(data):
+    """Десериализует JSON текущим сериализатором."""
+    return get_backend().loads(data)
@@ -0,0 +1,209 @@
+import hashlib
+import heapq
+import os
+from collections import defaultdict
+from formatters.delta_exporter import find_jsonl_file
+from formatters.output_writers import atomic_open, iter_jsonl_lines
+from formatters.shard_manifest import get_record_source
+from utils.serializer import dump, loads
+
+# Версия формата описания шарда
+SHARD_INFO_VERSION = 1
+
+# Способы распределения файлов по шардам
+SHARD_BALANCE_MODES = ("hash", "size")
+
+
+def parse_shard_spec(spec):
+    """
+    Разбирает номер шарда в формате "i/N" (i от 1 до N).
+
+    :param spec: Строка, например "2/4".
+    :return: Кортеж (индекс шарда от 0, количество шардов).
+    :raises ValueError: Если формат неверен.
+    """
+    try:
+        number, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}': expected i/N, for example 1/4.")
+    if count < 1 or not 1 <= number <= count:
+        raise ValueError(f"Invalid shard '{spec}': i must be between 1 and N.")
+    return number - 1, count
+
+
+def get_shard_info_path(output_dir, prefix):
+    """
+    Возвращает путь к описанию шарда.
+
+    :param output_dir: Каталог вывода шарда.
+    :param prefix: Префикс проекта.
+    :return: Путь {output_dir}/{prefix}_shard.json.
+    """
+    return os.path.join(output_dir, f"{prefix}_shard.json")
+
+
+def hash_shard(relative_path, count):
+    """
+    Определяет шард файла по стабильному хэшу относительного пути (не зависит от процесса и хоста).
+
+    :param relative_path: Путь относительно корня проекта.
+    :param count: Количество шардов.
+    :return: Индекс шарда от 0.
+    """
+    digest = hashlib.sha1(relative_path.replace(os.sep, "/").encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def plan_size_balanced_shards(sizes, count):
+    """
+    Распределяет файлы по шардам с примерно равным суммарным размером (жадно, от крупных к мелким:
+    каждый файл попадает в наименее загруженный шард). Результат зависит только от путей и размеров.
+
+    :param sizes: Словарь {относительный путь: размер в байтах}.
+    :param count: Количество шардов.
+    :return: Словарь {относительный путь: индекс шарда}.
+    """
+    loads_heap = [(0, index) for index in range(count)]
+    assignment = {}
+    for relative_path, size in sorted(sizes.items(), key=lambda item: (-item[1], item[0])):
+        load, index = heapq.heappop(loads_heap)
+        assignment[relative_path] = index
+        heapq.heappush(loads_heap, (load + size, index))
+    return assignment
+
+
+class ShardOrder:
+    """
+    Приёмник записей JSONManager для запуска шарда: запоминает для каждой записи позицию её файла
+    в общем порядке обхода проекта. По этим позициям merge восстанавливает порядок записей,
+    совпадающий с обработкой на одном хосте.
+    """
+
+    def __init__(self, index, count, balance, positions):
+        """
+        :param index: Индекс шарда от 0.
+        :param count: Количество шардов.
+        :param balance: Способ распределения ("hash" или "size").
+        :param positions: Словарь {относительный путь: список позиций файла в общем порядке обхода}.
+        """
+        self.index = index
+        self.count = count
+        self.balance = balance
+        self.positions = positions
+        self.order = defaultdict(list)  # {область: позиции записей в порядке добавления}
+        self._calls = defaultdict(int)
+
+    def add_records(self, scope, entries):
+        """
+        Запоминает позиции добавленных записей (интерфейс приёмника JSONManager).
+        Один вызов соответствует одной обработке файла; повторная обработка того же файла
+        получает его следующую позицию в порядке обхода.
+
+        :param scope: Название области данных.
+        :param entries: Список записей.
+        """
+        call_positions = {}
+        for entry in entries:
+            source = get_record_source(entry)
+            if source not in call_positions:
+                occurrences = self.positions.get(source) or [-1]
+                call_positions[source] = occurrences[min(self._calls[source], len(occurrences) - 1)]
+                self._calls[source] += 1
+            self.order[scope].append(call_positions[source])
+
+    def flush(self):
+        """
+        Ничего не делает: описание шарда сохраняется через save().
+        """
+
+    def close(self):
+        """
+        Ничего не делает: описание шарда сохраняется через save().
+        """
+
+    def save(self, path):
+        """
+        Сохраняет описание шарда.
+
+        :param path: Путь к файлу (см. get_shard_info_path).
+        """
+        with atomic_open(path) as file:
+            dump({
+                "version": SHARD_INFO_VERSION,
+                "index": self.index,
+                "count": self.count,
+                "balance": self.balance,
+                "scopes": dict(self.order),
+            }, file)
+
+
+def load_shard_infos(shard_dirs, prefix):
+    """
+    Загружает описания шардов и проверяет, что это полный набор шардов одного запуска.
+
+    :param shard_dirs: Каталоги вывода шардов.
+    :param prefix: Префикс проекта.
+    :return: Список пар (каталог, описание), упорядоченный по индексу шарда.
+    :raises ValueError: Если описания нет, набор неполон или шарды из разных разбиений.
+    """
+    infos = []
+    for shard_dir in shard_dirs:
+        info_path = get_shard_info_path(shard_dir, prefix)
+        if not os.path.exists(info_path):
+            raise ValueError(f"Shard description not found: {info_path}")
+        with open(info_path, 'r', encoding='utf-8') as file:
+            info = loads(file.read())
+        if info.get("version") != SHARD_INFO_VERSION:
+            raise ValueError(f"Unsupported shard description version in {info_path}.")
+        infos.append((shard_dir, info))
+
+    counts = {info["count"] for _, info in infos}
+    if len(counts) != 1:
+        raise ValueError(f"Shards belong to different splits: counts {sorted(counts)}.")
+    indices = sorted(info["index"] for _, info in infos)
+    if indices != list(range(counts.pop())):
+        raise ValueError(f"Incomplete or duplicate shard set: {[index + 1 for index in indices]}.")
+    return sorted(infos, key=lambda item: item[1]["index"])
+
+
+def _iter_positioned_lines(shard_index, positions, lines):
+    """
+    Сопоставляет строки JSONL шарда с позициями записей.
+
+    :yield: Пары ((позиция, индекс шарда, номер строки), строка).
+    """
+    for number, (position, line) in enumerate(zip(positions, lines)):
+        yield (position, shard_index, number), line
+
+
+def iter_merged_records(shard_dirs, prefix):
+    """
+    Объединяет записи областей из каталогов шардов в порядке обработки на одном хосте.
+
+    Области перечисляются в порядке первого появления, записи внутри области — по позиции
+    файла в общем порядке обхода.
+
+    :param shard_dirs: Каталоги вывода шардов.
+    :param prefix: Префикс проекта.
+    :yield: Пары (область, запись).
+    """
+    infos = load_shard_infos(shard_dirs, prefix)
+
+    first_position = {}
+    for _, info in infos:
+        for scope, positions in info["scopes"].items():
+            if positions:
+                first_position[scope] = min(first_position.get(scope, positions[0]), positions[0])
+
+    for scope in sorted(first_position, key=lambda name: (first_position[name], name)):
+        streams = []
+        for shard_dir, info in infos:
+            positions = info["scopes"].get(scope)
+            if not positions:
+                continue
+            scope_file = find_jsonl_file(os.path.join(shard_dir, f"{prefix}_{scope}.jsonl"))
+            if scope_file is None:
+                raise ValueError(f"Scope file for '{scope}' not found in shard {shard_dir}.")
+            streams.append(_iter_positioned_lines(info["index"], positions, iter_jsonl_lines(scope_file)))
+        for _, line in heapq.merge(*streams, key=lambda item: item[0]):
+            yield scope, loads(line)
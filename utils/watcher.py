@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog необязателен: без него изменения находятся опросом
+    FileSystemEventHandler = object
+    Observer = None
+
+
+class _EventCollector(FileSystemEventHandler):
+    """Собирает пути из уведомлений файловой системы (watchdog)."""
+
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path:
+                self.watcher.notify(path)
+
+
+class ChangeWatcher:
+    """
+    Следит за изменениями файлов проекта под корнем.
+
+    Если установлен watchdog, используются уведомления файловой системы, иначе — опрос:
+    каталог периодически обходится и сравниваются размер и mtime файлов. Серии изменений
+    объединяются (debounce): изменения возвращаются, когда в течение debounce секунд новых не было.
+    """
+
+    def __init__(self, project_root, accepts_file, is_excluded_dir=None, interval=2.0, debounce=1.0,
+                 use_notifications=True):
+        """
+        :param project_root: Корень проекта.
+        :param accepts_file: Функция (абсолютный путь) -> bool: нужно ли следить за файлом.
+        :param is_excluded_dir: Функция (абсолютный путь каталога) -> bool для пропуска каталогов при опросе.
+        :param interval: Интервал опроса в секундах.
+        :param debounce: Время тишины в секундах, после которого серия изменений считается завершённой.
+        :param use_notifications: Использовать watchdog, если он установлен.
+        """
+        self.project_root = os.path.abspath(project_root)
+        self.accepts_file = accepts_file
+        self.is_excluded_dir = is_excluded_dir or (lambda directory: False)
+        self.interval = interval
+        self.debounce = debounce
+        self._pending = set()
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._observer = None
+
+        if use_notifications and Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_EventCollector(self), self.project_root, recursive=True)
+            self._observer.start()
+            self._snapshot = None
+        else:
+            self._snapshot = self.snapshot()
+
+    @property
+    def mode(self):
+        """Способ обнаружения изменений: "notifications" или "polling"."""
+        return "notifications" if self._observer is not None else "polling"
+
+    def notify(self, path):
+        """
+        Регистрирует изменение файла (вызывается из потока watchdog).
+
+        :param path: Абсолютный путь к файлу.
+        """
+        path = os.path.abspath(path)
+        if not path.startswith(self.project_root + os.sep) or not self.accepts_file(path):
+            return
+        with self._lock:
+            self._pending.add(os.path.relpath(path, self.project_root))
+        self._event.set()
+
+    def snapshot(self):
+        """
+        Снимает состояние отслеживаемых файлов.
+
+        :return: Словарь {относительный путь: (размер, mtime в наносекундах)}.
+        """
+        state = {}
+        for root, dirs, files in os.walk(self.project_root):
+            dirs[:] = [d for d in dirs if not self.is_excluded_dir(os.path.join(root, d))]
+            for file_name in files:
+                file_path = os.path.join(root, file_name)
+                if not self.accepts_file(file_path):
+                    continue
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue  # Файл удалён во время обхода
+                state[os.path.relpath(file_path, self.project_root)] = (stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def _poll(self):
+        current = self.snapshot()
+        changed = {path for path, signature in current.items() if self._snapshot.get(path) != signature}
+        changed.update(path for path in self._snapshot if path not in current)
+        self._snapshot = current
+        return changed
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        self._event.clear()
+        return pending
+
+    def wait_for_changes(self, stop_event=None):
+        """
+        Блокируется до серии изменений и возвращает затронутые файлы после периода тишины.
+
+        :param stop_event: threading.Event для остановки ожидания.
+        :return: Множество относительных путей (добавленных, изменённых и удалённых файлов);
+                 пустое множество, если ожидание остановлено.
+        """
+        changed = set()
+        while not changed:
+            if stop_event is not None and stop_event.is_set():
+                return changed
+            if self._observer is not None:
+                self._event.wait(self.interval)
+                changed = self._take_pending()
+            else:
+                time.sleep(self.interval)
+                changed = self._poll()
+
+        # Ждём, пока серия изменений не закончится
+        while True:
+            time.sleep(self.debounce)
+            more = self._take_pending() if self._observer is not None else self._poll()
+            if not more:
+                return changed
+            changed |= more
+
+    def close(self):
+        """Останавливает наблюдение."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None